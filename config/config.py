@@ -18,6 +18,13 @@ class Config:
     LATEST_DURATION_DAYS = 7
     DELETE_ORIGINAL_AFTER_UPLOAD = False
     INITIAL_MEDIA_INDEX = Constants.SETTINGS_INITIAL_END
+    DATABASE_IN_MEMORY = False
+    SLOW_QUERY_THRESHOLD_MS = 250
+    PREFETCH_MEMORY_BUDGET_MB = 1024
+    DISPLAY_CACHE_MAX_MB = 2048
+    HTTP_CONNECT_TIMEOUT_SECONDS = 5
+    HTTP_READ_TIMEOUT_SECONDS = 30
+    HTTP_RETRIES = 3
 
     CONFIG_FILE_PATH = "res/config.json"
 
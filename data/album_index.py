@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from data.orm import Album
+
+AlbumTag = str
+AlbumPath = str
+
+
+class AlbumIndex:
+    """Album hierarchy derived once from the Album table.
+
+    Album.path concatenates the tags from the root down to the album, so the
+    parent of an album is the tag just before its own and its descendants are
+    the albums whose path starts with its path (see DataManager._build_selection).
+    """
+
+    def __init__(self, albums: Sequence[Album]):
+        self.albums: list[Album] = list(albums)
+        self._parent_tags: dict[AlbumTag, AlbumTag | None] = {}
+        self._name_paths: dict[AlbumTag, AlbumPath] = {}
+
+        # Parents have shorter paths, so they are always resolved first
+        for album in sorted(self.albums, key=lambda x: len(x.path)):
+            parent_path = album.path[: -len(album.tag)]
+            parent_tag = parent_path[-3:] if parent_path else None
+            parent_name_path = self._name_paths.get(parent_tag) if parent_tag else None
+
+            self._parent_tags[album.tag] = parent_tag
+            self._name_paths[album.tag] = (
+                f"{parent_name_path}/{album.name}" if parent_name_path else album.name
+            )
+
+        self._paths_with_tags: list[tuple[AlbumPath, AlbumTag]] = sorted(
+            ((path, tag) for tag, path in self._name_paths.items()),
+            key=lambda x: x[0],
+        )
+
+    def get_paths_with_tags(self) -> list[tuple[AlbumPath, AlbumTag]]:
+        return list(self._paths_with_tags)
+
+    def get_parent_tag(self, tag: AlbumTag) -> AlbumTag | None:
+        return self._parent_tags.get(tag)
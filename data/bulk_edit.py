@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any, Final
+
+from data.helpers import date_to_julian, replace_in_people_field
+
+# Edits collected by gui.lists.DialogEditBulk.get_edit_data, keyed by Media field:
+#   topic/title/location/notes: {"mode": "overwrite", "input": ...}
+#                               or {"mode": "replace", "from": ..., "to": ...}
+#   tags: the above, or {"mode": "add" | "remove", "input": "a,b"}
+#   people: {"mode": "replace", "from": ..., "to": ...}
+#   date: {"option": <date_est combobox index>, "input": "DD.MM.YYYY"}
+#   private: {"value": 0..9}
+BulkEditData = dict[str, dict[str, Any]]
+
+TEXT_FIELDS: Final[tuple[str, ...]] = ("topic", "title", "location", "notes")
+# Fields stored as NULL rather than ""
+NULLABLE_FIELDS: Final[tuple[str, ...]] = ("topic", "title", "notes", "tags", "people")
+
+
+def _stored(field: str, value: str | None) -> str | None:
+    return (value or None) if field in NULLABLE_FIELDS else value
+
+
+def get_constant_values(edit_data: BulkEditData) -> dict[str, Any]:
+    """Values that are the same for every edited media (overwrites, privacy)."""
+    values: dict[str, Any] = {}
+    for field in (*TEXT_FIELDS, "tags"):
+        edit = edit_data.get(field)
+        if edit and edit["mode"] == "overwrite":
+            values[field] = _stored(field, edit["input"])
+    if edit_data.get("private"):
+        values["private"] = edit_data["private"]["value"]
+    return values
+
+
+def get_derived_fields(edit_data: BulkEditData) -> tuple[str, ...]:
+    """Fields whose new value depends on the current one."""
+    return tuple(
+        field
+        for field in (*TEXT_FIELDS, "tags", "people")
+        if edit_data.get(field) and edit_data[field]["mode"] != "overwrite"
+    )
+
+
+def get_new_date(edit_data: BulkEditData) -> tuple[float, str, int] | None:
+    """(date, date_text, date_est) the edited media move to, if the date is edited."""
+    if not edit_data.get("date"):
+        return None
+    date_text = edit_data["date"]["input"]
+    return date_to_julian(date_text), date_text, 7 - edit_data["date"]["option"]
+
+
+def edit_field(field: str, value: str | None, edit_data: BulkEditData) -> str | None:
+    """New stored value of a derived field (see get_derived_fields)."""
+    edit = edit_data[field]
+
+    if field == "people":
+        if value:
+            replaced = replace_in_people_field(value, edit["from"], edit["to"])
+            if replaced is not None:
+                value = replaced
+        return _stored(field, value)
+
+    if field == "tags" and value:
+        tags_list = value.split(",")
+        if edit["mode"] == "replace":
+            return _stored(
+                field,
+                ", ".join(tag.replace(edit["from"], edit["to"]) for tag in tags_list),
+            )
+        if edit["mode"] == "add":
+            return _stored(field, ",".join([*tags_list, *edit["input"].split(",")]))
+        if edit["mode"] == "remove":
+            for tag in edit["input"].split(","):
+                if tag in tags_list:
+                    tags_list.remove(tag)
+            return _stored(field, ",".join(tags_list))
+
+    if field == "tags" and edit["mode"] == "add":
+        return _stored(field, edit["input"])
+
+    if edit["mode"] == "replace" and value:
+        value = value.replace(edit["from"], edit["to"])
+    return _stored(field, value)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Final, Literal
+
+from data.orm import Media
+
+# Append-only change journal stored next to album_cloud.db in S3.
+#
+# Every upload of local edits is one small object under journal/ holding the full
+# Media rows it changed. Its key is a sequence number one past the last entry,
+# and it is created with If-None-Match: *, so S3 rather than the writer's clock
+# decides the order: of two writers taking the same number one fails and retries
+# with the next. Entry n + 1 is only written once entry n exists, so a listing
+# never misses an entry before the last one it returns, and replaying entries in
+# key order (upsert by media_uuid) leaves every client with the same rows.
+# album_cloud.db is the base: its "journal-cursor" metadata is the last entry
+# folded into it, and only entries after that are replayed on top (see
+# DataManager.update_local_db).
+#
+# Keys written before sequence numbers were "{time_ns:020d}-{uuid}.json"; the
+# sequence continues from the last of those, so they still sort first.
+JOURNAL_PREFIX: Final[str] = "journal/"
+JOURNAL_FORMAT_VERSION: Final[int] = 1
+JOURNAL_CURSOR_METADATA: Final[str] = "journal-cursor"
+
+# A writer folds the journal into album_cloud.db once this many entries pile up
+JOURNAL_COMPACTION_THRESHOLD: Final[int] = 100
+# Folded entries are kept this long for clients and compactions still reading them
+JOURNAL_RETENTION_SECONDS: Final[float] = 24 * 60 * 60
+# Sequence numbers a writer tries before giving up on other writers taking them
+JOURNAL_APPEND_ATTEMPTS: Final[int] = 10
+
+# Stored columns; the generated date part columns are derived on replay
+MEDIA_JOURNAL_COLUMNS: Final[tuple[str, ...]] = tuple(
+    column.name for column in Media.__table__.columns if column.computed is None
+)
+
+JournalOperation = Literal["insert", "edit", "delete", "reorder"]
+MediaRow = dict[str, Any]
+
+
+def get_entry_sequence(key: str) -> int:
+    """Sequence number of an entry (its nanosecond timestamp for older keys)."""
+    name = key[len(JOURNAL_PREFIX) :]
+    return int(name.split("-", 1)[0].split(".", 1)[0])
+
+
+def next_entry_key(last_key: str | None) -> str:
+    """Key of the entry after last_key, the first one if it is None."""
+    sequence = get_entry_sequence(last_key) + 1 if last_key else 1
+    return f"{JOURNAL_PREFIX}{sequence:020d}.json"
+
+
+def encode_entry(
+    changes: list[tuple[JournalOperation, MediaRow]], user_name: str
+) -> bytes:
+    entry = {
+        "version": JOURNAL_FORMAT_VERSION,
+        "at": time.time(),
+        "by": user_name,
+        "changes": [
+            {"op": operation, "media_uuid": row["media_uuid"], "row": row}
+            for operation, row in changes
+        ],
+    }
+    return json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
+
+def decode_entry(body: bytes) -> list[MediaRow]:
+    """Media rows of an entry, in the order they were changed."""
+    entry = json.loads(body.decode("utf-8"))
+    if entry.get("version") != JOURNAL_FORMAT_VERSION:
+        raise ValueError(f"Unsupported journal entry version: {entry.get('version')}")
+    return [
+        {name: change["row"].get(name) for name in MEDIA_JOURNAL_COLUMNS}
+        for change in entry["changes"]
+    ]
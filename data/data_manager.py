@@ -1,26 +1,141 @@
-import re
+import os
+import json
+import sqlite3
 import uuid
-from typing import Sequence, Literal, Iterator
+import threading
+import time
+from typing import Callable, Sequence, Literal, Iterable, Iterator
+from collections import OrderedDict
 from contextlib import contextmanager
-
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import create_engine, and_, or_, select, Engine, Select, event, func
+from functools import lru_cache
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import (
+    create_engine,
+    and_,
+    Connection,
+    or_,
+    select,
+    Engine,
+    Select,
+    event,
+    exists,
+    func,
+    literal_column,
+    null,
+    tuple_,
+    update,
+)
 
 from logger import log
 from config.config import Config
-from data.orm import Album, Media
+from data.orm import (
+    Album,
+    Media,
+    MediaAlbum,
+    MediaPerson,
+    MediaPersonToken,
+    media_search,
+)
+from data.album_index import AlbumIndex
+from data.media_index import (
+    MEDIA_INDEX_COLUMNS,
+    MediaIndex,
+    MediaIndexEntry,
+    MediaIndexStream,
+)
 from data.media_filter import MediaFilter
+from data.vocabulary import Vocabulary, VocabularyRow
+from data.query_profiler import ProfiledConnection, QueryProfiler
+from data.bulk_edit import (
+    BulkEditData,
+    edit_field,
+    get_constant_values,
+    get_derived_fields,
+    get_new_date,
+)
+from data.cloud_journal import (
+    JOURNAL_APPEND_ATTEMPTS,
+    JOURNAL_COMPACTION_THRESHOLD,
+    JOURNAL_CURSOR_METADATA,
+    JOURNAL_PREFIX,
+    JOURNAL_RETENTION_SECONDS,
+    MEDIA_JOURNAL_COLUMNS,
+    JournalOperation,
+    decode_entry,
+    encode_entry,
+    next_entry_key,
+)
+from data.filter_expression import (
+    FilterExpressionError,
+    fold_filter_expression,
+    iter_filter_terms,
+    parse_filter_expression,
+)
+from data.migrations import (
+    DATA_VERSION_SCHEMA_VERSION,
+    MEDIA_ALBUM_SCHEMA_VERSION,
+    MEDIA_DATE_PARTS_SCHEMA_VERSION,
+    MEDIA_PERSON_SCHEMA_VERSION,
+    MEDIA_PERSON_TOKEN_SCHEMA_VERSION,
+    MEDIA_SEARCH_SCHEMA_VERSION,
+    TRIM_WHITESPACE,
+    apply_migrations,
+    get_data_version,
+    get_schema_version,
+    is_media_search_in_sync,
+    rebuild_media_search,
+)
 from data.helpers import (
     date_to_julian,
     current_time_in_unix_subsec,
     normalize_date,
     date_includes,
+    date_part_values,
     turkish_normalize,
 )
 from ops import cloud_ops, file_ops
 from typing import Final
 
 ALBUM_DATABASE_FILENAME: Final[str] = "album.db"
+CLOUD_DATABASE_KEY: Final[str] = "album_cloud.db"
+# Cloud base ETag and journal position album.db matches; absent when unknown or
+# edited locally without an upload
+CLOUD_STATE_FILENAME: Final[str] = "album_cloud.json"
+# People/location counts and the DataVersion they match (see data/vocabulary.py)
+VOCABULARY_FILENAME: Final[str] = "album_vocabulary.json"
+# Trimmed from locations when counting them, as from people in MediaPerson
+VOCABULARY_WHITESPACE: Final[str] = TRIM_WHITESPACE
+DATABASE_DOWNLOAD_SUFFIX: Final[str] = ".download"
+
+# Per-connection SQLite tuning, applied once when the pool opens a connection
+DATABASE_POOL_SIZE: Final[int] = 5
+DATABASE_POOL_MAX_OVERFLOW: Final[int] = 5
+DATABASE_MMAP_SIZE: Final[int] = 256 * 1024 * 1024  # bytes
+DATABASE_CACHE_SIZE_KIB: Final[int] = 64 * 1024
+DATABASE_SIDECAR_SUFFIXES: Final[tuple[str, ...]] = ("-wal", "-shm")
+
+# Shorter keys cannot be answered by the trigram index and are scanned instead
+SEARCH_INDEX_MIN_KEY_LENGTH: Final[int] = 3
+QUICK_SEARCH_COLUMNS: Final[tuple[str, ...]] = (
+    "topic",
+    "title",
+    "location",
+    "people",
+    "tags",
+    "extension",
+    "date_text",
+)
+# Media per IN (...) statement, well below SQLite's bound parameter limit
+MEDIA_UUID_CHUNK_SIZE: Final[int] = 5000
+# Compiled field filter clauses, keyed by (expression, column, use_index)
+FILTER_CONDITION_CACHE_SIZE: Final[int] = 256
+# Filter results kept as MediaIndex, a few MB each for the whole library
+FILTER_RESULT_CACHE_SIZE: Final[int] = 16
+# Loaded before a streamed view is shown; enough to fill the thumbnail list
+MEDIA_STREAM_FIRST_PAGE_SIZE: Final[int] = 2000
 
 MediaUUID = str
 AlbumTag = str
@@ -28,36 +143,305 @@ AlbumPath = str
 
 
 class DataManager:
-    def __init__(self):
-        self.db_engine = None
+    def __init__(self, migrate: bool = True):
+        self.db_engine: Engine | None = None
+        self.migrate = migrate
+        self.schema_version = 0
+        self._search_index_valid = True
+        self._album_index: AlbumIndex | None = None
+        # Last synced cloud state, and local changes not yet in the journal
+        self._cloud_state: dict | None = None
+        self._journal_changes: dict[MediaUUID, JournalOperation] = {}
+        self._engine_lock = threading.Lock()
+        # Bumped whenever album.db changes; cached filter results are per generation
+        self._db_generation = 0
+        self._filter_results: OrderedDict[tuple, MediaIndex] = OrderedDict()
+        self._filter_results_lock = threading.Lock()
+        self._vocabulary: Vocabulary | None = None
+        self._vocabulary_lock = threading.RLock()
+        # In-memory copy of album.db for Config.DATABASE_IN_MEMORY; one connection,
+        # so _replica_lock is held for as long as it is used
+        self._replica_engine: Engine | None = None
+        self._replica_failed = False
+        self._replica_lock = threading.RLock()
+        self.query_profiler = QueryProfiler()
+
+    @staticmethod
+    def get_db_path() -> str:
+        return f"{Config.DATABASE_DIR}/{ALBUM_DATABASE_FILENAME}"
 
     def init_db_engine(self) -> None:
         self.db_engine = create_engine(
-            f"sqlite:///{Config.DATABASE_DIR}/{ALBUM_DATABASE_FILENAME}"
+            f"sqlite:///{self.get_db_path()}",
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+            connect_args={"factory": ProfiledConnection},
+        )
+        self.query_profiler.attach(self.db_engine)
+
+        def _configure_connection(dbapi_connection, connection_record):
+            """Register custom functions and apply PRAGMAs to a new SQLite connection."""
+            # Register Turkish text functions for case/i-insensitive search
+            dbapi_connection.create_function(
+                "turkish_normalize", 1, turkish_normalize, deterministic=True
+            )
+
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute(f"PRAGMA mmap_size={DATABASE_MMAP_SIZE}")
+                cursor.execute(f"PRAGMA cache_size=-{DATABASE_CACHE_SIZE_KIB}")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+            finally:
+                cursor.close()
+
+        event.listen(self.db_engine, "connect", _configure_connection)
+
+        try:
+            if self.migrate:
+                self.schema_version = apply_migrations(self.db_engine)
+            else:
+                with self.db_engine.connect() as connection:
+                    self.schema_version = get_schema_version(connection)
+        except Exception as e:
+            log(
+                "DataManager.init_db_engine",
+                f"Schema migration failed: {e}",
+                level="error",
+            )
+
+        self._search_index_valid = True
+        if self.use_search_index:
+            try:
+                with self.db_engine.connect() as connection:
+                    if not is_media_search_in_sync(connection):
+                        log(
+                            "DataManager.init_db_engine",
+                            "MediaSearch index out of sync, rebuilding.",
+                            level="warning",
+                        )
+                        rebuild_media_search(connection)
+                        connection.commit()
+            except Exception as e:
+                log(
+                    "DataManager.init_db_engine",
+                    f"MediaSearch index check failed: {e}",
+                    level="error",
+                )
+                self._search_index_valid = False
+
+    @property
+    def use_search_index(self) -> bool:
+        return (
+            self.schema_version >= MEDIA_SEARCH_SCHEMA_VERSION
+            and self._search_index_valid
         )
 
-        def _register_turkish_functions(dbapi_connection, connection_record):
-            """Register custom Turkish text functions with SQLite connection."""
-            dbapi_connection.create_function("turkish_normalize", 1, turkish_normalize)
+    @property
+    def use_album_index(self) -> bool:
+        return self.schema_version >= MEDIA_ALBUM_SCHEMA_VERSION
+
+    @property
+    def use_person_index(self) -> bool:
+        return self.schema_version >= MEDIA_PERSON_SCHEMA_VERSION
+
+    @property
+    def use_person_token_index(self) -> bool:
+        return self.schema_version >= MEDIA_PERSON_TOKEN_SCHEMA_VERSION
+
+    @property
+    def use_date_part_columns(self) -> bool:
+        return self.schema_version >= MEDIA_DATE_PARTS_SCHEMA_VERSION
 
-        # Register Turkish text functions for case/i-insensitive search
-        event.listen(self.db_engine, "connect", _register_turkish_functions)
+    @property
+    def use_data_version(self) -> bool:
+        return self.schema_version >= DATA_VERSION_SCHEMA_VERSION
 
     def get_db_engine(self) -> Engine | None:
-        if not self.db_engine:
-            self.init_db_engine()
-        return self.db_engine
+        with self._engine_lock:
+            if not self.db_engine:
+                self.init_db_engine()
+            return self.db_engine
+
+    def checkpoint_db(self) -> None:
+        """Fold the WAL back into album.db so the file alone holds every commit.
+
+        Must be called before album.db is read as a plain file (e.g. uploaded).
+        """
+        with self._engine_lock:
+            if not self.db_engine:
+                return
+            try:
+                with self.db_engine.connect() as connection:
+                    connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            except Exception as e:
+                log(
+                    "DataManager.checkpoint_db",
+                    f"WAL checkpoint failed: {e}",
+                    level="warning",
+                )
+
+    def close_db_engine(self) -> None:
+        """Checkpoint and close every pooled connection before album.db is replaced."""
+        self.checkpoint_db()
+        with self._engine_lock:
+            if self.db_engine:
+                self.db_engine.dispose()
+                self.db_engine = None
+
+    def close(self) -> None:
+        """Dispose of the pooled engine and the in-memory copy; for a DataManager
+        made for one task, such as a script's. Using it again reopens them."""
+        self.close_db_engine()
+        self._drop_replica()
+
+    def on_database_replaced(self) -> None:
+        """Hook for when album.db was swapped on disk (e.g. by update_local_db).
+
+        Drops pooled connections to the old file and removes sidecar files that
+        belonged to it, so the next session opens the new file cold-but-clean.
+        No checkpoint here: a leftover WAL must never be folded into the new file.
+        """
+        with self._engine_lock:
+            if self.db_engine:
+                self.db_engine.dispose()
+                self.db_engine = None
+            self._album_index = None
+        with self._replica_lock:
+            self._drop_replica()
+            self._replica_failed = False
+        self._invalidate_filter_results()
+        # Its DataVersion may match a counter of the new file by chance
+        with self._vocabulary_lock:
+            self._vocabulary = None
+            if os.path.exists(self._get_vocabulary_path()):
+                file_ops.delete_file(self._get_vocabulary_path())
+        for suffix in DATABASE_SIDECAR_SUFFIXES:
+            sidecar_path = f"{self.get_db_path()}{suffix}"
+            if os.path.exists(sidecar_path):
+                file_ops.delete_file(sidecar_path)
 
     @contextmanager
     def get_session(self) -> Iterator[Session]:
-        session = sessionmaker(bind=self.get_db_engine())()
+        session = Session(bind=self.get_db_engine())
+        event.listen(session, "after_commit", self._on_local_commit)
         try:
             yield session
         finally:
             session.close()
-            if self.db_engine:
-                self.db_engine.dispose()
-                self.db_engine = None
+
+    @contextmanager
+    def get_read_session(self) -> Iterator[Session]:
+        """Session for queries only: reads the in-memory replica of album.db when
+        Config.DATABASE_IN_MEMORY is set, album.db itself otherwise.
+
+        Writes always go through get_session; _sync_replica copies them over.
+        """
+        with self._replica_lock:
+            if not Config.DATABASE_IN_MEMORY:
+                self._drop_replica()
+            elif (replica_engine := self._get_replica_engine()) is not None:
+                session = Session(bind=replica_engine)
+                try:
+                    yield session
+                finally:
+                    session.close()
+                return
+        with self.get_session() as session:
+            yield session
+
+    def _get_replica_engine(self) -> Engine | None:
+        """The replica, loaded on first use; None if it could not be loaded."""
+        with self._replica_lock:
+            if self._replica_engine is None and not self._replica_failed:
+                try:
+                    self._replica_engine = self._load_replica()
+                except Exception as e:
+                    log(
+                        "DataManager._get_replica_engine",
+                        f"Reading album.db from disk, loading it failed: {e}",
+                        level="error",
+                    )
+                    self._replica_failed = True
+            return self._replica_engine
+
+    def _load_replica(self) -> Engine:
+        started = time.perf_counter()
+        # A private :memory: database: a shared memdb one cannot open the WAL mode
+        # header the backup copies from album.db
+        replica = sqlite3.connect(
+            ":memory:", check_same_thread=False, factory=ProfiledConnection
+        )
+        replica.create_function(
+            "turkish_normalize", 1, turkish_normalize, deterministic=True
+        )
+        # Through get_db_engine, so the copy already has the migrated schema
+        source = self.get_db_engine().raw_connection()
+        try:
+            source.driver_connection.backup(replica)
+        finally:
+            source.close()
+        replica.execute("PRAGMA temp_store=MEMORY")
+
+        page_count = replica.execute("PRAGMA page_count").fetchone()[0]
+        page_size = replica.execute("PRAGMA page_size").fetchone()[0]
+        log(
+            "DataManager._load_replica",
+            f"Loaded album.db into memory ({page_count * page_size / 2**20:.0f} MiB)"
+            f" in {time.perf_counter() - started:.2f} s.",
+        )
+        replica_engine = create_engine(
+            "sqlite://", creator=lambda: replica, poolclass=StaticPool
+        )
+        self.query_profiler.attach(replica_engine)
+        return replica_engine
+
+    def _drop_replica(self) -> None:
+        with self._replica_lock:
+            if self._replica_engine is not None:
+                self._replica_engine.dispose()
+                self._replica_engine = None
+
+    def _sync_replica(
+        self, media_uuids: list[MediaUUID], rows: list[dict] | None = None
+    ) -> None:
+        """Copy media just written to album.db into the replica, if one is loaded.
+
+        rows are their MEDIA_JOURNAL_COLUMNS values, read from album.db if not given.
+        """
+        with self._replica_lock:
+            if self._replica_engine is None:
+                return
+            try:
+                if rows is None:
+                    rows = list(self._read_media_rows(media_uuids).values())
+                with self._replica_engine.begin() as connection:
+                    DataManager._upsert_media_rows(connection, rows)
+            except Exception as e:
+                log(
+                    "DataManager._sync_replica",
+                    f"Dropping the replica, updating it failed: {e}",
+                    level="warning",
+                )
+                self._drop_replica()
+        # Reads between the commit and here may have cached the old rows
+        self._invalidate_filter_results()
+
+    def _read_media_rows(self, media_uuids: list[MediaUUID]) -> dict[MediaUUID, dict]:
+        """MEDIA_JOURNAL_COLUMNS of the given media in album.db, by media_uuid."""
+        columns = [Media.__table__.c[name] for name in MEDIA_JOURNAL_COLUMNS]
+        rows = {}
+        with self.get_session() as session:
+            for start in range(0, len(media_uuids), MEDIA_UUID_CHUNK_SIZE):
+                chunk = media_uuids[start : start + MEDIA_UUID_CHUNK_SIZE]
+                rows.update(
+                    (row["media_uuid"], dict(row))
+                    for row in session.execute(
+                        select(*columns).where(Media.media_uuid.in_(chunk))
+                    ).mappings()
+                )
+        return rows
 
     def build_media(
         self,
@@ -109,8 +493,10 @@ class DataManager:
 
     def edit_media(self, media: Media) -> None:
         with self.get_session() as session:
-            row = session.query(Media).get(media.media_uuid)
-            if row:
+            with self._updating_vocabulary(session, [media.media_uuid]):
+                row = session.get(Media, media.media_uuid)
+                if not row:
+                    raise ValueError(f"Media with UUID {media.media_uuid} not found")
                 row.modified_at = current_time_in_unix_subsec()
                 row.modified_by = cloud_ops.get_user_name()
                 row.status = 2
@@ -129,48 +515,132 @@ class DataManager:
 
                 new_date = date_to_julian(str(media.date_text))
                 if row.date != new_date:
+                    # Query before moving the row, so autoflush leaves it out
+                    last_rank = self._get_last_ranks(session, [new_date])[new_date]
                     row.date = new_date
                     row.date_text = media.date_text
                     row.date_est = media.date_est
-                    row.rank = self.get_last_rank(new_date) + 1.0
+                    row.rank = last_rank + 1.0
 
-                session.commit()
-            else:
-                raise ValueError(f"Media with UUID {media.media_uuid} not found")
+            session.commit()
+            self._record_changes("edit", [media.media_uuid])
 
     def reorder_within_date(self, date: float, ordered_uuids: list[MediaUUID]) -> None:
         with self.get_session() as session:
-            media_list = (
-                session.execute(
-                    select(Media)
-                    .where(Media.status != 0)
-                    .where(Media.date == date)
-                    .order_by(Media.rank)
+            with self._updating_vocabulary(session, ordered_uuids):
+                media_list = (
+                    session.execute(
+                        select(Media)
+                        .where(Media.status != 0)
+                        .where(Media.date == date)
+                        .order_by(Media.rank)
+                    )
+                    .scalars()
+                    .all()
                 )
-                .scalars()
-                .all()
-            )
 
-            # Create a dictionary for quick lookup by media_uuid
-            media_dict: dict[MediaUUID, Media] = {
-                media.media_uuid: media for media in media_list
-            }
+                # Create a dictionary for quick lookup by media_uuid
+                media_dict: dict[MediaUUID, Media] = {
+                    media.media_uuid: media for media in media_list
+                }
 
-            for i, uuid in enumerate(ordered_uuids):
-                media_dict[uuid].rank = i + 1.0
-                media_dict[uuid].modified_at = current_time_in_unix_subsec()
-                media_dict[uuid].modified_by = cloud_ops.get_user_name()
+                for i, uuid in enumerate(ordered_uuids):
+                    media_dict[uuid].rank = i + 1.0
+                    media_dict[uuid].modified_at = current_time_in_unix_subsec()
+                    media_dict[uuid].modified_by = cloud_ops.get_user_name()
             session.commit()
+            self._record_changes("reorder", ordered_uuids)
 
     def set_media_deleted(self, media_uuid: MediaUUID) -> None:
         with self.get_session() as session:
-            row = session.query(Media).get(media_uuid)
-            if row:
+            with self._updating_vocabulary(session, [media_uuid]):
+                row = session.get(Media, media_uuid)
+                if not row:
+                    return
                 row.status = 0
-                session.commit()
+            session.commit()
+            self._record_changes("delete", [media_uuid])
+
+    def apply_bulk_edits(
+        self, media_uuids: list[MediaUUID], edit_data: BulkEditData
+    ) -> None:
+        """Apply the edits from DialogEditBulk to every given media in one transaction.
+
+        Values shared by all media are set with one UPDATE per chunk; values that
+        depend on the current row are computed here and written in one executemany.
+        """
+        constant_values = get_constant_values(edit_data)
+        constant_values.update(
+            modified_at=current_time_in_unix_subsec(),
+            modified_by=cloud_ops.get_user_name(),
+            status=2,
+        )
+        derived_fields = get_derived_fields(edit_data)
+        new_date = get_new_date(edit_data)
 
-    def get_all_media(self) -> Sequence[Media]:
         with self.get_session() as session:
+            with self._updating_vocabulary(session, media_uuids):
+                next_rank = None
+                if new_date:
+                    last_ranks = self._get_last_ranks(session, [new_date[0]])
+                    next_rank = last_ranks[new_date[0]] + 1.0
+
+                derived_rows = []
+                for start in range(0, len(media_uuids), MEDIA_UUID_CHUNK_SIZE):
+                    chunk = media_uuids[start : start + MEDIA_UUID_CHUNK_SIZE]
+                    session.execute(
+                        update(Media)
+                        .where(Media.media_uuid.in_(chunk))
+                        .values(constant_values)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if not derived_fields and not new_date:
+                        continue
+
+                    current_rows = session.execute(
+                        select(
+                            Media.media_uuid,
+                            Media.date,
+                            *[getattr(Media, field) for field in derived_fields],
+                        ).where(Media.media_uuid.in_(chunk))
+                    ).all()
+                    # In selection order, so moved media keep their order on the
+                    # new date
+                    for row in DataManager._order_by_uuids(current_rows, chunk):
+                        values = {"media_uuid": row.media_uuid}
+                        for field in derived_fields:
+                            value = getattr(row, field)
+                            new_value = edit_field(field, value, edit_data)
+                            if new_value != value:
+                                values[field] = new_value
+                        if "people" in values:
+                            people = values["people"]
+                            values["people_count"] = (
+                                len(people.split(",")) if people else 0
+                            )
+                        if new_date and row.date != new_date[0]:
+                            values.update(
+                                zip(("date", "date_text", "date_est"), new_date),
+                                rank=next_rank,
+                            )
+                            next_rank += 1.0
+                        if len(values) > 1:
+                            derived_rows.append(values)
+
+                if derived_rows:
+                    # ORM bulk UPDATE by primary key: one executemany per set of
+                    # columns
+                    session.execute(update(Media), derived_rows)
+            session.commit()
+        self._record_changes("edit", media_uuids)
+
+        log(
+            "DataManager.apply_bulk_edits",
+            f"Edited {len(media_uuids)} media, {len(derived_rows)} of them per row.",
+        )
+
+    def get_all_media(self) -> Sequence[Media]:
+        with self.get_read_session() as session:
             media_list = (
                 session.execute(
                     select(Media)
@@ -183,8 +653,63 @@ class DataManager:
             )
             return media_list
 
+    def get_all_media_index(self) -> MediaIndex:
+        """Same media and order as get_all_media, without loading Media objects."""
+
+        def load() -> MediaIndex:
+            with self.get_read_session() as session:
+                return MediaIndex(
+                    session.execute(
+                        select(*MEDIA_INDEX_COLUMNS)
+                        .where(Media.status != 0)
+                        .where(Media.private <= Config.MEDIA_PRIVACY_LEVEL)
+                        .order_by(Media.date, Media.rank)
+                    ).all()
+                )
+
+        return self._get_cached_index(None, load)
+
+    def _get_cached_index(
+        self, filter_key: tuple | None, load: Callable[[], MediaIndex]
+    ) -> MediaIndex:
+        """Run load() once per filter_key (None: whole library) until album.db changes.
+
+        Cached instances are complete and never extended, so callers share them.
+        """
+        key, media_index = self._get_filter_result(filter_key)
+        if media_index is None:
+            media_index = load()
+            self._store_filter_result(key, media_index)
+        return media_index
+
+    def _get_filter_result(self, filter_key: tuple | None) -> tuple:
+        """(cache key, cached MediaIndex or None) for the current database."""
+        with self._filter_results_lock:
+            key = (self._db_generation, Config.MEDIA_PRIVACY_LEVEL, filter_key)
+            media_index = self._filter_results.get(key)
+            if media_index is not None:
+                self._filter_results.move_to_end(key)
+            return key, media_index
+
+    def _store_filter_result(self, key: tuple, media_index: MediaIndex) -> None:
+        with self._filter_results_lock:
+            # Not stored if album.db changed while loading
+            if key[0] == self._db_generation:
+                self._filter_results[key] = media_index
+                while len(self._filter_results) > FILTER_RESULT_CACHE_SIZE:
+                    self._filter_results.popitem(last=False)
+
+    def _invalidate_filter_results(self) -> None:
+        with self._filter_results_lock:
+            self._db_generation += 1
+            self._filter_results.clear()
+
+    def get_media_by_uuid(self, media_uuid: MediaUUID) -> Media | None:
+        with self.get_read_session() as session:
+            return session.get(Media, media_uuid)
+
     def get_all_deleted_media(self) -> Sequence[Media]:
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             media_list = (
                 session.execute(
                     select(Media)
@@ -199,36 +724,49 @@ class DataManager:
     def get_media_by_uuids(
         self, uuids: list[MediaUUID], sort: int = -1
     ) -> Sequence[Media]:
-        with self.get_session() as session:
-            selection = select(Media).where(Media.media_uuid.in_(uuids))
-
+        with self.get_read_session() as session:
+            selection = DataManager._build_uuid_selection(select(Media), uuids, sort)
+            media_list = session.execute(selection).scalars().all()
             if sort == -1:
-                media_list = session.execute(selection).scalars().all()
+                media_list = DataManager._order_by_uuids(media_list, uuids)
+            return media_list
 
-                # Create a dictionary for quick lookup by media_uuid
-                media_dict: dict[MediaUUID, Media] = {
-                    media.media_uuid: media for media in media_list
-                }
+    def get_media_index_by_uuids(
+        self, uuids: list[MediaUUID], sort: int = -1
+    ) -> MediaIndex:
+        with self.get_read_session() as session:
+            selection = DataManager._build_uuid_selection(
+                select(*MEDIA_INDEX_COLUMNS), uuids, sort
+            )
+            rows = session.execute(selection).all()
+            if sort == -1:
+                rows = DataManager._order_by_uuids(rows, uuids)
+            return MediaIndex(rows)
 
-                # Reorder the results based on the input UUID order
-                media_list = [media_dict[uuid] for uuid in uuids if uuid in media_dict]
+    @staticmethod
+    def _build_uuid_selection(selection: Select, uuids: list[MediaUUID], sort: int):
+        selection = selection.where(Media.media_uuid.in_(uuids))
+        if sort == -1:
+            return selection
 
-            else:
-                column_mapping = {
-                    0: Media.date,
-                    1: Media.title,
-                    2: Media.location,
-                    3: Media.type,
-                    4: Media.people,
-                    5: Media.extension,
-                }
-                selection = selection.order_by(column_mapping[sort], Media.rank)
-                media_list = session.execute(selection).scalars().all()
+        column_mapping = {
+            0: Media.date,
+            1: Media.title,
+            2: Media.location,
+            3: Media.type,
+            4: Media.people,
+            5: Media.extension,
+        }
+        return selection.order_by(column_mapping[sort], Media.rank)
 
-            return media_list
+    @staticmethod
+    def _order_by_uuids(rows: Sequence, uuids: list[MediaUUID]) -> list:
+        """Reorder Media objects or rows to follow the input UUID order."""
+        rows_by_uuid = {row.media_uuid: row for row in rows}
+        return [rows_by_uuid[uuid] for uuid in uuids if uuid in rows_by_uuid]
 
     def get_recent_people_fields(self, limit: int = 10) -> list[str | None]:
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             return list(
                 session.execute(
                     select(Media.people)
@@ -241,33 +779,15 @@ class DataManager:
                 .all()
             )
 
-    def get_list_people(self) -> list[str]:
-        with self.get_session() as session:
-            people_fields = (
-                session.execute(
-                    select(Media.people)
-                    .where(Media.status != 0)
-                    .where(Media.private <= Config.MEDIA_PRIVACY_LEVEL)
-                    .where(Media.people.is_not(None))
-                    .where(Media.people != "")
-                )
-                .scalars()
-                .all()
-            )
+    def get_people_counts(self) -> list[tuple[str, int]]:
+        """Every person on visible media with the number of media they appear on."""
+        return self.get_vocabulary().get_people_counts(Config.MEDIA_PRIVACY_LEVEL)
 
-        list_people: set[str] = set()
-        for people_str in people_fields:
-            if not people_str:
-                continue
-            for person in people_str.split(","):
-                person = person.strip()
-                if person:
-                    list_people.add(person)
-
-        return sorted(list_people)
+    def get_list_people(self) -> list[str]:
+        return [person for person, _ in self.get_people_counts()]
 
     def get_recent_location_fields(self, limit: int = 10) -> list[str | None]:
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             return list(
                 session.execute(
                     select(Media.location)
@@ -280,35 +800,167 @@ class DataManager:
                 .all()
             )
 
+    def get_location_counts(self) -> list[tuple[str, int]]:
+        """Every location of visible media with the number of media there."""
+        return self.get_vocabulary().get_location_counts(Config.MEDIA_PRIVACY_LEVEL)
+
     def get_list_locations(self) -> list[str]:
-        with self.get_session() as session:
-            location_fields = (
+        return [location for location, _ in self.get_location_counts()]
+
+    def get_vocabulary(self) -> Vocabulary:
+        """People/location counts, rebuilt from album.db only when out of date."""
+        with self._vocabulary_lock, self.get_session() as session:
+            data_version = self._get_data_version(session.connection())
+            vocabulary = self._vocabulary
+            if vocabulary is None or vocabulary.data_version != data_version:
+                vocabulary = self._read_vocabulary_file(data_version)
+            if vocabulary is None:
+                vocabulary = self._build_vocabulary(session, data_version or 0)
+                self._write_vocabulary_file(vocabulary, data_version)
+                log("DataManager.get_vocabulary", "Rebuilt the vocabulary.")
+            # Without DataVersion nothing tells when it goes stale
+            self._vocabulary = vocabulary if data_version is not None else None
+            return vocabulary
+
+    def _build_vocabulary(self, session: Session, data_version: int) -> Vocabulary:
+        """Count people and locations of visible media per privacy level in SQL."""
+        vocabulary = Vocabulary(data_version)
+        if self.use_person_index:
+            vocabulary.add_people_counts(
                 session.execute(
-                    select(Media.location)
+                    select(
+                        MediaPerson.person,
+                        MediaPerson.private,
+                        func.count(MediaPerson.media_uuid.distinct()),
+                    )
+                    .where(MediaPerson.status != 0)
+                    .group_by(MediaPerson.person, MediaPerson.private)
+                ).all()
+            )
+        else:
+            # Without MediaPerson, Media.people is split in Python
+            vocabulary.add_rows(
+                session.execute(
+                    select(Media.people, null(), Media.status, Media.private)
                     .where(Media.status != 0)
-                    .where(Media.private <= Config.MEDIA_PRIVACY_LEVEL)
-                    .where(Media.location.is_not(None))
-                    .where(Media.location != "")
-                )
-                .scalars()
-                .all()
+                    .where(Media.people.is_not(None))
+                ).all()
             )
+        location = func.trim(Media.location, VOCABULARY_WHITESPACE)
+        vocabulary.add_location_counts(
+            session.execute(
+                select(location, Media.private, func.count())
+                .where(Media.status != 0)
+                .where(location != "")
+                .group_by(location, Media.private)
+            ).all()
+        )
+        return vocabulary
+
+    @contextmanager
+    def _updating_vocabulary(
+        self, session: Session, media_uuids: Iterable[MediaUUID]
+    ) -> Iterator[None]:
+        """Apply a write to the given media, made in session, to the vocabulary as
+        a delta. The caller commits after the block.
+
+        The session's transaction is begun IMMEDIATE, so the rows and DataVersion
+        read around the write see nothing but it; anything that changes album.db
+        afterwards moves DataVersion past the stored one, so the next
+        get_vocabulary rebuilds instead.
+        """
+        media_uuids = list(media_uuids)
+        connection = session.connection()
+        # Before taking the vocabulary lock, so no thread holds it while waiting
+        # for another's write to finish
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        with self._vocabulary_lock:
+            data_version = self._get_data_version(connection)
+            vocabulary = self._vocabulary
+            if vocabulary is None or vocabulary.data_version != data_version:
+                vocabulary = self._read_vocabulary_file(data_version)
+            old_rows = (
+                DataManager._read_vocabulary_rows(connection, media_uuids)
+                if vocabulary
+                else []
+            )
+
+        yield
+
+        if vocabulary is None:
+            return
+        session.flush()
+        with self._vocabulary_lock:
+            if self._vocabulary not in (None, vocabulary):
+                return
+            vocabulary.remove_rows(old_rows)
+            new_rows = DataManager._read_vocabulary_rows(connection, media_uuids)
+            vocabulary.add_rows(new_rows)
+            data_version = self._get_data_version(connection)
+            self._vocabulary = vocabulary
+            self._write_vocabulary_file(vocabulary, data_version)
+
+    def _get_data_version(self, connection: Connection) -> int | None:
+        if not self.use_data_version:
+            return None
+        return get_data_version(connection)
 
-        list_locations: set[str] = set()
-        for location in location_fields:
-            if not location:
-                continue
-            location = location.strip()
-            if location:
-                list_locations.add(location)
+    @staticmethod
+    def _read_vocabulary_rows(
+        connection: Connection, media_uuids: list[MediaUUID]
+    ) -> list[VocabularyRow]:
+        rows = []
+        for start in range(0, len(media_uuids), MEDIA_UUID_CHUNK_SIZE):
+            rows.extend(
+                connection.execute(
+                    select(
+                        Media.people, Media.location, Media.status, Media.private
+                    ).where(
+                        Media.media_uuid.in_(
+                            media_uuids[start : start + MEDIA_UUID_CHUNK_SIZE]
+                        )
+                    )
+                ).all()
+            )
+        return rows
 
-        return sorted(list_locations)
+    def _get_vocabulary_path(self) -> str:
+        return f"{Config.DATABASE_DIR}/{VOCABULARY_FILENAME}"
+
+    def _read_vocabulary_file(self, data_version: int | None) -> Vocabulary | None:
+        """The stored vocabulary if it matches data_version."""
+        if data_version is None:
+            return None
+        try:
+            with open(self._get_vocabulary_path(), "r", encoding="utf-8") as f:
+                vocabulary = Vocabulary.from_json(f.read())
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        if vocabulary is None or vocabulary.data_version != data_version:
+            return None
+        return vocabulary
+
+    def _write_vocabulary_file(
+        self, vocabulary: Vocabulary, data_version: int | None
+    ) -> None:
+        if data_version is None:
+            return
+        vocabulary.data_version = data_version
+        try:
+            with open(self._get_vocabulary_path(), "w", encoding="utf-8") as f:
+                f.write(vocabulary.to_json())
+        except OSError as e:
+            log(
+                "DataManager._write_vocabulary_file",
+                f"Could not store the vocabulary: {e}",
+                level="warning",
+            )
 
     def get_list_uuids(self) -> list[str]:
-        return [media.media_uuid for media in self.get_all_media()]
+        return self.get_all_media_index().media_uuids()
 
     def get_media_of_date(self, date: float) -> Sequence[Media]:
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             media_list = (
                 session.execute(
                     select(Media)
@@ -322,129 +974,506 @@ class DataManager:
             return media_list
 
     def get_last_rank(self, date: float) -> float:
-        media_list = self.get_media_of_date(date)
-        if media_list:
-            last_rank = max([media.rank for media in media_list])
-        else:
-            last_rank = 0.0
-        return last_rank
+        with self.get_session() as session:
+            return self._get_last_ranks(session, [date])[date]
+
+    @staticmethod
+    def _get_last_ranks(
+        session: Session, dates: Iterable[float]
+    ) -> dict[float, float]:
+        """Highest rank per date in one grouped query, 0.0 for dates without media."""
+        last_ranks = dict.fromkeys(dates, 0.0)
+        last_ranks.update(
+            session.execute(
+                select(Media.date, func.max(Media.rank))
+                .where(Media.status != 0)
+                .where(Media.date.in_(list(last_ranks)))
+                .group_by(Media.date)
+            ).all()
+        )
+        return last_ranks
 
     def get_all_albums(self) -> Sequence[Album]:
-        with self.get_session() as session:
+        with self.get_read_session() as session:
             album_list = session.execute(select(Album)).scalars().all()
             return album_list
 
-    def get_all_album_paths_with_tags(self) -> list[tuple[AlbumPath, AlbumTag]]:
-        album_list = self.get_all_albums()
-
-        # Create a mapping from tags to nodes for easy access
-        tag_to_album: dict[AlbumTag, Album] = {item.tag: item for item in album_list}
+    def get_album_index(self) -> AlbumIndex:
+        """Album hierarchy, built once per database file (see on_database_replaced)."""
+        album_index = self._album_index
+        if album_index is None:
+            album_index = AlbumIndex(self.get_all_albums())
+            self._album_index = album_index
+        return album_index
 
-        # Create a list to store all paths with tags
-        paths: list[tuple[AlbumPath, AlbumTag]] = []
-
-        def build_path(album: Album) -> AlbumPath:
-            path_elements = []
-            current_album = album
+    def get_all_album_paths_with_tags(self) -> list[tuple[AlbumPath, AlbumTag]]:
+        return self.get_album_index().get_paths_with_tags()
 
-            # Traverse up to the root node, building the path
-            while current_album:
-                path_elements.insert(
-                    0, current_album.name
-                )  # Insert at the beginning to reverse the order
-                # Find the parent tag by truncating the current node's path
-                parent_path = current_album.path[: -len(current_album.tag)]
-                parent_tag = parent_path[-3:] if parent_path else None
-                current_album = tag_to_album.get(parent_tag) if parent_tag else None
+    def update_local_db(self) -> bool:
+        """Bring album.db up to date with the cloud: album_cloud.db plus the change
+        journal entries written after it (see data.cloud_journal).
+
+        album_cloud.db is only downloaded when its ETag differs from the copy
+        album.db was built from. It is fetched next to album.db and swapped in
+        once complete, so an interrupted transfer never leaves a partial album.db.
+        """
+        db_path = self.get_db_path()
+        head = cloud_ops.head_s3_object(CLOUD_DATABASE_KEY)
+        state = self._read_cloud_state()
+        if (
+            head is None
+            or state is None
+            or head["ETag"] != state["etag"]
+            or not os.path.exists(db_path)
+        ):
+            download_path = f"{db_path}{DATABASE_DOWNLOAD_SUFFIX}"
+            success = False
+            try:
+                success = cloud_ops.download_from_s3_bucket(
+                    CLOUD_DATABASE_KEY, download_path
+                )
+            finally:
+                if not success and os.path.exists(download_path):
+                    file_ops.delete_file(download_path)
+            if not success:
+                return False
+
+            self.close_db_engine()
+            os.replace(download_path, db_path)
+            self.on_database_replaced()
+            self._journal_changes.clear()
+
+            # Without the base's journal position, replaying could undo newer rows
+            if head is None:
+                self._write_cloud_state(None)
+                return True
+            state = {
+                "etag": head["ETag"],
+                "cursor": head.get("Metadata", {}).get(JOURNAL_CURSOR_METADATA, ""),
+                "entries": 0,
+            }
+        else:
+            log("DataManager.update_local_db", "Local database base is up to date.")
 
-            # Join the path elements to form the full path
-            return "/".join(path_elements)
+        try:
+            self._replay_journal(state)
+        except Exception as e:
+            log(
+                "DataManager.update_local_db",
+                f"Change journal replay failed: {e}",
+                level="error",
+            )
+            return False
+        finally:
+            self._write_cloud_state(state)
+
+        if Config.DATABASE_IN_MEMORY:
+            # Loaded here, during the update, rather than by the next read
+            self._get_replica_engine()
+        return True
+
+    def _replay_journal(self, state: dict) -> None:
+        """Apply the journal entries after state["cursor"], advancing it per entry."""
+        keys = cloud_ops.list_s3_keys(JOURNAL_PREFIX, start_after=state["cursor"])
+        for key in keys:
+            rows = decode_entry(cloud_ops.get_s3_object(key))
+            # Not get_session, so replaying does not count as a local edit
+            with Session(bind=self.get_db_engine()) as session:
+                with self._updating_vocabulary(
+                    session, (row["media_uuid"] for row in rows)
+                ):
+                    DataManager._upsert_media_rows(session.connection(), rows)
+                session.commit()
+            self._sync_replica([row["media_uuid"] for row in rows], rows)
+            state["cursor"] = key
+            state["entries"] += 1
+
+        if keys:
+            log(
+                "DataManager._replay_journal",
+                f"Applied {len(keys)} change journal entries.",
+                level="info",
+            )
 
-        # Generate paths for all nodes in the data
-        for album in album_list:
-            full_path = build_path(album)
-            paths.append((full_path, album.tag))
+    @staticmethod
+    def _upsert_media_rows(connection, rows: list[dict]) -> None:
+        # ON CONFLICT DO UPDATE keeps the rowid and fires the UPDATE triggers that
+        # maintain MediaSearch/MediaAlbum/MediaPerson (REPLACE would not)
+        statement = sqlite_insert(Media)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Media.media_uuid],
+            set_={
+                name: statement.excluded[name]
+                for name in MEDIA_JOURNAL_COLUMNS
+                if name != "media_uuid"
+            },
+        )
+        for row in rows:
+            connection.execute(statement, row)
+
+    def upload_local_db(self) -> None:
+        """Publish local changes as one change journal entry.
+
+        Writers fold the journal into album_cloud.db once it grows long.
+        """
+        if not self._journal_changes:
+            return
+
+        changes = self._journal_changes
+        rows = self._read_media_rows(list(changes))
+        entry = encode_entry(
+            [
+                (operation, rows[media_uuid])
+                for media_uuid, operation in changes.items()
+                if media_uuid in rows
+            ],
+            cloud_ops.get_user_name(),
+        )
+        self._append_journal_entry(entry)
+        self._journal_changes = {}
+
+        # album.db is the synced state again; the new entry is replayed on top of
+        # it later, which is harmless as it holds these same rows
+        state = self._cloud_state
+        if state is None:
+            return
+        state["entries"] += 1
+        self._write_cloud_state(state)
+        if state["entries"] >= JOURNAL_COMPACTION_THRESHOLD:
+            self.compact_cloud_db()
+
+    def _append_journal_entry(self, entry: bytes) -> None:
+        """Write entry under the next free journal key (see data.cloud_journal)."""
+        last_key = self._cloud_state["cursor"] if self._cloud_state else ""
+        for _ in range(JOURNAL_APPEND_ATTEMPTS):
+            keys = cloud_ops.list_s3_keys(JOURNAL_PREFIX, start_after=last_key)
+            if keys:
+                last_key = keys[-1]
+            key = next_entry_key(last_key)
+            if cloud_ops.create_s3_object(key, entry):
+                return
+            # Another writer took the key; it is listed on the next attempt
+            last_key = key
+        raise RuntimeError(
+            f"No free change journal key after {JOURNAL_APPEND_ATTEMPTS} attempts."
+        )
 
-        return sorted(paths, key=lambda x: x[0])
+    def compact_cloud_db(self) -> bool:
+        """Fold the change journal into album_cloud.db and drop old entries."""
+        if self._journal_changes or not self.update_local_db():
+            return False
+        cursor = self._cloud_state["cursor"] if self._cloud_state else ""
 
-    def update_local_db(self) -> bool:
-        return cloud_ops.download_from_s3_bucket(
-            "album_cloud.db", f"{Config.DATABASE_DIR}/album.db"
+        self.checkpoint_db()
+        etag = cloud_ops.upload_database({JOURNAL_CURSOR_METADATA: cursor})
+        self._write_cloud_state(
+            {"etag": etag, "cursor": cursor, "entries": 0} if etag else None
         )
 
+        # Folded entries stay a while for clients and compactions still reading
+        expired_before = time.time() - JOURNAL_RETENTION_SECONDS
+        for entry in cloud_ops.list_s3_objects(JOURNAL_PREFIX):
+            if entry["Key"] > cursor:
+                break
+            if entry["LastModified"].timestamp() < expired_before:
+                cloud_ops.delete_from_s3_bucket(entry["Key"])
+        log("DataManager.compact_cloud_db", f"Journal folded up to {cursor}.")
+        return True
+
+    def _record_changes(
+        self, operation: JournalOperation, media_uuids: list[MediaUUID]
+    ) -> None:
+        for media_uuid in media_uuids:
+            # An insert stays an insert whatever happens to the row before upload
+            if self._journal_changes.get(media_uuid) != "insert":
+                self._journal_changes[media_uuid] = operation
+        # Every local write ends here once committed
+        self._sync_replica(media_uuids)
+
+    def _get_cloud_state_path(self) -> str:
+        return f"{Config.DATABASE_DIR}/{CLOUD_STATE_FILENAME}"
+
+    def _read_cloud_state(self) -> dict | None:
+        try:
+            with open(self._get_cloud_state_path(), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return {
+                "etag": state["etag"],
+                "cursor": state.get("cursor", ""),
+                "entries": state.get("entries", 0),
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cloud_state(self, state: dict | None) -> None:
+        """Persist the synced state; None makes the next update download the base."""
+        self._cloud_state = state
+        state_path = self._get_cloud_state_path()
+        if state is None:
+            if os.path.exists(state_path):
+                file_ops.delete_file(state_path)
+            return
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def _on_local_commit(self, session: Session) -> None:
+        self._invalidate_filter_results()
+        # Until the change is in the journal, album.db matches no cloud state;
+        # self._cloud_state is kept so upload_local_db can restore it
+        if os.path.exists(self._get_cloud_state_path()):
+            file_ops.delete_file(self._get_cloud_state_path())
+
     def insert_media_list_to_local(self, media_list: list[Media]):
         if not media_list:
             raise ValueError("Media list to insert is empty")
         with self.get_session() as session:
-            user_name = cloud_ops.get_user_name()
-
-            current_date = media_list[0].date
-            last_rank = self.get_last_rank(current_date)
-
-            for media in media_list:
-                if media.date == current_date:
-                    media.rank = last_rank + 1.0
-                    last_rank += 1.0
-                else:
-                    current_date = media.date
-                    last_rank = self.get_last_rank(current_date)
-                    media.rank = last_rank + 1.0
-                    last_rank += 1.0
+            with self._updating_vocabulary(
+                session, (media.media_uuid for media in media_list)
+            ):
+                user_name = cloud_ops.get_user_name()
+
+                # Ranks for the whole batch, so a date seen twice keeps counting up
+                last_ranks = self._get_last_ranks(
+                    session, [m.date for m in media_list]
+                )
+                for media in media_list:
+                    last_ranks[media.date] += 1.0
+                    media.rank = last_ranks[media.date]
 
-                media.created_by = user_name
-                session.add(media)
+                    media.created_by = user_name
+                    session.add(media)
             session.commit()
+            self._record_changes("insert", [media.media_uuid for media in media_list])
 
     def get_filtered_media(self, media_filter: MediaFilter) -> list[Media]:
-        with self.get_session() as session:
-            # Query the Media table, ordering by the 'date' column
+        with self.get_read_session() as session:
             try:
-                media_list = (
-                    session.execute(DataManager._build_selection(media_filter))
-                    .scalars()
-                    .all()
+                return self._execute_filter(session, media_filter)
+            except Exception:
+                # Logged by _execute_filter
+                return []
+
+    def get_filtered_media_index(self, media_filter: MediaFilter) -> MediaIndex:
+        """Same media and order as get_filtered_media, as a MediaIndex.
+
+        A filter that fails lists nothing, and is not cached so it runs again.
+        """
+
+        def load() -> MediaIndex:
+            with self.get_read_session() as session:
+                return MediaIndex(
+                    self._execute_filter(session, media_filter, MEDIA_INDEX_COLUMNS)
                 )
-                if media_list:
-                    if media_filter.days:
-                        media_list = DataManager._apply_date_filter(
-                            media_list, media_filter.days, mode="day"
-                        )
-                    if media_filter.months:
-                        media_list = DataManager._apply_date_filter(
-                            media_list, media_filter.months, mode="month"
-                        )
-                    if media_filter.years:
-                        media_list = DataManager._apply_date_filter(
-                            media_list, media_filter.years, mode="year"
-                        )
-                    if media_filter.days_of_week:
-                        media_list = DataManager._apply_date_filter(
-                            media_list, media_filter.days_of_week, mode="weekday"
-                        )
-                media_list = list(media_list)
+
+        try:
+            return self._get_cached_index(media_filter.cache_key(), load)
+        except Exception:
+            # Logged by _execute_filter
+            return MediaIndex()
+
+    def get_media_index_stream(
+        self, media_filter: MediaFilter | None = None
+    ) -> MediaIndexStream:
+        """The view of get_filtered_media_index (or get_all_media_index without a
+        filter), loaded with keyset pages on (date, rank) as the view scrolls.
+
+        Filters that cannot be paged (custom sort, date parts filtered in Python)
+        and cached results come back as a complete stream.
+        """
+        filter_key = media_filter.cache_key() if media_filter else None
+        key, media_index = self._get_filter_result(filter_key)
+        if media_index is not None:
+            return MediaIndexStream(media_index)
+
+        def load_all() -> MediaIndex:
+            if media_filter is None:
+                return self.get_all_media_index()
+            return self.get_filtered_media_index(media_filter)
+
+        if media_filter is not None and not self._can_page_filter(media_filter):
+            return MediaIndexStream(load_all())
+        try:
+            selection = self._build_index_selection(media_filter)
+            with self.get_read_session() as session:
+                total = DataManager._count_selection(session, selection)
+        except Exception as e:
+            log(
+                "DataManager.get_media_index_stream",
+                f"Falling back to a full load: {e}",
+                level="warning",
+            )
+            return MediaIndexStream(load_all())
+
+        failed = False
+
+        def fetch_page(after: MediaIndexEntry | None, limit: int) -> list:
+            nonlocal failed
+            try:
+                with self.get_read_session() as session:
+                    return DataManager._fetch_index_page(
+                        session, selection, after, limit
+                    )
             except Exception as e:
                 log(
-                    "DataManager.get_filtered_media",
-                    f"Error during filtering: {e}. Used Filter: {media_filter}",
+                    "DataManager.get_media_index_stream",
+                    f"Page after {after} failed: {e}",
                     level="error",
                 )
-                media_list = []
+                failed = True
+                return []
 
-            if len(media_list) == 0:
-                log(
-                    "DataManager.get_filtered_media",
-                    f"Filter returned no results. Used Filter: {media_filter}",
-                    level="warning",
-                )
+        def on_complete(complete_index: MediaIndex) -> None:
+            if not failed:
+                self._store_filter_result(key, complete_index)
+
+        stream = MediaIndexStream(
+            total=total, fetch_page=fetch_page, on_complete=on_complete
+        )
+        stream.fetch_more(MEDIA_STREAM_FIRST_PAGE_SIZE)
+        return stream
+
+    def count_media(self, media_filter: MediaFilter | None = None) -> int:
+        """Number of media get_media_index_stream would list, from one COUNT."""
+        if media_filter is None or self._can_page_filter(media_filter):
+            try:
+                with self.get_read_session() as session:
+                    return DataManager._count_selection(
+                        session, self._build_index_selection(media_filter)
+                    )
+            except Exception:
+                if media_filter is None:
+                    raise
+        # get_filtered_media_index logs the error and lists nothing
+        return len(self.get_filtered_media_index(media_filter))
+
+    def _can_page_filter(self, media_filter: MediaFilter) -> bool:
+        # Keyset pages follow ORDER BY date, rank; the Python date filter needs
+        # every row at once
+        date_parts = (
+            media_filter.days,
+            media_filter.months,
+            media_filter.years,
+            media_filter.days_of_week,
+        )
+        return tuple(media_filter.sort) == (0, 0) and (
+            self.use_date_part_columns or not any(date_parts)
+        )
+
+    def _build_index_selection(self, media_filter: MediaFilter | None) -> Select:
+        return DataManager._build_selection(
+            media_filter or MediaFilter(),
+            use_search_index=self.use_search_index,
+            use_album_index=self.use_album_index,
+            use_person_token_index=self.use_person_token_index,
+            use_date_part_columns=self.use_date_part_columns,
+        ).with_only_columns(*MEDIA_INDEX_COLUMNS)
+
+    @staticmethod
+    def _count_selection(session: Session, selection: Select) -> int:
+        return session.scalar(
+            select(func.count()).select_from(
+                selection.with_only_columns(Media.media_uuid).order_by(None).subquery()
+            )
+        )
+
+    @staticmethod
+    def _fetch_index_page(
+        session: Session,
+        selection: Select,
+        after: MediaIndexEntry | None,
+        limit: int,
+    ) -> list:
+        # media_uuid breaks rank ties so every row lands on exactly one page
+        page = selection.order_by(None).order_by(
+            Media.date, Media.rank, Media.media_uuid
+        )
+        if after is not None:
+            page = page.where(
+                tuple_(Media.date, Media.rank, Media.media_uuid)
+                > tuple_(after.date, after.rank, after.media_uuid)
+            )
+        return session.execute(page.limit(limit)).all()
+
+    def _execute_filter(
+        self,
+        session: Session,
+        media_filter: MediaFilter,
+        columns: Sequence | None = None,
+    ) -> list:
+        """Media objects matching the filter, or rows of the given columns.
+
+        Errors are logged and raised, so a failed filter is not taken for one
+        matching nothing.
+        """
+        started = time.perf_counter()
+        try:
+            selection = DataManager._build_selection(
+                media_filter,
+                use_search_index=self.use_search_index,
+                use_album_index=self.use_album_index,
+                use_person_token_index=self.use_person_token_index,
+                use_date_part_columns=self.use_date_part_columns,
+            )
+            if columns is None:
+                media_list = session.execute(selection).scalars().all()
             else:
-                log(
-                    "DataManager.get_filtered_media",
-                    f"Filter returned {len(media_list)} results. Used Filter: {media_filter}",
-                )
-            return media_list
+                # The Python date filter below reads date_text and date_est
+                if not self.use_date_part_columns:
+                    columns = (*columns, Media.date_text, Media.date_est)
+                media_list = session.execute(
+                    selection.with_only_columns(*columns)
+                ).all()
+
+            if media_list and not self.use_date_part_columns:
+                if media_filter.days:
+                    media_list = DataManager._apply_date_filter(
+                        media_list, media_filter.days, mode="day"
+                    )
+                if media_filter.months:
+                    media_list = DataManager._apply_date_filter(
+                        media_list, media_filter.months, mode="month"
+                    )
+                if media_filter.years:
+                    media_list = DataManager._apply_date_filter(
+                        media_list, media_filter.years, mode="year"
+                    )
+                if media_filter.days_of_week:
+                    media_list = DataManager._apply_date_filter(
+                        media_list, media_filter.days_of_week, mode="weekday"
+                    )
+            media_list = list(media_list)
+        except Exception as e:
+            log(
+                "DataManager.get_filtered_media",
+                f"Error during filtering: {e}. Used Filter: {media_filter}",
+                level="error",
+            )
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if len(media_list) == 0:
+            log(
+                "DataManager.get_filtered_media",
+                f"Filter returned no results in {elapsed_ms:.0f} ms. "
+                f"Used Filter: {media_filter}",
+                level="warning",
+            )
+        else:
+            log(
+                "DataManager.get_filtered_media",
+                f"Filter returned {len(media_list)} results in {elapsed_ms:.0f} ms. "
+                f"Used Filter: {media_filter}",
+            )
+        return media_list
 
     @staticmethod
-    def _build_selection(media_filter: MediaFilter) -> Select[tuple[Media]]:
+    def _build_selection(
+        media_filter: MediaFilter,
+        use_search_index: bool = False,
+        use_album_index: bool = False,
+        use_person_token_index: bool = False,
+        use_date_part_columns: bool = False,
+    ) -> Select[tuple[Media]]:
         selection = (
             select(Media)
             .where(Media.status != 0)
@@ -452,15 +1481,18 @@ class DataManager:
         )
 
         if media_filter.album_groups[0][0]:
+            # "and" intersects the groups, "or" matches any tag of any group
             if media_filter.albums_mode == "and":
-                for group in media_filter.album_groups:
-                    selection = selection.where(
-                        or_(*[Media.albums.contains(tag) for tag in group])
-                    )
+                groups = media_filter.album_groups
             else:
-                all_tags = [tag for group in media_filter.album_groups for tag in group]
+                groups = (
+                    tuple(tag for group in media_filter.album_groups for tag in group),
+                )
+            for group in groups:
                 selection = selection.where(
-                    or_(*[Media.albums.contains(tag) for tag in all_tags])
+                    DataManager._build_album_condition(
+                        group, media_filter.albums_include_children, use_album_index
+                    )
                 )
 
         created_at_start, created_at_end = media_filter.created_at_range
@@ -478,55 +1510,56 @@ class DataManager:
                 if created_at_end != -1.0:
                     selection = selection.where(Media.created_at <= created_at_end)
 
-        if media_filter.quick:
-            quick_filter_fields = [
-                Media.topic,
-                Media.title,
-                Media.location,
-                Media.people,
-                Media.tags,
-                Media.extension,
-                Media.date_text,
-            ]
-
-            # Use turkish_normalize for case+i-insensitive search
-            normalized_query = turkish_normalize(media_filter.quick)
-            conditions = [
-                func.turkish_normalize(field).like(f"%{normalized_query}%")
-                for field in quick_filter_fields
-            ]
+        # Same inputs as _apply_date_filter, answered by the indexed date part columns
+        if use_date_part_columns:
+            date_part_filters = (
+                (Media.day, media_filter.days, "day"),
+                (Media.month, media_filter.months, "month"),
+                (Media.year, media_filter.years, "year"),
+                (Media.weekday, media_filter.days_of_week, "weekday"),
+            )
+            for date_part, values, mode in date_part_filters:
+                if values:
+                    selection = selection.where(
+                        date_part.in_(date_part_values(values.split(","), mode))
+                    )
 
-            selection = selection.where(or_(*conditions))
+        if media_filter.quick:
+            selection = selection.where(
+                DataManager._build_search_condition(
+                    QUICK_SEARCH_COLUMNS, media_filter.quick, use_search_index
+                )
+            )
             selection = selection.order_by(Media.date, Media.rank)
             return selection
 
         if media_filter.topic:
             filter_condition = DataManager._build_filter_condition(
-                media_filter.topic, "search_topic"
+                media_filter.topic, "topic", use_search_index
             )
             selection = selection.where(filter_condition)
 
         if media_filter.title:
             filter_condition = DataManager._build_filter_condition(
-                media_filter.title, "search_title"
+                media_filter.title, "title", use_search_index
             )
             selection = selection.where(filter_condition)
 
         if media_filter.location:
             filter_condition = DataManager._build_filter_condition(
-                media_filter.location, "search_location"
+                media_filter.location, "location", use_search_index
             )
             selection = selection.where(filter_condition)
 
         if media_filter.people:
             filter_condition = DataManager._build_filter_condition(
-                media_filter.people, "search_people"
+                media_filter.people, "people", use_person_token_index
             )
             selection = selection.where(filter_condition)
 
         if media_filter.tags:
             filter_condition = DataManager._build_filter_condition(
-                media_filter.tags, "search_tags"
+                media_filter.tags, "tags", use_search_index
             )
             selection = selection.where(filter_condition)
 
@@ -593,17 +1626,49 @@ class DataManager:
                 4: Media.people,
                 5: Media.extension,
             }
-            selection = selection.order_by(
-                column_mapping[media_filter.sort[0]],
-                column_mapping[media_filter.sort[1]],
-                Media.rank,
-            )
+            # Skip the repeated column so ORDER BY date, rank can use the index
+            order_columns = [column_mapping[media_filter.sort[0]]]
+            if media_filter.sort[1] != media_filter.sort[0]:
+                order_columns.append(column_mapping[media_filter.sort[1]])
+            selection = selection.order_by(*order_columns, Media.rank)
         return selection
 
     @staticmethod
-    def _build_select_people(filter_string: str) -> Select[tuple[Media]]:
+    def _build_album_condition(
+        tags: Sequence[AlbumTag], include_children: bool, use_album_index: bool
+    ):
+        """Media in any of the given albums, optionally including their sub-albums."""
+        # Sub-albums are the albums whose path extends the path of a given album
+        ancestor = aliased(Album)
+        descendant = aliased(Album)
+        descendant_tags = (
+            select(descendant.tag)
+            .join_from(
+                ancestor,
+                descendant,
+                func.substr(descendant.path, 1, func.length(ancestor.path))
+                == ancestor.path,
+            )
+            .where(ancestor.tag.in_(tags))
+        )
+
+        if use_album_index:
+            return Media.media_uuid.in_(
+                select(MediaAlbum.media_uuid).where(
+                    MediaAlbum.tag.in_(descendant_tags if include_children else tags)
+                )
+            )
+
+        if include_children:
+            return exists(descendant_tags.where(Media.albums.contains(descendant.tag)))
+        return or_(*[Media.albums.contains(tag) for tag in tags])
+
+    @staticmethod
+    def _build_select_people(
+        filter_string: str, use_person_token_index: bool = False
+    ) -> Select[tuple[Media]]:
         filter_condition = DataManager._build_filter_condition(
-            filter_string, "search_people"
+            filter_string, "people", use_person_token_index
         )
         return (
             select(Media)
@@ -628,96 +1693,124 @@ class DataManager:
         return filtered_results
 
     @staticmethod
-    def _parse_filter_string(expr: str, function_name: str):
-        # Use turkish_normalize for case+i-insensitive search
-        def search_people(key: str):
-            normalized_key = turkish_normalize(key)
-            return func.turkish_normalize(Media.people).like(f"%{normalized_key}%")
-
-        def search_tags(key: str):
-            normalized_key = turkish_normalize(key)
-            return func.turkish_normalize(Media.tags).like(f"%{normalized_key}%")
-
-        def search_topic(key: str):
-            normalized_key = turkish_normalize(key)
-            return func.turkish_normalize(Media.topic).like(f"%{normalized_key}%")
-
-        def search_title(key: str):
-            normalized_key = turkish_normalize(key)
-            return func.turkish_normalize(Media.title).like(f"%{normalized_key}%")
-
-        def search_location(key: str):
-            normalized_key = turkish_normalize(key)
-            return func.turkish_normalize(Media.location).like(f"%{normalized_key}%")
-
-        # Handle , (OR) operator first
-        open_parens = 0
-        for i, char in enumerate(expr):
-            if char == "[":
-                open_parens += 1
-            elif char == "]":
-                open_parens -= 1
-            # Only split by + (AND) when not inside parentheses
-            elif open_parens == 0 and char == "+":
-                parts = expr.split("+", 1)
-                return and_(
-                    DataManager._parse_filter_string(
-                        parts[0].replace("[", "").replace("]", ""), function_name
-                    ),
-                    DataManager._parse_filter_string(
-                        parts[1].replace("[", "").replace("]", ""), function_name
-                    ),
-                )
+    def _build_search_condition(
+        column_names: Sequence[str], key: str, use_search_index: bool
+    ):
+        """Case+i-insensitive substring match of key in any of the given Media columns."""
+        normalized_key = turkish_normalize(key)
+
+        if not use_search_index:
+            return or_(
+                *[
+                    func.turkish_normalize(getattr(Media, name)).like(
+                        f"%{normalized_key}%"
+                    )
+                    for name in column_names
+                ]
+            )
 
-        # Handle + (AND) operator second
-        open_parens = 0
-        for i, char in enumerate(expr):
-            if char == "[":
-                open_parens += 1
-            elif char == "]":
-                open_parens -= 1
-            # Only split by , (OR) when not inside parentheses
-            elif open_parens == 0 and char == ",":
-                parts = expr.split(",", 1)
-                return or_(
-                    DataManager._parse_filter_string(
-                        parts[0].replace("[", "").replace("]", ""), function_name
-                    ),
-                    DataManager._parse_filter_string(
-                        parts[1].replace("[", "").replace("]", ""), function_name
-                    ),
-                )
+        if len(normalized_key) >= SEARCH_INDEX_MIN_KEY_LENGTH:
+            # Quoted as a single phrase, restricted to the requested columns
+            return DataManager._build_match_condition(
+                f'{{{" ".join(column_names)}}}: '
+                f"{DataManager._build_match_phrase(normalized_key)}"
+            )
 
-        # If no AND/OR, this is a base condition
-        return eval(expr, {f"{function_name}": locals().get(function_name)})
+        # MediaSearch text is already normalized, so no UDF call per row
+        condition = or_(
+            *[
+                func.instr(media_search.c[name], normalized_key) > 0
+                for name in column_names
+            ]
+        )
+        # Rowids are shared with Media and verified in init_db_engine
+        return literal_column("Media.rowid").in_(
+            select(media_search.c.rowid).where(condition)
+        )
 
     @staticmethod
-    def _build_filter_condition(filter_string: str, function_name: str):
-        def preprocess_expression(expr: str) -> str:
-            """Replace custom operators with Python logical operators and wrap words in quotes"""
-
-            # Wrap all names (words) with function_name()
-            expr = re.sub(
-                r'([a-zA-Z0-9ıİğĞüÜşŞöÖçÇ_][a-zA-Z0-9ıİğĞüÜşŞöÖçÇ_ .!@#$%^&*\-?;:"\'/\\]*)',
-                rf'{function_name}("\1")',
-                expr,
-            )
+    def _build_match_phrase(normalized_key: str) -> str:
+        return '"' + normalized_key.replace('"', '""') + '"'
 
-            return expr
+    @staticmethod
+    def _build_match_condition(match_query: str):
+        condition = literal_column("MediaSearch").op("MATCH")(match_query)
+        return literal_column("Media.rowid").in_(
+            select(media_search.c.rowid).where(condition)
+        )
 
-        def remove_whitespaces(expr: str) -> str:
-            expr = expr.strip()
-            expr = re.sub(r"\s*(\+|,|\[|\])\s*", r"\1", expr)
-            return expr
+    @staticmethod
+    def _build_person_condition(key: str, use_person_token_index: bool):
+        """Media with a person whose name has key at the start of one of its words.
+
+        "Yılmaz", "Ay" and "Ali Yıl" match "Ali YILMAZ" and "Ayşe KAYA"; "li"
+        and "Kaya Ayşe" do not. Answered from MediaPersonToken, or by scanning
+        Media.people on older schemas, with the same result.
+        """
+        normalized_key = " ".join(turkish_normalize(key).split())
+        if not normalized_key:
+            return Media.people.is_not(None)
+
+        if not use_person_token_index:
+            escaped_key = (
+                normalized_key.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            # " , " between names, so a key never spans two of them
+            people = func.replace(func.turkish_normalize(Media.people), ",", " , ")
+            return (" " + people).like(f"% {escaped_key}%", escape="\\")
+
+        # Every tail starting with key, as a range on ix_media_person_token_tail
+        tail_end = normalized_key[:-1] + chr(ord(normalized_key[-1]) + 1)
+        return Media.media_uuid.in_(
+            select(MediaPersonToken.media_uuid).where(
+                MediaPersonToken.tail >= normalized_key,
+                MediaPersonToken.tail < tail_end,
+            )
+        )
 
-        # Process the expression to replace the custom operators
-        filter_string = remove_whitespaces(filter_string)
-        filter_string = preprocess_expression(filter_string)
+    @staticmethod
+    @lru_cache(maxsize=FILTER_CONDITION_CACHE_SIZE)
+    def _build_filter_condition(
+        filter_string: str, column_name: str, use_index: bool = False
+    ):
+        """WHERE clause for a filter field expression (see data.filter_expression).
+
+        use_index: answer the terms from MediaPersonToken (people) or MediaSearch.
+        Clauses are immutable, so they are cached per expression and reused.
+        """
         try:
-            result_filter = DataManager._parse_filter_string(
-                filter_string, function_name
-            )
-        except Exception as e:
+            expression = parse_filter_expression(filter_string)
+        except FilterExpressionError as e:
             raise ValueError(f"Invalid expression: {e}")
 
-        return result_filter
+        if column_name == "people":
+            return fold_filter_expression(
+                expression,
+                lambda key: DataManager._build_person_condition(key, use_index),
+                and_,
+                or_,
+            )
+
+        if use_index and all(
+            len(turkish_normalize(key)) >= SEARCH_INDEX_MIN_KEY_LENGTH
+            for key in iter_filter_terms(expression)
+        ):
+            # The whole expression as one FTS5 query instead of a subquery per term
+            match_query = fold_filter_expression(
+                expression,
+                lambda key: DataManager._build_match_phrase(turkish_normalize(key)),
+                lambda *operands: f"({' AND '.join(operands)})",
+                lambda *operands: f"({' OR '.join(operands)})",
+            )
+            return DataManager._build_match_condition(f"{column_name}: {match_query}")
+
+        return fold_filter_expression(
+            expression,
+            lambda key: DataManager._build_search_condition(
+                (column_name,), key, use_index
+            ),
+            and_,
+            or_,
+        )
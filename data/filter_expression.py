@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Final, Iterator, TypeVar, Union
+
+# Distinct expressions typed in the filter dialog during a session
+FILTER_EXPRESSION_CACHE_SIZE: Final[int] = 256
+
+_TOKEN_PATTERN: Final[re.Pattern] = re.compile(r"[+,\[\]]|[^+,\[\]]+")
+_OPERATORS: Final[tuple[str, ...]] = ("+", ",", "[", "]")
+
+T = TypeVar("T")
+
+
+class FilterExpressionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Term:
+    key: str
+
+
+@dataclass(frozen=True)
+class AllOf:
+    operands: tuple[FilterNode, ...]
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    operands: tuple[FilterNode, ...]
+
+
+FilterNode = Union[Term, AllOf, AnyOf]
+
+
+def _tokenize(expression: str) -> list[str]:
+    """Operators and search terms, with whitespace around the terms removed."""
+    tokens = [token.strip() for token in _TOKEN_PATTERN.findall(expression)]
+    return [token for token in tokens if token]
+
+
+class _Parser:
+    """Recursive descent over the filter field grammar.
+
+    expression := any_of ("+" any_of)*
+    any_of     := operand ("," operand)*
+    operand    := term | "[" expression "]"
+
+    "," binds tighter than "+", so "Ali, Veli + Ayşe" is (Ali or Veli) and Ayşe.
+    """
+
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self) -> FilterNode:
+        node = self._parse_all_of()
+        if self.position < len(self.tokens):
+            raise FilterExpressionError(f"Unexpected '{self.tokens[self.position]}'")
+        return node
+
+    def _peek(self) -> str | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _accept(self, operator: str) -> bool:
+        if self._peek() == operator:
+            self.position += 1
+            return True
+        return False
+
+    def _parse_all_of(self) -> FilterNode:
+        operands = [self._parse_any_of()]
+        while self._accept("+"):
+            operands.append(self._parse_any_of())
+        return operands[0] if len(operands) == 1 else AllOf(tuple(operands))
+
+    def _parse_any_of(self) -> FilterNode:
+        operands = [self._parse_operand()]
+        while self._accept(","):
+            operands.append(self._parse_operand())
+        return operands[0] if len(operands) == 1 else AnyOf(tuple(operands))
+
+    def _parse_operand(self) -> FilterNode:
+        if self._accept("["):
+            node = self._parse_all_of()
+            if not self._accept("]"):
+                raise FilterExpressionError("Missing ']'")
+            return node
+
+        token = self._peek()
+        if token is None or token in _OPERATORS:
+            raise FilterExpressionError("Missing search term")
+        self.position += 1
+        return Term(token)
+
+
+@lru_cache(maxsize=FILTER_EXPRESSION_CACHE_SIZE)
+def parse_filter_expression(expression: str) -> FilterNode:
+    """Parse a filter field such as "[Ali, Veli] + Ayşe" into a tree of terms."""
+    return _Parser(_tokenize(expression)).parse()
+
+
+def iter_filter_terms(node: FilterNode) -> Iterator[str]:
+    if isinstance(node, Term):
+        yield node.key
+        return
+    for operand in node.operands:
+        yield from iter_filter_terms(operand)
+
+
+def fold_filter_expression(
+    node: FilterNode,
+    term: Callable[[str], T],
+    all_of: Callable[..., T],
+    any_of: Callable[..., T],
+) -> T:
+    """Build a T from the tree, e.g. SQLAlchemy and_/or_ or an FTS5 query string."""
+    if isinstance(node, Term):
+        return term(node.key)
+
+    operands = [
+        fold_filter_expression(operand, term, all_of, any_of)
+        for operand in node.operands
+    ]
+    if isinstance(node, AllOf):
+        return all_of(*operands)
+    return any_of(*operands)
@@ -308,6 +308,37 @@ def date_includes(
         )
 
 
+def date_part_values(
+    input_list: list[str], mode: Literal["day", "month", "year", "weekday"]
+) -> set[int]:
+    """
+    Numeric date parts that date_includes would accept for the given inputs and mode.
+
+    Parameters:
+    input_list (list of str): List of values (days, months, years, or weekdays).
+    mode (str): Mode to specify the type of input ('day', 'month', 'year', 'weekday').
+
+    Returns:
+    set of int: Matching values of the Media day/month/year/weekday columns
+    (weekday 0 is Monday).
+    """
+    values: set[int] = set()
+    for item in input_list:
+        if mode == "month" and item in TURKISH_MONTHS:
+            values.add(TURKISH_MONTHS[item])
+        elif mode == "weekday" and item in TURKISH_WEEKDAYS:
+            values.add(TURKISH_WEEKDAYS[item])
+        elif item.isascii() and item.isdigit():
+            number = int(item)
+            if mode == "year":
+                # Years are compared as written in date_text
+                if item == f"{number:04d}":
+                    values.add(number)
+            elif item in (str(number), f"{number:02d}"):
+                values.add(number - 1 if mode == "weekday" else number)
+    return values
+
+
 def generate_export_filename(media: Media) -> str:
     day, month, year = media.date_text.split(".")
     return f"M{year}{month}{day}_{int(media.rank):03d}{media.extension}"
@@ -3,6 +3,7 @@ class MediaFilter:
         self,
         album_groups: tuple[tuple[str, ...], ...] = (("",),),
         albums_mode: str = "or",
+        albums_include_children: bool = False,
         quick: str = "",
         topic: str = "",
         title: str = "",
@@ -26,6 +27,7 @@ class MediaFilter:
     ):
         self.album_groups = album_groups
         self.albums_mode = albums_mode
+        self.albums_include_children = albums_include_children
         self.quick = quick
         self.topic = topic
         self.title = title
@@ -50,3 +52,19 @@ class MediaFilter:
     def __str__(self):
         # Return a single-line string of the instance's attributes as a dictionary
         return str(self.__dict__)
+
+    def cache_key(self) -> tuple:
+        """Hashable form of the criteria, equal for filters that match alike."""
+        values = dict(self.__dict__)
+        # Disabled range parts the query ignores (see DataManager._build_selection)
+        if not self.created_at_range_enabled:
+            values["created_at_range"] = None
+        if not self.people_count_range_enabled:
+            values["people_count_range"] = self.people_count_range[0]
+        return tuple((name, _freeze(values[name])) for name in sorted(values))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Final, Iterable, NamedTuple, overload
+
+from data.orm import Media
+
+MediaUUID = str
+
+# media_uuid is uuid4().hex: 32 lowercase hex digits, 16 bytes packed
+PACKED_UUID_LENGTH: Final[int] = 16
+
+# Columns fetched for list views; everything else is loaded per displayed item
+MEDIA_INDEX_COLUMNS: Final[tuple] = (
+    Media.media_uuid,
+    Media.extension,
+    Media.type,
+    Media.date,
+    Media.rank,
+)
+
+
+class MediaIndexEntry(NamedTuple):
+    media_uuid: MediaUUID
+    extension: str
+    type: int
+    date: float
+    rank: float
+
+
+class MediaIndex(Sequence):
+    """Ordered media list held as columns instead of detached Media objects.
+
+    A 200k item view costs a few MB here against several hundred MB of ORM
+    instances. Indexing returns a MediaIndexEntry built on demand; the full
+    row is loaded with DataManager.get_media_by_uuid when it is displayed.
+    """
+
+    def __init__(self, rows: Iterable[Sequence] = ()):
+        # Growable (bytearray, list) while a stream fills it, frozen afterwards
+        self._uuids: bytes | bytearray | tuple[MediaUUID, ...] | list[MediaUUID] = b""
+        # Few distinct extensions, so store a small code per item
+        self._extensions: list[str] = []
+        self._extension_codes_by_name: dict[str, int] = {}
+        self._extension_codes = array("H")
+        self._types = array("b")
+        self._dates = array("d")
+        self._ranks = array("d")
+        self.extend(rows)
+        self.freeze()
+
+    def extend(self, rows: Iterable[Sequence]) -> None:
+        """Append rows; only used while a MediaIndexStream fills the index."""
+        rows = rows if isinstance(rows, list) else list(rows)
+
+        uuids = self._pack_uuids([row[0] for row in rows])
+        if isinstance(self._uuids, (bytes, bytearray)) and isinstance(uuids, bytes):
+            if isinstance(self._uuids, bytes):
+                self._uuids = bytearray(self._uuids)
+            self._uuids += uuids
+        else:
+            if not isinstance(self._uuids, list):
+                self._uuids = list(self._unpack_uuids())
+            self._uuids.extend(self._unpack_uuids(uuids))
+
+        for row in rows:
+            code = self._extension_codes_by_name.get(row[1])
+            if code is None:
+                code = self._extension_codes_by_name[row[1]] = len(self._extensions)
+                self._extensions.append(sys.intern(row[1]))
+            self._extension_codes.append(code)
+
+        self._types.extend([row[2] for row in rows])
+        self._dates.extend([row[3] for row in rows])
+        self._ranks.extend([row[4] for row in rows])
+
+    def freeze(self) -> None:
+        """Drop the spare capacity extend keeps once the index is complete."""
+        if isinstance(self._uuids, bytearray):
+            self._uuids = bytes(self._uuids)
+        elif isinstance(self._uuids, list):
+            self._uuids = tuple(self._uuids)
+
+    @classmethod
+    def from_media(cls, media_list: Iterable[Media]) -> MediaIndex:
+        return cls(
+            [
+                (media.media_uuid, media.extension, media.type, media.date, media.rank)
+                for media in media_list
+            ]
+        )
+
+    @staticmethod
+    def _pack_uuids(uuids: list[MediaUUID]) -> bytes | tuple[MediaUUID, ...]:
+        """One bytes object for uuid4().hex values, interned strings otherwise."""
+        if all(len(media_uuid) == 2 * PACKED_UUID_LENGTH for media_uuid in uuids):
+            joined = "".join(uuids)
+            try:
+                packed = bytes.fromhex(joined)
+            except ValueError:
+                packed = b""
+            # The round trip rejects upper case and other spellings of the same bytes
+            if packed.hex() == joined:
+                return packed
+        return tuple(sys.intern(media_uuid) for media_uuid in uuids)
+
+    def _unpack_uuids(
+        self, uuids: bytes | bytearray | Sequence[MediaUUID] | None = None
+    ) -> Sequence[MediaUUID]:
+        uuids = self._uuids if uuids is None else uuids
+        if isinstance(uuids, (tuple, list)):
+            return uuids
+        return tuple(
+            uuids[start : start + PACKED_UUID_LENGTH].hex()
+            for start in range(0, len(uuids), PACKED_UUID_LENGTH)
+        )
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    @overload
+    def __getitem__(self, index: int) -> MediaIndexEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[MediaIndexEntry]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MediaIndex index out of range")
+        return MediaIndexEntry(
+            self.media_uuid(index),
+            self._extensions[self._extension_codes[index]],
+            self._types[index],
+            self._dates[index],
+            self._ranks[index],
+        )
+
+    def media_uuid(self, index: int) -> MediaUUID:
+        if isinstance(self._uuids, (tuple, list)):
+            return self._uuids[index]
+        start = index * PACKED_UUID_LENGTH
+        return self._uuids[start : start + PACKED_UUID_LENGTH].hex()
+
+    def media_uuids(self) -> list[MediaUUID]:
+        return [self.media_uuid(i) for i in range(len(self))]
+
+
+# Returns up to `limit` index rows that follow `after` (None: from the start)
+MediaIndexPageFetcher = Callable[[MediaIndexEntry | None, int], list[Sequence]]
+
+
+class MediaIndexStream:
+    """A MediaIndex filled page by page, so a view can paint before it is loaded.
+
+    `total` comes from a separate COUNT and is exact once the stream is exhausted.
+    A stream built from a complete MediaIndex has nothing more to fetch.
+    """
+
+    def __init__(
+        self,
+        media_index: MediaIndex | None = None,
+        total: int | None = None,
+        fetch_page: MediaIndexPageFetcher | None = None,
+        on_complete: Callable[[MediaIndex], None] | None = None,
+    ):
+        self.media_index = media_index if media_index is not None else MediaIndex()
+        self.total = total if total is not None else len(self.media_index)
+        self._fetch_page = fetch_page
+        self._on_complete = on_complete
+
+    @property
+    def can_fetch_more(self) -> bool:
+        return self._fetch_page is not None
+
+    def fetch_more(self, count: int) -> int:
+        """Load up to count more items; returns how many were added."""
+        if self._fetch_page is None:
+            return 0
+        after = self.media_index[-1] if len(self.media_index) else None
+        rows = self._fetch_page(after, count)
+        self.media_index.extend(rows)
+
+        if len(rows) < count:
+            self._fetch_page = None
+            self.media_index.freeze()
+            self.total = len(self.media_index)
+            if self._on_complete is not None:
+                self._on_complete(self.media_index)
+        else:
+            self.total = max(self.total, len(self.media_index))
+        return len(rows)
+
+    def fetch_all(self, page_size: int = 50000) -> None:
+        while self.can_fetch_more:
+            self.fetch_more(page_size)
@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+from typing import Callable, Final
+
+from sqlalchemy import Connection, Engine
+
+from data.orm import MEDIA_DATE_PART_EXPRESSIONS
+from logger import log
+
+# Every migration must be idempotent (IF NOT EXISTS etc.): pysqlite commits DDL
+# implicitly, so a migration interrupted half-way is simply re-run next time.
+Migration = Callable[[Connection], None]
+
+
+def _add_media_query_indexes(connection: Connection) -> None:
+    # Visible media in display order: get_all_media, get_filtered_media,
+    # get_media_of_date and get_last_rank walk this index instead of sorting.
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_visible_date_rank "
+        "ON Media(date, rank, private) WHERE status != 0"
+    )
+    # Covering index for get_recent_people_fields / get_recent_location_fields.
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_visible_created_at "
+        "ON Media(created_at, private, people, location) WHERE status != 0"
+    )
+    # Exact location filters (same date/location modes).
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_visible_location "
+        "ON Media(location) WHERE status != 0"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_deleted_date_rank "
+        "ON Media(date, rank) WHERE status = 0"
+    )
+    connection.exec_driver_sql("ANALYZE Media")
+
+
+# Searchable Media text, stored turkish_normalize'd so the trigram tokenizer's
+# case folding never has to know about İ/I/ı. Rows share Media's rowid.
+MEDIA_SEARCH_COLUMNS: Final[tuple[str, ...]] = (
+    "topic",
+    "title",
+    "location",
+    "people",
+    "tags",
+    "notes",
+    "extension",
+    "date_text",
+)
+MEDIA_SEARCH_SCHEMA_VERSION: Final[int] = 2
+
+_MEDIA_SEARCH_INSERT_SQL: Final[str] = (
+    "INSERT INTO MediaSearch(rowid, media_uuid, "
+    + ", ".join(MEDIA_SEARCH_COLUMNS)
+    + ") "
+)
+
+
+def _media_search_values(row: str) -> str:
+    return ", ".join(
+        [f"{row}.rowid", f"{row}.media_uuid"]
+        + [f"turkish_normalize({row}.{name})" for name in MEDIA_SEARCH_COLUMNS]
+    )
+
+
+def rebuild_media_search(connection: Connection) -> None:
+    connection.exec_driver_sql("DELETE FROM MediaSearch")
+    connection.exec_driver_sql(
+        _MEDIA_SEARCH_INSERT_SQL + f"SELECT {_media_search_values('Media')} FROM Media"
+    )
+
+
+def is_media_search_in_sync(connection: Connection) -> bool:
+    """Cheap consistency check of MediaSearch against Media.
+
+    VACUUM (or an external tool) may renumber Media rowids, which would leave the
+    triggers updating the wrong index rows.
+    """
+    media_count = connection.exec_driver_sql("SELECT count(*) FROM Media").scalar()
+    matched_count = connection.exec_driver_sql(
+        "SELECT count(*) FROM MediaSearch JOIN Media "
+        "ON Media.rowid = MediaSearch.rowid "
+        "AND Media.media_uuid = MediaSearch.media_uuid"
+    ).scalar()
+    return media_count == matched_count
+
+
+def _add_media_search_index(connection: Connection) -> None:
+    # Requires the turkish_normalize function on every connection that writes
+    # Media; DataManager registers it when the pool opens a connection.
+    connection.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS MediaSearch USING fts5("
+        "media_uuid UNINDEXED, "
+        + ", ".join(MEDIA_SEARCH_COLUMNS)
+        + ", tokenize='trigram')"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaSearch_ai AFTER INSERT ON Media BEGIN "
+        f"{_MEDIA_SEARCH_INSERT_SQL}VALUES ({_media_search_values('new')}); "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaSearch_ad AFTER DELETE ON Media BEGIN "
+        "DELETE FROM MediaSearch WHERE rowid = old.rowid; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaSearch_au AFTER UPDATE OF media_uuid, "
+        + ", ".join(MEDIA_SEARCH_COLUMNS)
+        + " ON Media BEGIN "
+        "DELETE FROM MediaSearch WHERE rowid = old.rowid; "
+        f"{_MEDIA_SEARCH_INSERT_SQL}VALUES ({_media_search_values('new')}); "
+        "END"
+    )
+    rebuild_media_search(connection)
+
+
+# Media.albums concatenates fixed-width album tags ("a01a05"). MediaAlbum holds
+# one (tag, media_uuid) row per tag; AlbumSlot is a numbers table used to split
+# the string in plain SQL, so older clients need no extra function to write Media.
+ALBUM_TAG_LENGTH: Final[int] = 3
+MEDIA_ALBUM_MAX_TAGS: Final[int] = 256
+MEDIA_ALBUM_SCHEMA_VERSION: Final[int] = 3
+
+
+def _media_album_select(row: str, source: str) -> str:
+    return (
+        f"SELECT {row}.media_uuid, "
+        f"substr({row}.albums, AlbumSlot.n * {ALBUM_TAG_LENGTH} + 1, "
+        f"{ALBUM_TAG_LENGTH}) "
+        f"FROM {source} "
+        f"WHERE AlbumSlot.n * {ALBUM_TAG_LENGTH} < length({row}.albums)"
+    )
+
+
+def rebuild_media_album(connection: Connection) -> None:
+    connection.exec_driver_sql("DELETE FROM MediaAlbum")
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO MediaAlbum(media_uuid, tag) "
+        + _media_album_select("Media", "Media, AlbumSlot")
+    )
+
+
+def _add_media_album_table(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS AlbumSlot (n INTEGER PRIMARY KEY)"
+    )
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO AlbumSlot(n) VALUES "
+        + ", ".join(f"({n})" for n in range(MEDIA_ALBUM_MAX_TAGS))
+    )
+    # (tag, media_uuid) primary key doubles as the tag index
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS MediaAlbum ("
+        "tag TEXT NOT NULL, "
+        "media_uuid TEXT NOT NULL, "
+        "PRIMARY KEY (tag, media_uuid)"
+        ") WITHOUT ROWID"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_album_media_uuid "
+        "ON MediaAlbum(media_uuid)"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaAlbum_ai AFTER INSERT ON Media "
+        "WHEN new.albums IS NOT NULL BEGIN "
+        "INSERT OR IGNORE INTO MediaAlbum(media_uuid, tag) "
+        f"{_media_album_select('new', 'AlbumSlot')}; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaAlbum_ad AFTER DELETE ON Media BEGIN "
+        "DELETE FROM MediaAlbum WHERE media_uuid = old.media_uuid; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaAlbum_au "
+        "AFTER UPDATE OF media_uuid, albums ON Media BEGIN "
+        "DELETE FROM MediaAlbum WHERE media_uuid = old.media_uuid; "
+        "INSERT OR IGNORE INTO MediaAlbum(media_uuid, tag) "
+        f"{_media_album_select('new', 'AlbumSlot')}; "
+        "END"
+    )
+    rebuild_media_album(connection)
+    connection.exec_driver_sql("ANALYZE MediaAlbum")
+
+
+# Media.people is a comma-joined name list whose positions line up with
+# Media.people_detect. MediaPerson holds one row per non-empty name, plus a copy
+# of the media's status/private so the people vocabulary needs no join. The list
+# is split with json_each over a json_quote()d copy, so any character in a name
+# comes through.
+MEDIA_PERSON_SCHEMA_VERSION: Final[int] = 4
+# What str.strip() removes, so names trimmed in SQL match get_row_people's
+TRIM_WHITESPACE: Final[str] = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+_PEOPLE_WHITESPACE: Final[str] = (
+    f"char({', '.join(str(ord(char)) for char in TRIM_WHITESPACE)})"
+)
+
+
+def _split_json(value: str, separator: str) -> str:
+    """A JSON array of the parts of value, for json_each. json_quote escapes
+    every character JSON needs escaped, and leaves the separator as is."""
+    return f"""'[' || replace(json_quote({value}), '{separator}', '","') || ']'"""
+
+
+_MEDIA_PERSON_INSERT_SQL: Final[str] = (
+    "INSERT INTO MediaPerson"
+    "(media_uuid, position, person, person_norm, status, private) "
+)
+
+
+def _media_person_select(row: str, source: str) -> str:
+    person = f"trim(people.value, {_PEOPLE_WHITESPACE})"
+    return (
+        f"SELECT {row}.media_uuid, people.key, {person}, turkish_normalize({person}), "
+        f"{row}.status, {row}.private "
+        f"FROM {source}json_each({_split_json(f'{row}.people', ',')}) AS people "
+        f"WHERE {person} != ''"
+    )
+
+
+def rebuild_media_person(connection: Connection) -> None:
+    connection.exec_driver_sql("DELETE FROM MediaPerson")
+    connection.exec_driver_sql(
+        _MEDIA_PERSON_INSERT_SQL + _media_person_select("Media", "Media, ")
+    )
+
+
+def _create_media_person_triggers(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPerson_ai AFTER INSERT ON Media "
+        "WHEN new.people IS NOT NULL BEGIN "
+        f"{_MEDIA_PERSON_INSERT_SQL}{_media_person_select('new', '')}; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPerson_ad AFTER DELETE ON Media BEGIN "
+        "DELETE FROM MediaPerson WHERE media_uuid = old.media_uuid; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPerson_au "
+        "AFTER UPDATE OF media_uuid, people ON Media BEGIN "
+        "DELETE FROM MediaPerson WHERE media_uuid = old.media_uuid; "
+        f"{_MEDIA_PERSON_INSERT_SQL}{_media_person_select('new', '')}; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPerson_au_visibility "
+        "AFTER UPDATE OF status, private ON Media BEGIN "
+        "UPDATE MediaPerson SET status = new.status, private = new.private "
+        "WHERE media_uuid = new.media_uuid; "
+        "END"
+    )
+
+
+def _add_media_person_table(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS MediaPerson ("
+        "media_uuid TEXT NOT NULL, "
+        "position INTEGER NOT NULL, "
+        "person TEXT NOT NULL, "
+        "person_norm TEXT NOT NULL, "
+        "status INTEGER NOT NULL, "
+        "private INTEGER NOT NULL, "
+        "PRIMARY KEY (media_uuid, position)"
+        ") WITHOUT ROWID"
+    )
+    # Exact and prefix person lookups
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_person_norm "
+        "ON MediaPerson(person_norm, media_uuid)"
+    )
+    # Covering index for the people vocabulary (GROUP BY person)
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_person_person "
+        "ON MediaPerson(person, status, private, media_uuid)"
+    )
+    _create_media_person_triggers(connection)
+    rebuild_media_person(connection)
+    connection.exec_driver_sql("ANALYZE MediaPerson")
+
+
+MEDIA_DATE_PARTS_SCHEMA_VERSION: Final[int] = 5
+
+
+def _add_media_date_parts(connection: Connection) -> None:
+    # table_xinfo also lists generated columns
+    existing_columns = {
+        row[1] for row in connection.exec_driver_sql("PRAGMA table_xinfo(Media)")
+    }
+    for name, expression in MEDIA_DATE_PART_EXPRESSIONS.items():
+        if name not in existing_columns:
+            connection.exec_driver_sql(
+                f"ALTER TABLE Media ADD COLUMN {name} INTEGER "
+                f"GENERATED ALWAYS AS ({expression}) VIRTUAL"
+            )
+    # (month, day) also serves "today in history" (month = ? AND day = ?)
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_visible_month_day "
+        "ON Media(month, day) WHERE status != 0"
+    )
+    for name in ("day", "year", "weekday"):
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_media_visible_{name} "
+            f"ON Media({name}) WHERE status != 0"
+        )
+    connection.exec_driver_sql("ANALYZE Media")
+
+
+# One row per word of each MediaPerson name, holding the normalized name from that
+# word on ("ali yilmaz" -> "ali yilmaz", "yilmaz"). A people filter key matches
+# the media with a tail starting with it, so "yilmaz", "ay" and "ali yil" all
+# find "Ali YILMAZ" / "Ayşe KAYA" by a range scan, while "li" or "kaya ali" do
+# not. Kept in sync by triggers on MediaPerson, which are fired by its own.
+MEDIA_PERSON_TOKEN_SCHEMA_VERSION: Final[int] = 7
+
+_MEDIA_PERSON_TOKEN_INSERT_SQL: Final[str] = (
+    "INSERT INTO MediaPersonToken(media_uuid, position, token, tail) "
+)
+
+
+def _media_person_token_select(row: str, source: str) -> str:
+    words = _split_json(f"{row}.person_norm", " ")
+    # Characters before the word: the earlier words and a space after each
+    offset = (
+        f"(SELECT coalesce(sum(length(earlier.value) + 1), 0) "
+        f"FROM json_each({words}) AS earlier WHERE earlier.key < words.key)"
+    )
+    return (
+        f"SELECT {row}.media_uuid, {row}.position, words.key, "
+        f"substr({row}.person_norm, 1 + {offset}) "
+        f"FROM {source}json_each({words}) AS words "
+        "WHERE words.value != ''"
+    )
+
+
+def rebuild_media_person_token(connection: Connection) -> None:
+    connection.exec_driver_sql("DELETE FROM MediaPersonToken")
+    connection.exec_driver_sql(
+        _MEDIA_PERSON_TOKEN_INSERT_SQL
+        + _media_person_token_select("MediaPerson", "MediaPerson, ")
+    )
+
+
+def _create_media_person_token_triggers(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPersonToken_ai "
+        "AFTER INSERT ON MediaPerson BEGIN "
+        f"{_MEDIA_PERSON_TOKEN_INSERT_SQL}{_media_person_token_select('new', '')}; "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS MediaPersonToken_ad "
+        "AFTER DELETE ON MediaPerson BEGIN "
+        "DELETE FROM MediaPersonToken "
+        "WHERE media_uuid = old.media_uuid AND position = old.position; "
+        "END"
+    )
+
+
+def _add_media_person_token_table(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS MediaPersonToken ("
+        "media_uuid TEXT NOT NULL, "
+        "position INTEGER NOT NULL, "
+        "token INTEGER NOT NULL, "
+        "tail TEXT NOT NULL, "
+        "PRIMARY KEY (media_uuid, position, token)"
+        ") WITHOUT ROWID"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_media_person_token_tail "
+        "ON MediaPersonToken(tail, media_uuid)"
+    )
+    _create_media_person_token_triggers(connection)
+    # People filters no longer look up whole names
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_media_person_norm")
+    rebuild_media_person_token(connection)
+    connection.exec_driver_sql("ANALYZE MediaPersonToken")
+
+
+# Single row counter bumped by every write to Media, whatever made it (a Session,
+# journal replay, another tool). Caches built from Media, such as the people and
+# location vocabulary, store the version they match.
+DATA_VERSION_SCHEMA_VERSION: Final[int] = 6
+
+
+def _add_data_version(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS DataVersion ("
+        "id INTEGER PRIMARY KEY CHECK (id = 0), "
+        "version INTEGER NOT NULL"
+        ")"
+    )
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO DataVersion(id, version) VALUES (0, 0)"
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS DataVersion_{event.lower()} "
+            f"AFTER {event} ON Media BEGIN "
+            "UPDATE DataVersion SET version = version + 1 WHERE id = 0; "
+            "END"
+        )
+
+
+def get_data_version(connection: Connection) -> int:
+    return int(
+        connection.exec_driver_sql("SELECT version FROM DataVersion WHERE id = 0")
+        .scalar()
+        or 0
+    )
+
+
+# Triggers made before this version escaped only tab, newline and carriage
+# return when splitting names, so a name with any other control character
+# dropped out of MediaPerson, and they trimmed less than str.strip(). Recreate
+# them and rebuild both tables.
+PEOPLE_CONTROL_CHARS_SCHEMA_VERSION: Final[int] = 8
+
+
+def _escape_people_control_chars(connection: Connection) -> None:
+    for trigger in (
+        "MediaPerson_ai",
+        "MediaPerson_au",
+        "MediaPersonToken_ai",
+        "MediaPersonToken_ad",
+    ):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    _create_media_person_triggers(connection)
+    rebuild_media_person(connection)
+    rebuild_media_person_token(connection)
+    _create_media_person_token_triggers(connection)
+
+
+# (version, description, migration), applied in order. Never edit or reorder a
+# released entry; append a new one instead.
+MIGRATIONS: Final[list[tuple[int, str, Migration]]] = [
+    (1, "Media query indexes", _add_media_query_indexes),
+    (MEDIA_SEARCH_SCHEMA_VERSION, "MediaSearch FTS5 index", _add_media_search_index),
+    (MEDIA_ALBUM_SCHEMA_VERSION, "MediaAlbum membership table", _add_media_album_table),
+    (MEDIA_PERSON_SCHEMA_VERSION, "MediaPerson people table", _add_media_person_table),
+    (MEDIA_DATE_PARTS_SCHEMA_VERSION, "Media date part columns", _add_media_date_parts),
+    (DATA_VERSION_SCHEMA_VERSION, "DataVersion write counter", _add_data_version),
+    (
+        MEDIA_PERSON_TOKEN_SCHEMA_VERSION,
+        "MediaPersonToken name tail table",
+        _add_media_person_token_table,
+    ),
+    (
+        PEOPLE_CONTROL_CHARS_SCHEMA_VERSION,
+        "Control characters in people names",
+        _escape_people_control_chars,
+    ),
+]
+
+LATEST_SCHEMA_VERSION: Final[int] = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection: Connection) -> int:
+    return int(connection.exec_driver_sql("PRAGMA user_version").scalar() or 0)
+
+
+def apply_migrations(engine: Engine) -> int:
+    """Bring the database up to LATEST_SCHEMA_VERSION and return the resulting version.
+
+    Stops at the first failing migration, so the returned version is always one
+    whose schema is fully in place.
+
+    The version is recorded in SQLite's user_version header field, so it travels
+    with album.db when it is uploaded and downloaded.
+    """
+    with engine.connect() as connection:
+        has_media = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Media'"
+        ).scalar()
+        if not has_media:
+            log(
+                "migrations.apply_migrations",
+                "Media table not found, skipping migrations.",
+                level="warning",
+            )
+            return 0
+
+        version = get_schema_version(connection)
+        if version > LATEST_SCHEMA_VERSION:
+            log(
+                "migrations.apply_migrations",
+                f"Database schema version {version} is newer than this app "
+                f"({LATEST_SCHEMA_VERSION}).",
+                level="warning",
+            )
+            return version
+
+        for migration_version, description, migration in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            try:
+                migration(connection)
+                connection.exec_driver_sql(
+                    f"PRAGMA user_version={migration_version}"
+                )
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                log(
+                    "migrations.apply_migrations",
+                    f"Schema migration {migration_version} failed: {e}",
+                    level="error",
+                )
+                break
+            version = migration_version
+            log(
+                "migrations.apply_migrations",
+                f"Applied schema migration {migration_version}: {description}",
+            )
+        return version
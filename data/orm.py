@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import INTEGER, REAL, TEXT
+from sqlalchemy import INTEGER, REAL, TEXT, Computed, column, table
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -8,6 +8,22 @@ class Base(DeclarativeBase):
     pass
 
 
+# Date parts at the precision given by date_est (7: day, 3: month, 1: year), NULL
+# when the date is less precise. Weekday is 0 (Monday) to 6, from the julian date.
+MEDIA_DATE_PART_EXPRESSIONS: dict[str, str] = {
+    "day": "CASE WHEN date_est = 7 THEN CAST(date_text AS INTEGER) END",
+    "month": (
+        "CASE WHEN date_est IN (3, 7) "
+        "THEN CAST(substr(date_text, instr(date_text, '.') + 1) AS INTEGER) END"
+    ),
+    "year": (
+        "CASE WHEN date_est IN (1, 3, 7) "
+        "THEN CAST(substr(date_text, -4) AS INTEGER) END"
+    ),
+    "weekday": "CASE WHEN date_est = 7 THEN CAST(date + 0.5 AS INTEGER) % 7 END",
+}
+
+
 class Album(Base):
     __tablename__ = "Album"
 
@@ -19,6 +35,8 @@ class Album(Base):
 
 class Media(Base):
     __tablename__ = "Media"
+    # Never fetch the generated columns back after INSERT/UPDATE (see below)
+    __mapper_args__ = {"eager_defaults": False}
 
     media_uuid: Mapped[str] = mapped_column(
         TEXT, primary_key=True, unique=True, nullable=False
@@ -44,3 +62,73 @@ class Media(Base):
     notes: Mapped[str | None] = mapped_column(TEXT)
     tags: Mapped[str | None] = mapped_column(TEXT)
     albums: Mapped[str | None] = mapped_column(TEXT)
+
+    # Generated columns added by data.migrations; deferred so that databases
+    # which predate them still load
+    day: Mapped[int | None] = mapped_column(
+        INTEGER,
+        Computed(MEDIA_DATE_PART_EXPRESSIONS["day"], persisted=False),
+        deferred=True,
+    )
+    month: Mapped[int | None] = mapped_column(
+        INTEGER,
+        Computed(MEDIA_DATE_PART_EXPRESSIONS["month"], persisted=False),
+        deferred=True,
+    )
+    year: Mapped[int | None] = mapped_column(
+        INTEGER,
+        Computed(MEDIA_DATE_PART_EXPRESSIONS["year"], persisted=False),
+        deferred=True,
+    )
+    weekday: Mapped[int | None] = mapped_column(
+        INTEGER,
+        Computed(MEDIA_DATE_PART_EXPRESSIONS["weekday"], persisted=False),
+        deferred=True,
+    )
+
+
+# Maintained from Media.albums by triggers (see data.migrations)
+class MediaAlbum(Base):
+    __tablename__ = "MediaAlbum"
+
+    tag: Mapped[str] = mapped_column(TEXT, primary_key=True)
+    media_uuid: Mapped[str] = mapped_column(TEXT, primary_key=True)
+
+
+# Maintained from Media.people/status/private by triggers (see data.migrations)
+class MediaPerson(Base):
+    __tablename__ = "MediaPerson"
+
+    media_uuid: Mapped[str] = mapped_column(TEXT, primary_key=True)
+    position: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    person: Mapped[str] = mapped_column(TEXT, nullable=False)
+    person_norm: Mapped[str] = mapped_column(TEXT, nullable=False)
+    status: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    private: Mapped[int] = mapped_column(INTEGER, nullable=False)
+
+
+# Maintained from MediaPerson by triggers (see data.migrations)
+class MediaPersonToken(Base):
+    __tablename__ = "MediaPersonToken"
+
+    media_uuid: Mapped[str] = mapped_column(TEXT, primary_key=True)
+    position: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    token: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    # person_norm from the token'th word on
+    tail: Mapped[str] = mapped_column(TEXT, nullable=False)
+
+
+# FTS5 table maintained by triggers (see data.migrations), not by the ORM
+media_search = table(
+    "MediaSearch",
+    column("rowid"),
+    column("media_uuid"),
+    column("topic"),
+    column("title"),
+    column("location"),
+    column("people"),
+    column("tags"),
+    column("notes"),
+    column("extension"),
+    column("date_text"),
+)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Final
+
+from sqlalchemy import Engine, event
+
+from config.config import Config
+from logger import LOG_DIR, MAX_BYTES_PER_FILE
+
+# Per statement latency, row count and calling DataManager method for the
+# DataManager engines.
+#
+# before/after_cursor_execute time the execute call. SQLite runs most of a SELECT
+# while its rows are fetched, so ProfiledCursor adds the fetch time and row count
+# and reports the statement when SQLAlchemy closes it (once the result is
+# consumed). Statements slower than Config.SLOW_QUERY_THRESHOLD_MS (0: none) are
+# written with their EXPLAIN QUERY PLAN to logs/slow_queries.log, apart from the
+# general log.
+SLOW_QUERY_LOG_FILENAME: Final[str] = "slow_queries.log"
+SLOW_QUERY_PARAMETERS_MAX_LENGTH: Final[int] = 500
+# Distinct (method, statement) pairs kept; IN lists of every length are distinct
+QUERY_STATS_MAX_STATEMENTS: Final[int] = 512
+
+_slow_query_log_lock = threading.Lock()
+
+
+@dataclass
+class QueryStats:
+    method: str
+    statement: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+
+@dataclass
+class _ExecutedQuery:
+    profiler: QueryProfiler
+    method: str
+    statement: str
+    parameters: Any
+    executemany: bool
+    execute_seconds: float
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Counts the rows fetched and the time spent fetching them."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.query: _ExecutedQuery | None = None
+        self.rows_fetched = 0
+        self.fetch_seconds = 0.0
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self.fetch_seconds += time.perf_counter() - started
+        self.rows_fetched += row is not None
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.fetch_seconds += time.perf_counter() - started
+        self.rows_fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self.fetch_seconds += time.perf_counter() - started
+        self.rows_fetched += len(rows)
+        return rows
+
+    def close(self):
+        query, self.query = self.query, None
+        # Rows of a SELECT, rows changed by anything else
+        rows = self.rows_fetched if self.description is not None else self.rowcount
+        super().close()
+        if query is not None:
+            query.profiler.record(query, self.fetch_seconds, rows, self.connection)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3.connect factory whose cursors are ProfiledCursors."""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+
+def _get_calling_method() -> str:
+    """Innermost public DataManager method on the stack, e.g.
+    "DataManager.get_filtered_media_index" for a query run by its helpers.
+    """
+    method = "?"
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == "data.data_manager":
+            # Nested functions count as the method they are defined in
+            class_name, _, name = frame.f_code.co_qualname.partition(".")
+            name = name.split(".", 1)[0]
+            if method == "?":
+                method = f"{class_name}.{name}"
+            if not name.startswith("_"):
+                return f"{class_name}.{name}"
+        frame = frame.f_back
+    return method
+
+
+class QueryProfiler:
+    def __init__(self):
+        self._stats: OrderedDict[tuple[str, str], QueryStats] = OrderedDict()
+        self._stats_lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        conn.info["query_started_at"] = time.perf_counter()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        started_at = conn.info.pop("query_started_at", None)
+        if started_at is None:
+            return
+        query = _ExecutedQuery(
+            self,
+            _get_calling_method(),
+            statement,
+            parameters,
+            executemany,
+            time.perf_counter() - started_at,
+        )
+        if isinstance(cursor, ProfiledCursor):
+            cursor.query = query
+        else:
+            self.record(query, 0.0, cursor.rowcount, None)
+
+    def record(
+        self,
+        query: _ExecutedQuery,
+        fetch_seconds: float,
+        rows: int,
+        connection: sqlite3.Connection | None,
+    ) -> None:
+        seconds = query.execute_seconds + fetch_seconds
+        key = (query.method, query.statement)
+        with self._stats_lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(query.method, query.statement)
+                while len(self._stats) > QUERY_STATS_MAX_STATEMENTS:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(key)
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += max(rows, 0)
+
+        threshold_ms = Config.SLOW_QUERY_THRESHOLD_MS
+        if threshold_ms and seconds * 1000 >= threshold_ms:
+            _write_slow_query(query, seconds, rows, _explain(query, connection))
+
+    def get_stats(self) -> list[QueryStats]:
+        """Recorded statements, the most total time first."""
+        with self._stats_lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda x: x.total_seconds, reverse=True)
+
+
+def _explain(query: _ExecutedQuery, connection: sqlite3.Connection | None) -> list[str]:
+    if (
+        connection is None
+        or query.executemany
+        or not query.statement.lstrip().upper().startswith(("SELECT", "WITH"))
+    ):
+        return []
+    try:
+        rows = connection.execute(
+            f"EXPLAIN QUERY PLAN {query.statement}", query.parameters
+        ).fetchall()
+    except sqlite3.Error as e:
+        return [f"EXPLAIN QUERY PLAN failed: {e}"]
+    return [row[-1] for row in rows]
+
+
+def _write_slow_query(
+    query: _ExecutedQuery, seconds: float, rows: int, plan: list[str]
+) -> None:
+    parameters = repr(query.parameters)
+    if len(parameters) > SLOW_QUERY_PARAMETERS_MAX_LENGTH:
+        parameters = f"{parameters[:SLOW_QUERY_PARAMETERS_MAX_LENGTH]}..."
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lines = [
+        f"{timestamp} | {seconds * 1000:.1f} ms | {rows} rows | {query.method}",
+        " ".join(query.statement.split()),
+        f"parameters: {parameters}",
+        *(f"plan: {line}" for line in plan),
+        "",
+    ]
+
+    path = os.path.join(LOG_DIR, SLOW_QUERY_LOG_FILENAME)
+    with _slow_query_log_lock:
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            # One previous file is kept
+            if os.path.exists(path) and os.path.getsize(path) >= MAX_BYTES_PER_FILE:
+                os.replace(path, f"{path}.1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            pass
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from typing import Final, Iterable
+
+# People and locations of visible media with the number of media using each,
+# kept in memory and in album_vocabulary.json next to album.db. The assign lists
+# of DialogAddMedia are served from here instead of scanning Media.
+#
+# Counts are kept per privacy level, so changing Config.MEDIA_PRIVACY_LEVEL needs
+# no rebuild. data_version is the DataVersion counter of album.db the counts match.
+VOCABULARY_FORMAT_VERSION: Final[int] = 1
+
+# (people, location, status, private) of one Media row
+VocabularyRow = tuple[str | None, str | None, int, int]
+# (name, private, number of media) of one GROUP BY row
+CountRow = tuple[str, int, int]
+Counts = dict[str, dict[int, int]]
+
+
+def get_row_people(people: str | None) -> set[str]:
+    if not people:
+        return set()
+    return {person.strip() for person in people.split(",") if person.strip()}
+
+
+def get_row_location(location: str | None) -> str | None:
+    return location.strip() or None if location else None
+
+
+class Vocabulary:
+    def __init__(self, data_version: int = 0):
+        self.data_version = data_version
+        self._people: Counts = {}
+        self._locations: Counts = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[VocabularyRow], data_version: int) -> Vocabulary:
+        vocabulary = cls(data_version)
+        vocabulary.add_rows(rows)
+        return vocabulary
+
+    def add_rows(self, rows: Iterable[VocabularyRow], sign: int = 1) -> None:
+        for people, location, status, private in rows:
+            if status == 0:
+                continue
+            for person in get_row_people(people):
+                Vocabulary._count(self._people, person, private, sign)
+            location = get_row_location(location)
+            if location:
+                Vocabulary._count(self._locations, location, private, sign)
+
+    def remove_rows(self, rows: Iterable[VocabularyRow]) -> None:
+        self.add_rows(rows, sign=-1)
+
+    def add_people_counts(self, rows: Iterable[CountRow]) -> None:
+        for person, private, count in rows:
+            Vocabulary._count(self._people, person, private, count)
+
+    def add_location_counts(self, rows: Iterable[CountRow]) -> None:
+        for location, private, count in rows:
+            Vocabulary._count(self._locations, location, private, count)
+
+    @staticmethod
+    def _count(counts: Counts, name: str, private: int, sign: int) -> None:
+        by_private = counts.setdefault(name, {})
+        count = by_private.get(private, 0) + sign
+        if count > 0:
+            by_private[private] = count
+        else:
+            by_private.pop(private, None)
+            if not by_private:
+                del counts[name]
+
+    def get_people_counts(self, max_private: int) -> list[tuple[str, int]]:
+        return Vocabulary._visible_counts(self._people, max_private)
+
+    def get_location_counts(self, max_private: int) -> list[tuple[str, int]]:
+        return Vocabulary._visible_counts(self._locations, max_private)
+
+    @staticmethod
+    def _visible_counts(counts: Counts, max_private: int) -> list[tuple[str, int]]:
+        visible = []
+        for name in sorted(counts):
+            count = sum(
+                count
+                for private, count in counts[name].items()
+                if private <= max_private
+            )
+            if count:
+                visible.append((name, count))
+        return visible
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "format": VOCABULARY_FORMAT_VERSION,
+                "data_version": self.data_version,
+                "people": self._people,
+                "locations": self._locations,
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> Vocabulary | None:
+        """None when the file was written in another format."""
+        data = json.loads(text)
+        if data.get("format") != VOCABULARY_FORMAT_VERSION:
+            return None
+        vocabulary = cls(data["data_version"])
+        # JSON object keys are strings
+        for counts, stored in (
+            (vocabulary._people, data["people"]),
+            (vocabulary._locations, data["locations"]),
+        ):
+            for name, by_private in stored.items():
+                counts[name] = {
+                    int(private): count for private, count in by_private.items()
+                }
+        return vocabulary
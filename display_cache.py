@@ -0,0 +1,355 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Final, Optional, Set, Tuple
+
+from PIL import Image
+
+from ops import file_ops
+from logger import log
+
+
+# Screen-sized JPEG renditions of images larger than DISPLAY_RENDITION_LONG_EDGE,
+# kept in THUMBNAILS_DIR/display/ so browsing decodes those instead of the
+# originals. The originals are still used for zooming in and exporting.
+#
+# index.json records each rendition's full original size (for zoom and the face
+# overlay) and when it was last shown; the least recently shown ones are deleted
+# once the renditions take more than Config.DISPLAY_CACHE_MAX_MB. Files it does
+# not list (from a run that stopped before writing it) are deleted when the cache
+# is created, if they are older than ORPHAN_GRACE_SECONDS: younger ones may still
+# be written by another process, e.g. scripts/build_display_cache.py.
+#
+# The same renditions are uploaded to display/ in S3 (see cloud_ops), with the
+# original size in their JPEG comment, and downloaded ones are kept here as is.
+DISPLAY_CACHE_DIRNAME: Final[str] = "display"
+DISPLAY_CACHE_INDEX_FILENAME: Final[str] = "index.json"
+DISPLAY_CACHE_FORMAT_VERSION: Final[int] = 1
+DISPLAY_RENDITION_LONG_EDGE: Final[int] = 2560
+DISPLAY_RENDITION_QUALITY: Final[int] = 85
+ORIGINAL_SIZE_COMMENT_PREFIX: Final[bytes] = b"original-size="
+# index.json is rewritten at most this often and on flush
+INDEX_SAVE_INTERVAL_SECONDS: Final[float] = 60.0
+ORPHAN_GRACE_SECONDS: Final[float] = 600.0
+
+
+@dataclass
+class DisplayRendition:
+    path: str
+    original_size: Tuple[int, int]
+    size_bytes: int
+    created_at: float
+    last_used: float
+
+
+def make_rendition(image: Image.Image) -> Image.Image:
+    """RGB copy of an upright image shrunk to DISPLAY_RENDITION_LONG_EDGE."""
+    rendition = image.convert("RGB")
+    rendition.thumbnail((DISPLAY_RENDITION_LONG_EDGE, DISPLAY_RENDITION_LONG_EDGE))
+    return rendition
+
+
+def encode_rendition(rendition: Image.Image, original_size: Tuple[int, int]) -> bytes:
+    buffer = BytesIO()
+    rendition.save(
+        buffer,
+        "JPEG",
+        quality=DISPLAY_RENDITION_QUALITY,
+        progressive=True,
+        comment=ORIGINAL_SIZE_COMMENT_PREFIX + b"%dx%d" % tuple(original_size),
+    )
+    return buffer.getvalue()
+
+
+def encode_rendition_of_file(path) -> bytes:
+    """Rendition of the image file (or file object) at path, encoded for display/
+    in S3. Made even for images no larger than DISPLAY_RENDITION_LONG_EDGE, so
+    every image has one there."""
+    image, original_size = file_ops.open_image_scaled(
+        path, (DISPLAY_RENDITION_LONG_EDGE, DISPLAY_RENDITION_LONG_EDGE)
+    )
+    with image:
+        return encode_rendition(make_rendition(image), original_size)
+
+
+def read_original_size(rendition: Image.Image) -> Optional[Tuple[int, int]]:
+    """The original size encode_rendition stored, None if there is none."""
+    comment = rendition.info.get("comment", b"")
+    if not comment.startswith(ORIGINAL_SIZE_COMMENT_PREFIX):
+        return None
+    width, _, height = comment[len(ORIGINAL_SIZE_COMMENT_PREFIX) :].partition(b"x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        return None
+
+
+class DisplayCache:
+    """Creates, finds and evicts display renditions. Thread-safe, so prefetch
+    workers can create renditions while the GUI thread reads others."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # By last use, oldest first; read from index.json on first use
+        self._entries: Optional["OrderedDict[str, DisplayRendition]"] = None
+        self._total_bytes = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        # Media keys display/ in S3 has no rendition of, for this session
+        self._cloud_misses: Set[str] = set()
+        if self.enabled:
+            # Before any thread can write a rendition
+            self._remove_orphans()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def fits(self, target_size: Tuple[int, int]) -> bool:
+        """Whether renditions cover images shown fitted into target_size."""
+        return self.enabled and max(target_size) <= DISPLAY_RENDITION_LONG_EDGE
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._get_entries()
+            return self._total_bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._get_entries())
+
+    def contains(self, media_key: str) -> bool:
+        with self._lock:
+            return media_key in self._get_entries()
+
+    def get(
+        self, media_key: str, source_path: Optional[str] = None
+    ) -> Optional[DisplayRendition]:
+        """The rendition of media_key and mark it used, or None if there is none
+        or the original at source_path was modified after it was made."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = self._get_entries()
+            rendition = entries.get(media_key)
+            if rendition is None:
+                return None
+            if (
+                source_path is not None
+                and os.path.getmtime(source_path) > rendition.created_at
+            ):
+                self._remove_locked(media_key)
+                return None
+            rendition.last_used = time.time()
+            entries.move_to_end(media_key)
+            self._dirty = True
+            self._save_index_if_due()
+            return rendition
+
+    def create(
+        self, media_key: str, source_path: str
+    ) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Decode the original at source_path at about the rendition size and
+        store its rendition (see put).
+
+        Returns:
+            tuple: The rendition, or the original if it is not larger, and the
+                full size of the original.
+        """
+        image, original_size = file_ops.open_image_scaled(
+            source_path, (DISPLAY_RENDITION_LONG_EDGE, DISPLAY_RENDITION_LONG_EDGE)
+        )
+        rendition = self.put(media_key, image, original_size)
+        if rendition is not image:
+            image.close()
+        return rendition, original_size
+
+    def put(
+        self, media_key: str, image: Image.Image, original_size: Tuple[int, int]
+    ) -> Image.Image:
+        """Store a rendition of the upright image, if the original is larger than
+        DISPLAY_RENDITION_LONG_EDGE. Returns the rendition, or image if not."""
+        if max(original_size) <= DISPLAY_RENDITION_LONG_EDGE:
+            return image
+        rendition = make_rendition(image)
+        self.put_encoded(media_key, encode_rendition(rendition, original_size))
+        return rendition
+
+    def put_encoded(self, media_key: str, data: bytes) -> bool:
+        """Store a rendition made by encode_rendition, e.g. one downloaded from
+        display/. Returns False if it could not be stored."""
+        if not self.enabled:
+            return False
+        with Image.open(BytesIO(data)) as rendition:
+            original_size = read_original_size(rendition) or rendition.size
+
+        path = self._get_path(media_key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            log(
+                "DisplayCache.put_encoded",
+                f"Could not store the display rendition of {media_key}: {e}",
+                level="warning",
+            )
+            with suppress(OSError):
+                os.remove(temp_path)
+            return False
+
+        now = time.time()
+        with self._lock:
+            entries = self._get_entries()
+            self._remove_locked(media_key, delete_file=False)
+            entries[media_key] = DisplayRendition(
+                path, original_size, len(data), now, now
+            )
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes and len(entries) > 1:
+                self._remove_locked(next(iter(entries)))
+            self._dirty = True
+            self._save_index_if_due()
+        return True
+
+    def is_missing_in_cloud(self, media_key: str) -> bool:
+        with self._lock:
+            return media_key in self._cloud_misses
+
+    def set_missing_in_cloud(self, media_key: str) -> None:
+        """Remember that display/ has no rendition of media_key, so later views
+        go straight to the original."""
+        with self._lock:
+            self._cloud_misses.add(media_key)
+
+    def remove(self, media_key: str) -> None:
+        with self._lock:
+            self._remove_locked(media_key)
+
+    def flush(self) -> None:
+        """Write index.json if anything changed since it was last written."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _get_path(self, media_key: str) -> str:
+        return os.path.join(self.directory, f"{os.path.splitext(media_key)[0]}.jpg")
+
+    def _remove_locked(self, media_key: str, delete_file: bool = True) -> None:
+        rendition = self._get_entries().pop(media_key, None)
+        if rendition is None:
+            return
+        self._total_bytes -= rendition.size_bytes
+        self._dirty = True
+        if delete_file:
+            with suppress(OSError):
+                os.remove(rendition.path)
+
+    def _get_entries(self) -> "OrderedDict[str, DisplayRendition]":
+        if self._entries is None:
+            self._entries = self._load_index()
+            self._total_bytes = sum(r.size_bytes for r in self._entries.values())
+        return self._entries
+
+    def _load_index(self) -> "OrderedDict[str, DisplayRendition]":
+        """Entries of index.json whose files exist."""
+        stored: Dict[str, list] = {}
+        index_path = os.path.join(self.directory, DISPLAY_CACHE_INDEX_FILENAME)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") == DISPLAY_CACHE_FORMAT_VERSION:
+                stored = data["entries"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            log(
+                "DisplayCache._load_index",
+                f"Display cache index could not be read, starting over: {e}",
+                level="warning",
+            )
+
+        try:
+            file_names = set(os.listdir(self.directory))
+        except OSError:
+            file_names = set()
+        entries = OrderedDict()
+        for media_key, (width, height, size_bytes, created_at, last_used) in sorted(
+            stored.items(), key=lambda item: item[1][4]
+        ):
+            path = self._get_path(media_key)
+            if os.path.basename(path) in file_names:
+                entries[media_key] = DisplayRendition(
+                    path, (width, height), size_bytes, created_at, last_used
+                )
+        return entries
+
+    def _remove_orphans(self) -> None:
+        """Delete renditions and temporary files index.json does not list."""
+        with self._lock:
+            listed = {
+                os.path.basename(rendition.path)
+                for rendition in self._get_entries().values()
+            }
+        try:
+            file_names = os.listdir(self.directory)
+        except OSError:
+            return
+        expired_before = time.time() - ORPHAN_GRACE_SECONDS
+        removed = 0
+        for file_name in file_names:
+            if file_name in listed or not file_name.endswith((".jpg", ".tmp")):
+                continue
+            path = os.path.join(self.directory, file_name)
+            with suppress(OSError):
+                if os.path.getmtime(path) < expired_before:
+                    os.remove(path)
+                    removed += 1
+        if removed:
+            log(
+                "DisplayCache._remove_orphans",
+                f"Deleted {removed} display cache files missing from the index.",
+            )
+
+    def _save_index_if_due(self) -> None:
+        if time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL_SECONDS:
+            self._save_index()
+
+    def _save_index(self) -> None:
+        data = {
+            "format": DISPLAY_CACHE_FORMAT_VERSION,
+            "entries": {
+                media_key: [
+                    *rendition.original_size,
+                    rendition.size_bytes,
+                    rendition.created_at,
+                    rendition.last_used,
+                ]
+                for media_key, rendition in self._get_entries().items()
+            },
+        }
+        index_path = os.path.join(self.directory, DISPLAY_CACHE_INDEX_FILENAME)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(f"{index_path}.tmp", index_path)
+        except OSError as e:
+            log(
+                "DisplayCache._save_index",
+                f"Could not write the display cache index: {e}",
+                level="warning",
+            )
+            return
+        self._dirty = False
+        self._saved_at = time.monotonic()
@@ -71,16 +71,19 @@ def count_person_frequencies(
     Config.read_config()
     counts: Counter[str] = Counter()
     data_manager = DataManager()
-    with data_manager.get_session() as session:
-        rows = session.execute(
-            select(Media.people)
-            .where(Media.status != 0)
-            .where(Media.type == 1)
-            .where(Media.people.isnot(None))
-            .where(Media.people != "")
-            .order_by(Media.date.desc(), Media.rank.desc())
-            .limit(last_n)
-        ).all()
+    try:
+        with data_manager.get_session() as session:
+            rows = session.execute(
+                select(Media.people)
+                .where(Media.status != 0)
+                .where(Media.type == 1)
+                .where(Media.people.isnot(None))
+                .where(Media.people != "")
+                .order_by(Media.date.desc(), Media.rank.desc())
+                .limit(last_n)
+            ).all()
+    finally:
+        data_manager.close()
     for (people,) in rows:
         for token in str(people).split(","):
             name = token.strip()
@@ -41,7 +41,7 @@ class DialogEditMedia(DialogAddMedia):
             QIcon("res/icons/Pencil-Square--Streamline-Plump-Gradient.png")
         )
 
-        self.selected_media_path = self.media_loader.get_media_path(
+        self.selected_media_path = self.media_loader.get_local_media_path(
             self.media.media_uuid, self.media.extension
         )
         if self.media.people_detect:
@@ -130,4 +130,4 @@ class DialogEditMedia(DialogAddMedia):
     def edit_procedure(self, media: Media):
         self.data_manager.update_local_db()
         self.data_manager.edit_media(media)
-        cloud_ops.upload_database()
+        self.data_manager.upload_local_db()
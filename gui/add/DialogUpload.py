@@ -5,6 +5,8 @@ from PyQt5.QtGui import QIcon
 
 from config.config import Config
 from data.data_manager import DataManager
+from display_cache import encode_rendition_of_file
+from logger import log
 from ops import cloud_ops
 
 
@@ -50,6 +52,8 @@ class UploadThread(QThread):
                 except Exception as e:
                     self.error_occurred.emit(str(e))
                     return
+                if media.type == 1:
+                    self.upload_display_rendition(media, media_path)
                 self.progress.emit((i + 1) * 80 // len(self.media_paths))
 
             try:
@@ -61,7 +65,7 @@ class UploadThread(QThread):
                 self.progress.emit(90)
 
                 self.current_operation.emit("Veri tabanı yükleniyor...")
-                cloud_ops.upload_database()
+                self.data_manager.upload_local_db()
 
             except Exception as e:
                 self.error_occurred.emit(str(e))
@@ -73,6 +77,23 @@ class UploadThread(QThread):
         except Exception as e:
             self.error_occurred.emit(str(e))
 
+    @staticmethod
+    def upload_display_rendition(media, media_path):
+        """Upload the display rendition (see display_cache.py); an image without
+        one is still shown from its original, so a failure does not stop the
+        upload. scripts/backfill_display_renditions.py can make it later."""
+        try:
+            cloud_ops.put_s3_object(
+                f"display/{media.media_uuid}.jpg",
+                encode_rendition_of_file(media_path),
+            )
+        except Exception as e:
+            log(
+                "UploadThread.upload_display_rendition",
+                f"Display rendition of {media_path} couldn't be uploaded: {e}",
+                level="warning",
+            )
+
     def stop(self):
         self._is_running = False
 
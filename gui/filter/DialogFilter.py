@@ -77,7 +77,7 @@ class DialogFilter(QDialog):
 
         self.data_manager = data_manager
         self.parent = parent
-        self.albums = self.data_manager.get_all_albums()
+        self.album_index = self.data_manager.get_album_index()
         self.media_filter = None
 
         self.checkbox_include_child = QCheckBox(Constants.FILTER_INCLUDE_CHILDREN)
@@ -88,7 +88,7 @@ class DialogFilter(QDialog):
         )
         self.toggle_albums_mode.setVisible(False)
 
-        self.frame_tree = FrameTreeAlbums(self.albums)
+        self.frame_tree = FrameTreeAlbums(self.album_index)
         self.checkbox_include_child.stateChanged.connect(
             self._on_include_children_changed
         )
@@ -206,7 +206,7 @@ class DialogFilter(QDialog):
         self.toggle_albums_mode.setVisible(self.frame_tree.get_checked_count() > 1)
 
     def update_albums(self):
-        self.albums = self.data_manager.get_all_albums()
+        self.album_index = self.data_manager.get_album_index()
 
     def get_quick(self):
         return self.input_quick.text().strip()
@@ -221,6 +221,7 @@ class DialogFilter(QDialog):
         return {
             "album_groups": self.frame_tree.get_selected_album_groups(),
             "albums_mode": "and" if self.toggle_albums_mode.is_left_active() else "or",
+            "albums_include_children": self.frame_tree.get_include_children(),
         }
 
     def build_filter(self) -> MediaFilter:
@@ -1,4 +1,3 @@
-from typing import Sequence
 from PyQt5.QtWidgets import (
     QTreeWidget,
     QTreeWidgetItem,
@@ -9,7 +8,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 
-from data.orm import Album
+from data.album_index import AlbumIndex
 from gui.constants import Constants
 
 ALBUM_TAG_ROLE = Qt.UserRole
@@ -18,7 +17,7 @@ ALBUM_TAG_ROLE = Qt.UserRole
 class FrameTreeAlbums(QFrame):
     selection_changed = pyqtSignal()
 
-    def __init__(self, albums: Sequence[Album], include_children: bool = True):
+    def __init__(self, album_index: AlbumIndex, include_children: bool = True):
         super().__init__()
 
         self.setFixedSize(600, 300)
@@ -45,15 +44,15 @@ class FrameTreeAlbums(QFrame):
         self.tree = QTreeWidget()
         self.tree.setHeaderHidden(True)
         self.tree.setSelectionMode(QTreeWidget.NoSelection)
-        self._build_tree(albums)
+        self._build_tree(album_index)
         self.tree.itemChanged.connect(self._on_item_changed)
 
         self._layout.addLayout(button_layout)
         self._layout.addWidget(self.tree)
 
-    def _build_tree(self, albums: Sequence[Album]):
+    def _build_tree(self, album_index: AlbumIndex):
         node_items: dict[str, QTreeWidgetItem] = {}
-        sorted_albums = sorted(albums, key=lambda x: len(x.path))
+        sorted_albums = sorted(album_index.albums, key=lambda x: len(x.path))
 
         for album in sorted_albums:
             item = QTreeWidgetItem([album.name])
@@ -61,8 +60,7 @@ class FrameTreeAlbums(QFrame):
             item.setCheckState(0, Qt.Unchecked)
             item.setData(0, ALBUM_TAG_ROLE, album.tag)
 
-            parent_path = album.path[: -len(album.tag)]
-            parent_tag = parent_path[-3:] if parent_path else None
+            parent_tag = album_index.get_parent_tag(album.tag)
 
             if parent_tag and parent_tag in node_items:
                 node_items[parent_tag].addChild(item)
@@ -85,21 +83,19 @@ class FrameTreeAlbums(QFrame):
         self._include_children = enabled
         self.selection_changed.emit()
 
+    def get_include_children(self) -> bool:
+        return self._include_children
+
     def get_checked_count(self) -> int:
         return len(self._get_checked_items())
 
     def get_selected_album_groups(self) -> tuple[tuple[str, ...], ...]:
+        # Sub-albums are resolved by the query (MediaFilter.albums_include_children)
         checked_items = self._get_checked_items()
         if not checked_items:
             return (("",),)
 
-        groups = []
-        for item in checked_items:
-            tags = [item.data(0, ALBUM_TAG_ROLE)]
-            if self._include_children:
-                self._collect_descendant_tags(item, tags)
-            groups.append(tuple(tags))
-        return tuple(groups)
+        return tuple((item.data(0, ALBUM_TAG_ROLE),) for item in checked_items)
 
     def _get_checked_items(self) -> list[QTreeWidgetItem]:
         checked = []
@@ -114,13 +110,6 @@ class FrameTreeAlbums(QFrame):
                 result.append(child)
             self._walk_checked(child, result)
 
-    @staticmethod
-    def _collect_descendant_tags(item: QTreeWidgetItem, tags: list[str]):
-        for i in range(item.childCount()):
-            child = item.child(i)
-            tags.append(child.data(0, ALBUM_TAG_ROLE))
-            FrameTreeAlbums._collect_descendant_tags(child, tags)
-
     def _select_all(self):
         self.tree.blockSignals(True)
         self._set_all_check_state(Qt.Checked)
@@ -31,7 +31,7 @@ class DialogEditBulk(QDialog):
         )
 
         self.media_list = media_list
-        self.edited_media_list = []
+        self.edit_data = {}
 
         # Main layout
         self.main_layout = QVBoxLayout(self)
@@ -442,131 +442,9 @@ class DialogEditBulk(QDialog):
 
         return True
 
-    def get_edited_media_list(self):
-        edit_data = self.get_edit_data()
-        if not self.is_valid_edit_data(edit_data):
-            return False
-
-        self.edited_media_list = []
-
-        for media in self.media_list:
-            topic = media.topic
-            if edit_data.get("topic"):
-                if edit_data["topic"]["mode"] == "overwrite":
-                    topic = edit_data["topic"]["input"]
-                elif edit_data["topic"]["mode"] == "replace":
-                    if media.topic:
-                        topic = media.topic.replace(
-                            edit_data["topic"]["from"], edit_data["topic"]["to"]
-                        )
-
-            title = media.title
-            if edit_data.get("title"):
-                if edit_data["title"]["mode"] == "overwrite":
-                    title = edit_data["title"]["input"]
-                elif edit_data["title"]["mode"] == "replace":
-                    if media.title:
-                        title = media.title.replace(
-                            edit_data["title"]["from"], edit_data["title"]["to"]
-                        )
-
-            location = media.location
-            if edit_data.get("location"):
-                if edit_data["location"]["mode"] == "overwrite":
-                    location = edit_data["location"]["input"]
-                elif edit_data["location"]["mode"] == "replace":
-                    if media.location:
-                        location = media.location.replace(
-                            edit_data["location"]["from"], edit_data["location"]["to"]
-                        )
-
-            notes = media.notes
-            if edit_data.get("notes"):
-                if edit_data["notes"]["mode"] == "overwrite":
-                    notes = edit_data["notes"]["input"]
-                elif edit_data["notes"]["mode"] == "replace":
-                    if media.notes:
-                        notes = media.notes.replace(
-                            edit_data["notes"]["from"], edit_data["notes"]["to"]
-                        )
-
-            people = media.people
-            if edit_data.get("people") and people:
-                people_replaced = replace_in_people_field(
-                    people,
-                    edit_data["people"]["from"],
-                    edit_data["people"]["to"],
-                )
-                if people_replaced is not None:
-                    people = people_replaced
-
-            tags = media.tags
-            if edit_data.get("tags"):
-                if edit_data["tags"]["mode"] == "overwrite":
-                    tags = edit_data["tags"]["input"]
-
-                elif edit_data["tags"]["mode"] == "replace":
-                    if tags:
-                        tags_list = media.tags.split(",")
-                        tags_list_replaced = [
-                            t.replace(
-                                edit_data["tags"]["from"], edit_data["tags"]["to"]
-                            )
-                            for t in tags_list
-                        ]
-                        tags = ", ".join(tags_list_replaced)
-
-                elif edit_data["tags"]["mode"] == "add":
-                    tags_to_add = edit_data["tags"]["input"]
-                    if tags:
-                        tags_to_add_list = tags_to_add.split(",")
-                        tags_list = media.tags.split(",")
-                        tags_list.extend(tags_to_add_list)
-                        tags = ",".join(tags_list)
-                    else:
-                        tags = tags_to_add
-
-                elif edit_data["tags"]["mode"] == "remove":
-                    if tags:
-                        tags_to_remove = edit_data["tags"]["input"]
-
-                        tags_to_remove_list = tags_to_remove.split(",")
-                        tags_list = media.tags.split(",")
-                        for t in tags_to_remove_list:
-                            if t in tags_list:
-                                tags_list.remove(t)
-
-                        tags = ",".join(tags_list)
-
-            date_text = media.date_text
-            date_est = media.date_est
-            if edit_data.get("date"):
-                date_text = edit_data["date"]["input"]
-                date_est = 7 - edit_data["date"]["option"]
-
-            private = media.private
-            if edit_data.get("private"):
-                private = edit_data["private"]["value"]
-
-            edited_media = Media()
-            edited_media.media_uuid = media.media_uuid
-            edited_media.topic = topic
-            edited_media.title = title
-            edited_media.location = location
-            edited_media.tags = tags
-            edited_media.notes = notes
-            edited_media.people = people
-            edited_media.people_count = len(people.split(",")) if people else 0
-            edited_media.people_detect = media.people_detect
-            edited_media.date_text = date_text
-            edited_media.date_est = date_est
-            edited_media.albums = media.albums
-            edited_media.private = private
-
-            self.edited_media_list.append(edited_media)
-
-        return True
-
     def on_ok_button(self):
-        if self.get_edited_media_list():
+        edit_data = self.get_edit_data()
+        if self.is_valid_edit_data(edit_data):
+            # Applied to the selected media by DataManager.apply_bulk_edits
+            self.edit_data = edit_data
             self.accept()
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import QLabel
 from PyQt5.QtCore import Qt, QPoint, QDateTime
-from PyQt5.QtGui import QCursor
+from PyQt5.QtGui import QCursor, QPixmap
 from media_loader import MediaLoader
 from gui.main.DialogProcess import DialogProcess
 from gui.message import show_message
@@ -28,6 +28,12 @@ class LabelImageViewer(QLabel):
         # Callback for notifying parent when image size changes (zoom)
         self.on_size_changed = None
 
+    def set_image(self, q_image):
+        """Show q_image, which may be decoded below its full resolution
+        (see MediaLoader.get_image); original_size is its full size."""
+        self.original_size = MediaLoader.get_original_size(q_image)
+        self.setPixmap(QPixmap.fromImage(q_image))
+
     def mousePressEvent(self, event):
         if self.is_image:
             if event.button() == Qt.LeftButton:
@@ -103,8 +109,24 @@ class LabelImageViewer(QLabel):
     def zoom_in(self, click_pos):
         if self.scale_modifier < 6:
             self.scale_modifier += 1.0
+        self.load_full_resolution_if_needed()
         self.update_image_size(click_pos)
 
+    def load_full_resolution_if_needed(self):
+        """Replace an image decoded below full resolution once zooming shows it
+        larger than it was decoded."""
+        if not self.pixmap() or self.original_size is None:
+            return
+        pixmap_width = self.pixmap().width()
+        if pixmap_width >= self.original_size.width():
+            return
+        scale_factor = self.initial_scale * (self.scale_modifier + 1)
+        if pixmap_width >= self.original_size.width() * scale_factor:
+            return
+        q_image = self.media_loader.get_image(self.current_media_key)
+        if q_image is not None:
+            self.setPixmap(QPixmap.fromImage(q_image))
+
     def zoom_out(self, click_pos):
         if self.scale_modifier > 3.0:
             self.scale_modifier -= 1.0
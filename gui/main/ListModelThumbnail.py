@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+
 from PyQt5.QtCore import (
     Qt,
     QSize,
@@ -12,29 +14,71 @@ from PyQt5.QtCore import (
     QDataStream,
     QMimeData,
     QByteArray,
+    QTimer,
 )
 from PyQt5.QtGui import QPixmap, QBrush, QColor
 from PyQt5.QtWidgets import QApplication, QStyledItemDelegate, QStyle
 
+from ops.http_ops import THUMBNAIL_WORKERS
+
+# Shared by every model, so replacing a view does not add THUMBNAIL_WORKERS more
+# threads competing for the HTTP connection pool (see ops.http_ops)
+_thumbnail_pool = None
+
+
+def get_thumbnail_pool():
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        _thumbnail_pool = QThreadPool()
+        _thumbnail_pool.setMaxThreadCount(THUMBNAIL_WORKERS)
+    return _thumbnail_pool
+
 
 class ThumbnailSignal(QObject):
     loaded = pyqtSignal()
 
 
+class MediaThumbnailKeys(Sequence):
+    """Thumbnail keys of a MediaIndex, read as it grows instead of copied."""
+
+    def __init__(self, media_index):
+        self.media_index = media_index
+
+    def __len__(self):
+        return len(self.media_index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return f"{self.media_index.media_uuid(index)}.jpg"
+
+
 class ListModelThumbnail(QAbstractListModel):
-    def __init__(self, thumbnail_keys, media_loader, is_reorder=False, parent=None):
+    def __init__(
+        self,
+        thumbnail_keys,
+        media_loader,
+        is_reorder=False,
+        parent=None,
+        media_stream=None,
+    ):
         super().__init__(parent)
         self.media_loader = media_loader
         self.is_reorder = is_reorder
         self.thumbnail_keys = thumbnail_keys
+        # MediaIndexStream behind thumbnail_keys, pulled from when they run out
+        self.media_stream = media_stream
         self.thumbnail_keys_loaded = []
         self.thumbnails = {}  # Cache of loaded thumbnails
-        self.threadpool = QThreadPool()
+        self.threadpool = get_thumbnail_pool()
         self.batch_size = 30000
         self.loaded_count = 0
         self.placeholder_pixmap = QPixmap(160, 80)
         self.placeholder_pixmap.fill(Qt.gray)
         self.signal = ThumbnailSignal()
+        # (row, on_fetched) of the running fetch_until
+        self._fetch_target = None
+        self._fetch_scheduled = False
 
     def rowCount(self, parent=QModelIndex()):
         return self.loaded_count
@@ -67,11 +111,17 @@ class ListModelThumbnail(QAbstractListModel):
         return None
 
     def canFetchMore(self, parent=QModelIndex()):
-        return self.loaded_count < len(self.thumbnail_keys)
+        if self.loaded_count < len(self.thumbnail_keys):
+            return True
+        return self.media_stream is not None and self.media_stream.can_fetch_more
 
     def fetchMore(self, parent=QModelIndex()):
+        if self.loaded_count == len(self.thumbnail_keys) and self.media_stream:
+            self.media_stream.fetch_more(self.batch_size)
         remaining = len(self.thumbnail_keys) - self.loaded_count
         items_to_fetch = min(self.batch_size, remaining)
+        if items_to_fetch <= 0:
+            return
         self.beginInsertRows(
             QModelIndex(), self.loaded_count, self.loaded_count + items_to_fetch - 1
         )
@@ -82,6 +132,41 @@ class ListModelThumbnail(QAbstractListModel):
         self.endInsertRows()
         self.signal.loaded.emit()
 
+    def fetch_until(self, row, on_fetched):
+        """Fetch batches until row is loaded or nothing is left, then call
+        on_fetched.
+
+        One batch per event loop turn, so the view paints before a far row (such
+        as the last one) is reached and stays responsive meanwhile. The loaded
+        signal is held back for these batches. A later call replaces the target
+        of one still running.
+        """
+        self._fetch_target = (row, on_fetched)
+        if not self._fetch_scheduled:
+            self._fetch_scheduled = True
+            QTimer.singleShot(0, self._fetch_step)
+
+    def cancel_fetch(self):
+        self._fetch_target = None
+
+    def _fetch_step(self):
+        self._fetch_scheduled = False
+        if self._fetch_target is None:
+            return
+        row, on_fetched = self._fetch_target
+        if row >= self.loaded_count and self.canFetchMore():
+            self.signal.blockSignals(True)
+            try:
+                self.fetchMore()
+            finally:
+                self.signal.blockSignals(False)
+            if row >= self.loaded_count and self.canFetchMore():
+                self._fetch_scheduled = True
+                QTimer.singleShot(0, self._fetch_step)
+                return
+        self._fetch_target = None
+        on_fetched()
+
     def load_thumbnail(self, row):
         if row in self.thumbnails:
             return  # Thumbnail already loaded
@@ -44,11 +44,16 @@ from prefetch_manager import PrefetchManager
 from logger import log
 from data.helpers import get_unix_time_days_ago, generate_export_filename
 from data.media_filter import MediaFilter
+from data.media_index import MediaIndex, MediaIndexStream
 from data.data_manager import DataManager
 from gui.message import show_message
 from gui.filter.DialogFilter import DialogFilter
 from gui.main.FrameBottom import FrameBottom
-from gui.main.ListModelThumbnail import ListModelThumbnail, ThumbnailDelegate
+from gui.main.ListModelThumbnail import (
+    ListModelThumbnail,
+    MediaThumbnailKeys,
+    ThumbnailDelegate,
+)
 from gui.main.LabelImageViewer import LabelImageViewer
 from gui.add.DialogAddMedia import DialogAddMedia
 from gui.main.DialogPeople import DialogPeople
@@ -79,7 +84,8 @@ class MainWindow(QMainWindow):
 
         # VARIABLES_________________________________________________________________________
         # Current data
-        self.media_data = []
+        self.media_data = MediaIndex()
+        self.media_stream = MediaIndexStream(self.media_data)
         self.media_index = 0
         self.media_list_name = None
         self.media_filter = None
@@ -420,7 +426,8 @@ class MainWindow(QMainWindow):
         # LOAD DATA AND SETUP_______________________________________________________________
         self.update_db()
         self.check_write_permissions()
-        self.media_data = self.data_manager.get_all_media()
+        self.media_stream = self.data_manager.get_media_index_stream()
+        self.media_data = self.media_stream.media_index
         self.prefetcher.set_media_list(self.media_data)
         self.update_frame_bottom_top_label()
         self.handle_selection_feature_buttons()
@@ -430,9 +437,11 @@ class MainWindow(QMainWindow):
 
         # POPULATE AND SETUP THUMBNAIL LIST_________________________________________________
         # Create and set the custom model
-        thumbnail_keys = [f"{media.media_uuid}.jpg" for media in self.media_data]
         self.thumbnail_model = ListModelThumbnail(
-            thumbnail_keys, self.media_loader, parent=self
+            MediaThumbnailKeys(self.media_data),
+            self.media_loader,
+            parent=self,
+            media_stream=self.media_stream,
         )
         self.thumbnail_list.setModel(self.thumbnail_model)
 
@@ -588,7 +597,19 @@ class MainWindow(QMainWindow):
                         initial_index == Constants.SETTINGS_INITIAL_END
                         and self.thumbnail_model.rowCount() > 0
                     ):
-                        i = self.thumbnail_model.rowCount() - 1
+                        i = self.media_stream.total - 1
+
+                # Rows past the loaded part are pulled from the media stream over
+                # the next event loop turns; selected once they are in
+                if (
+                    i >= self.thumbnail_model.rowCount()
+                    and self.thumbnail_model.canFetchMore()
+                ):
+                    self.thumbnail_model.fetch_until(
+                        i, lambda: self.try_select_item(i, attempt)
+                    )
+                    return
+                self.thumbnail_model.cancel_fetch()
 
                 index = self.thumbnail_model.index(i, 0)
 
@@ -622,7 +643,7 @@ class MainWindow(QMainWindow):
                 )
 
     def go_to_next_media(self):
-        if self.media_index < len(self.media_data) - 1:
+        if self.media_index < self.media_stream.total - 1:
             self.try_select_item(self.media_index + 1)
 
     def go_to_previous_media(self):
@@ -630,13 +651,14 @@ class MainWindow(QMainWindow):
             self.try_select_item(self.media_index - 1)
 
     def go_to_random_media(self):
-        if self._next_random_index is not None and 0 <= self._next_random_index < len(
-            self.media_data
+        if (
+            self._next_random_index is not None
+            and 0 <= self._next_random_index < self.media_stream.total
         ):
             index = self._next_random_index
             self._next_random_index = None
         else:
-            index = random.randint(0, len(self.media_data) - 1)
+            index = random.randint(0, self.media_stream.total - 1)
         self.try_select_item(index)
 
     def _update_prefetch_window(self):
@@ -646,15 +668,20 @@ class MainWindow(QMainWindow):
         hint = None
         if self.slideshow_timer.isActive():
             direction = self.frame_bottom.get_slideway_direction() or "F"
-            if direction == "R" and len(self.media_data) > 0:
-                self._next_random_index = random.randint(0, len(self.media_data) - 1)
+            if direction == "R" and self.media_stream.total > 0:
+                self._next_random_index = random.randint(
+                    0, self.media_stream.total - 1
+                )
                 hint = self._next_random_index
             else:
                 self._next_random_index = None
         else:
             self._next_random_index = None
         self.prefetcher.set_current_index(
-            self.media_index, direction=direction, hint=hint
+            self.media_index,
+            direction=direction,
+            hint=hint,
+            target_size=self.get_viewport_pixel_size(),
         )
 
     def on_button_lists(self, checked):
@@ -674,7 +701,7 @@ class MainWindow(QMainWindow):
                     selected_uuids = self.media_list_manager.get_uuids_from_list(
                         selected_list_name
                     )
-                    media_from_list = self.data_manager.get_media_by_uuids(
+                    media_from_list = self.data_manager.get_media_index_by_uuids(
                         selected_uuids, selected_sorting
                     )
                     self.previous_media_index = self.media_index
@@ -702,21 +729,15 @@ class MainWindow(QMainWindow):
 
     def export_selected_media(self, export_folder):
         def export_procedure():
-            selected_uuids = [
-                self.media_data[row].media_uuid for row in self.selected_rows
-            ]
-            selected_extensions = [
-                self.media_data[row].extension for row in self.selected_rows
-            ]
-            selected_export_filenames = [
-                generate_export_filename(self.media_data[row])
-                for row in self.selected_rows
-            ]
+            selected_media_list = self.data_manager.get_media_by_uuids(
+                self.get_uuids_of_selected_rows()
+            )
 
-            for uuid, extension, filename in zip(
-                selected_uuids, selected_extensions, selected_export_filenames
-            ):
-                media_path = self.media_loader.get_media_path(uuid, extension)
+            for media in selected_media_list:
+                media_path = self.media_loader.get_local_media_path(
+                    media.media_uuid, media.extension
+                )
+                filename = generate_export_filename(media)
                 file_ops.copy_file(media_path, os.path.join(export_folder, filename))
 
         dialog = DialogProcess(
@@ -732,19 +753,19 @@ class MainWindow(QMainWindow):
             show_message("Dışa aktarma tamamlanamadı.", level="warning")
 
     def on_bulk_edit_selected(self):
-        def bulk_edit_procedure(edited_media_list):
+        def bulk_edit_procedure(media_uuids, edit_data):
             self.data_manager.update_local_db()
-            for media in edited_media_list:
-                self.data_manager.edit_media(media)
-            cloud_ops.upload_database()
+            self.data_manager.apply_bulk_edits(media_uuids, edit_data)
+            self.data_manager.upload_local_db()
 
         if self.check_cloud_connected():
-            selected_media_list = [self.media_data[row] for row in self.selected_rows]
+            selected_uuids = self.get_uuids_of_selected_rows()
+            selected_media_list = self.data_manager.get_media_by_uuids(selected_uuids)
             dialog_edit_bulk = DialogEditBulk(selected_media_list)
             if dialog_edit_bulk.exec_() == QDialog.Accepted:
-                edited_media_list = dialog_edit_bulk.edited_media_list
+                edit_data = dialog_edit_bulk.edit_data
                 dialog = DialogProcess(
-                    operation=lambda: bulk_edit_procedure(edited_media_list),
+                    operation=lambda: bulk_edit_procedure(selected_uuids, edit_data),
                     title="Medyaları Toplu Düzenle",
                     message="Toplu düzenleme işlemi devam ediyor...",
                 )
@@ -891,7 +912,17 @@ class MainWindow(QMainWindow):
 
         else:
             self.media_index = row
-            self.displayed_media = self.media_data[row]
+            # The list only holds the index columns; load the full row on display
+            self.displayed_media = self.data_manager.get_media_by_uuid(
+                self.media_data.media_uuid(row)
+            )
+            if self.displayed_media is None:
+                log(
+                    "MainWindow.on_media_selected",
+                    f"Media '{self.media_data.media_uuid(row)}' not found.",
+                    level="warning",
+                )
+                return
             self.display_history_manager.update(self.displayed_media.media_uuid)
 
             self.load_media_metadata()
@@ -951,11 +982,12 @@ class MainWindow(QMainWindow):
         media_key = f"{self.displayed_media.media_uuid}{self.displayed_media.extension}"
         self.image_label.current_media_key = media_key
         self.image_label.scale_modifier = 0.0
-        q_image = self.media_loader.get_image(media_key)
+        q_image = self.media_loader.get_image(
+            media_key, target_size=self.get_viewport_pixel_size()
+        )
 
         if q_image is not None:
-            pixmap = QPixmap.fromImage(q_image)
-            self.image_label.setPixmap(pixmap)
+            self.image_label.set_image(q_image)
             self.fit_to_window()
 
     def load_video_audio_thumbnail(self):
@@ -966,8 +998,7 @@ class MainWindow(QMainWindow):
         q_image = self.media_loader.get_thumbnail(
             f"{self.displayed_media.media_uuid}.jpg"
         )
-        pixmap = QPixmap.fromImage(q_image)
-        self.image_label.setPixmap(pixmap)
+        self.image_label.set_image(q_image)
         self.fit_to_window()
 
     def on_latest_media(self, checked):
@@ -989,7 +1020,7 @@ class MainWindow(QMainWindow):
                 created_at_range=(get_unix_time_days_ago(days), -1.0),
             )
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
         else:
@@ -998,11 +1029,10 @@ class MainWindow(QMainWindow):
             self.return_to_previous_media_state()
 
     def on_open_media(self):
-        media_path = self.media_loader.get_media_path(
-            self.displayed_media.media_uuid, self.displayed_media.extension
-        )
-
         try:
+            media_path = self.media_loader.get_local_media_path(
+                self.displayed_media.media_uuid, self.displayed_media.extension
+            )
             file_ops.open_with_default_app(media_path)
         except Exception:
             show_message("Medya dosyası açılamadı.", level="error")
@@ -1011,10 +1041,13 @@ class MainWindow(QMainWindow):
         def delete_procedure():
             self.data_manager.update_local_db()
             self.data_manager.set_media_deleted(self.displayed_media.media_uuid)
-            cloud_ops.upload_database()
+            self.data_manager.upload_local_db()
             file_ops.delete_media(
                 self.displayed_media.media_uuid, self.displayed_media.extension
             )
+            self.media_loader.display_cache.remove(
+                f"{self.displayed_media.media_uuid}{self.displayed_media.extension}"
+            )
             cloud_ops.delete_media(
                 self.displayed_media.media_uuid, self.displayed_media.extension
             )
@@ -1039,7 +1072,8 @@ class MainWindow(QMainWindow):
     def fit_to_window(self):
         if self.image_label.pixmap():
             scroll_size = self.scroll_area.viewport().size()
-            img_size = self.image_label.pixmap().size()
+            # The full image size, the pixmap may have been decoded smaller
+            img_size = self.image_label.original_size
             img_aspect_ratio = img_size.width() / (img_size.height() + 0.001)
             scroll_aspect_ratio = scroll_size.width() / scroll_size.height()
 
@@ -1054,8 +1088,9 @@ class MainWindow(QMainWindow):
 
             self.image_label.setFixedSize(new_width, new_height)
             self.image_label.initial_scale = new_width / (img_size.width() + 0.001)
-            self.image_label.original_size = img_size
             self.image_label.scale_modifier = 0.0
+            # After the window grew past the resolution the image was decoded at
+            self.image_label.load_full_resolution_if_needed()
 
             # Sync container and overlay sizes with image label
             self.image_container.setFixedSize(new_width, new_height)
@@ -1063,6 +1098,16 @@ class MainWindow(QMainWindow):
             if self.face_overlay_visible:
                 self.face_overlay.update_positions()
 
+    def get_viewport_pixel_size(self):
+        """(width, height) of the image viewport in device pixels, the size
+        images are decoded for until zoomed in."""
+        viewport = self.scroll_area.viewport()
+        ratio = viewport.devicePixelRatioF()
+        return (
+            max(1, round(viewport.width() * ratio)),
+            max(1, round(viewport.height() * ratio)),
+        )
+
     def _on_image_size_changed(self):
         """Handle image zoom/resize for overlay synchronization."""
         # Sync container and overlay sizes with image label
@@ -1128,7 +1173,7 @@ class MainWindow(QMainWindow):
 
     def return_to_previous_media_state(self):
         if self.mode in ["list", "explore_forgotten"]:
-            if self.previous_mode_media_data:
+            if self.previous_mode_media_data is not None:
                 self.update_media_data(
                     self.previous_mode_media_data, index=self.previous_mode_media_index
                 )
@@ -1143,12 +1188,12 @@ class MainWindow(QMainWindow):
             )
             if self.media_filter:
                 self.update_media_data(
-                    self.data_manager.get_filtered_media(self.media_filter),
+                    self.data_manager.get_media_index_stream(self.media_filter),
                     index=self.previous_mode_media_index,
                 )
             else:
                 self.update_media_data(
-                    self.data_manager.get_all_media(),
+                    self.data_manager.get_media_index_stream(),
                     index=self.previous_mode_media_index,
                 )
 
@@ -1160,12 +1205,13 @@ class MainWindow(QMainWindow):
             )
             if self.media_filter:
                 self.update_media_data(
-                    self.data_manager.get_filtered_media(self.media_filter),
+                    self.data_manager.get_media_index_stream(self.media_filter),
                     index=self.previous_media_index,
                 )
             else:
                 self.update_media_data(
-                    self.data_manager.get_all_media(), index=self.previous_media_index
+                    self.data_manager.get_media_index_stream(),
+                    index=self.previous_media_index,
                 )
 
     def refresh_current_media_state(self):
@@ -1173,22 +1219,26 @@ class MainWindow(QMainWindow):
             selected_uuids = self.media_list_manager.get_uuids_from_list(
                 self.media_list_name
             )
-            media_from_list = self.data_manager.get_media_by_uuids(selected_uuids)
+            media_from_list = self.data_manager.get_media_index_by_uuids(
+                selected_uuids
+            )
             self.update_media_data(media_from_list, self.media_index)
 
         elif self.mode == "explore_forgotten":
-            media_list = self.data_manager.get_media_by_uuids(self.forgotten_uuids)
+            media_list = self.data_manager.get_media_index_by_uuids(
+                self.forgotten_uuids
+            )
             self.update_media_data(media_list, self.media_index)
 
         else:
             if self.media_filter:
                 self.update_media_data(
-                    self.data_manager.get_filtered_media(self.media_filter),
+                    self.data_manager.get_media_index_stream(self.media_filter),
                     index=self.media_index,
                 )
             else:
                 self.update_media_data(
-                    self.data_manager.get_all_media(), index=self.media_index
+                    self.data_manager.get_media_index_stream(), index=self.media_index
                 )
 
     def show_filter_dialog(self):
@@ -1196,7 +1246,7 @@ class MainWindow(QMainWindow):
         if self.dialog_filter.exec_() == QDialog.Accepted:
             self.media_filter = self.dialog_filter.media_filter
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
     def check_cloud_connected(self):
@@ -1259,7 +1309,7 @@ class MainWindow(QMainWindow):
             today_month = datetime.now().strftime("%m")
             self.media_filter = MediaFilter(days=today_day, months=today_month)
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
         else:
@@ -1286,7 +1336,7 @@ class MainWindow(QMainWindow):
             ]
             self.forgotten_uuids = random.sample(all_forgotten_uuids, 100)
 
-            media_list = self.data_manager.get_media_by_uuids(
+            media_list = self.data_manager.get_media_index_by_uuids(
                 self.forgotten_uuids, sort=0
             )
             self.update_media_data(media_list)
@@ -1307,7 +1357,7 @@ class MainWindow(QMainWindow):
                 self.previous_mode_media_index = (
                     self.media_index if selected_indexes else 0
                 )
-                self.previous_mode_media_data = copy.deepcopy(self.media_data)
+                self.previous_mode_media_data = self.media_stream
 
             elif self.mode in ["today_in_history", "latest"]:
                 self.previous_mode_media_index = (
@@ -1329,7 +1379,7 @@ class MainWindow(QMainWindow):
                 date_range=(date, ""), location_exact=location
             )
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
         else:
@@ -1346,7 +1396,7 @@ class MainWindow(QMainWindow):
                 self.previous_mode_media_index = (
                     self.media_index if selected_indexes else 0
                 )
-                self.previous_mode_media_data = copy.deepcopy(self.media_data)
+                self.previous_mode_media_data = self.media_stream
 
             elif self.mode in ["today_in_history", "latest"]:
                 self.previous_mode_media_index = (
@@ -1364,7 +1414,7 @@ class MainWindow(QMainWindow):
             date = self.displayed_media.date_text
             self.media_filter = MediaFilter(date_range=(date, ""))
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
         else:
@@ -1381,7 +1431,7 @@ class MainWindow(QMainWindow):
                 self.previous_mode_media_index = (
                     self.media_index if selected_indexes else 0
                 )
-                self.previous_mode_media_data = copy.deepcopy(self.media_data)
+                self.previous_mode_media_data = self.media_stream
 
             elif self.mode in ["today_in_history", "latest"]:
                 self.previous_mode_media_index = (
@@ -1399,7 +1449,7 @@ class MainWindow(QMainWindow):
             location = self.displayed_media.location
             self.media_filter = MediaFilter(location_exact=location)
             self.update_media_data(
-                self.data_manager.get_filtered_media(self.media_filter)
+                self.data_manager.get_media_index_stream(self.media_filter)
             )
 
         else:
@@ -1407,6 +1457,7 @@ class MainWindow(QMainWindow):
             self.return_to_previous_media_state()
 
     def update_media_data(self, new_media_data, index=0):
+        """Show a MediaIndex, or a MediaIndexStream that loads as the list scrolls."""
         self.stop_slideshow()
         self.clear_selection()
 
@@ -1415,7 +1466,10 @@ class MainWindow(QMainWindow):
             show_message("Medyaları güncellerken bir sorun yaşandı.", level="error")
             return
 
-        elif len(new_media_data) == 0:
+        if isinstance(new_media_data, MediaIndex):
+            new_media_data = MediaIndexStream(new_media_data)
+
+        if new_media_data.total == 0:
             log(
                 "MainWindow.update_media_data",
                 "Media data is empty, no media to display.",
@@ -1424,14 +1478,18 @@ class MainWindow(QMainWindow):
             show_message("Gösterilecek medya bulunamadı.", level="warning")
 
         # Update media_data
-        self.media_data = new_media_data
+        self.media_stream = new_media_data
+        self.media_data = new_media_data.media_index
         self._next_random_index = None
         self.prefetcher.set_media_list(self.media_data)
 
         # Refresh the thumbnails and reset the index
-        thumbnail_keys = [f"{media.media_uuid}.jpg" for media in self.media_data]
+        self.thumbnail_model.cancel_fetch()
         self.thumbnail_model = ListModelThumbnail(
-            thumbnail_keys, self.media_loader, parent=self
+            MediaThumbnailKeys(self.media_data),
+            self.media_loader,
+            parent=self,
+            media_stream=self.media_stream,
         )
         self.thumbnail_list.setModel(self.thumbnail_model)
         self.thumbnail_model.signal.loaded.connect(lambda: self.try_select_item(index))
@@ -1441,13 +1499,14 @@ class MainWindow(QMainWindow):
 
     def update_frame_bottom_top_label(self):
         self.frame_bottom.top_label.setText(
-            f"{len(self.selected_rows)} / {len(self.media_data)}"
+            f"{len(self.selected_rows)} / {self.media_stream.total}"
         )
 
     def get_uuids_of_selected_rows(self):
-        return [self.media_data[row].media_uuid for row in self.selected_rows]
+        return [self.media_data.media_uuid(row) for row in self.selected_rows]
 
     def select_all(self):
+        self.media_stream.fetch_all()
         self.selected_rows = [*range(0, len(self.media_data), 1)]
         self.update_frame_bottom_top_label()
         self.handle_selection_feature_buttons()
@@ -1458,6 +1517,7 @@ class MainWindow(QMainWindow):
         self.handle_selection_feature_buttons()
 
     def reverse_selection(self):
+        self.media_stream.fetch_all()
         self.selected_rows = [
             row
             for row in range(0, len(self.media_data), 1)
@@ -1531,13 +1591,19 @@ class MainWindow(QMainWindow):
             self.data_manager.reorder_within_date(
                 date=date, ordered_uuids=reordered_uuids
             )
-            cloud_ops.upload_database()
+            self.data_manager.upload_local_db()
 
-        right_clicked_media = self.media_data[index.row()]
+        right_clicked_media = self.data_manager.get_media_by_uuid(
+            self.media_data.media_uuid(index.row())
+        )
+        if right_clicked_media is None:
+            return
         date_text = right_clicked_media.date_text
         date_filter = MediaFilter(date_range=(date_text, ""))
-        media_from_date = self.data_manager.get_filtered_media(date_filter)
-        thumbnail_keys = [f"{media.media_uuid}.jpg" for media in media_from_date]
+        media_from_date = self.data_manager.get_filtered_media_index(date_filter)
+        thumbnail_keys = [
+            f"{media_uuid}.jpg" for media_uuid in media_from_date.media_uuids()
+        ]
 
         dialog = DialogReorder(thumbnail_keys, self.media_loader, parent=self)
         if dialog.exec_() == QDialog.Accepted:
@@ -1569,6 +1635,7 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.display_history_manager.save_display_history_file()
+        self.media_loader.display_cache.flush()
         event.accept()
 
     def apply_theme_styling(self):
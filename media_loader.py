@@ -1,17 +1,30 @@
 import os
-from typing import TYPE_CHECKING, Optional
+from io import BytesIO
+from typing import TYPE_CHECKING, Final, Optional, Tuple
 
+from PyQt5.QtCore import QSize
 from PyQt5.QtGui import QImage
 from PIL import Image
 
 from logger import log
 from config.config import Config
+from display_cache import (
+    DISPLAY_CACHE_DIRNAME,
+    DISPLAY_RENDITION_LONG_EDGE,
+    DisplayCache,
+    read_original_size,
+)
 from ops import cloud_ops, file_ops
 
 if TYPE_CHECKING:
     from prefetch_manager import PrefetchManager
 
 
+# QImage text key holding the full "widthxheight" of an image decoded at a lower
+# resolution
+ORIGINAL_SIZE_TEXT_KEY: Final[str] = "OriginalSize"
+
+
 class MediaLoader:
     """This class handles media files with methods to retrieve, save, and play media files, supporting both
     local storage and cloud storage as a fallback.
@@ -22,44 +35,95 @@ class MediaLoader:
         self.thumbnails_dir = Config.THUMBNAILS_DIR
         self.local_storage_enabled = Config.LOCAL_STORAGE_ENABLED
         self.prefetcher: Optional["PrefetchManager"] = None
+        self.display_cache = DisplayCache(
+            os.path.join(self.thumbnails_dir, DISPLAY_CACHE_DIRNAME),
+            Config.DISPLAY_CACHE_MAX_MB * 2**20,
+        )
 
-    def get_image(self, image_key: str):
+    def get_image(
+        self, image_key: str, target_size: Optional[Tuple[int, int]] = None
+    ):
         """Retrieve an image, preferring the prefetch cache, then local disk, then cloud.
 
         Args:
             image_key (str): Key of the media.
+            target_size (tuple, optional): (width, height) in pixels the image is shown
+                fitted into. The image is decoded at the lowest power-of-two scale that
+                covers it, from its display rendition when there is one (see
+                display_cache.py); None decodes the original at full resolution.
 
         Returns:
             QImage: The retrieved image, either from prefetch cache, local storage, or AWS CloudFront.
         """
 
         if self.prefetcher is not None:
-            cached = self.prefetcher.get(image_key)
+            cached = self.prefetcher.get(image_key, target_size)
             if cached is not None:
                 return cached
             if self.prefetcher.is_pending(image_key):
-                cached = self.prefetcher.await_pending(image_key)
+                cached = self.prefetcher.await_pending(image_key, target_size)
                 if cached is not None:
                     return cached
 
-        image = self._load_image_uncached(image_key)
+        image = self._load_image_uncached(image_key, target_size)
         if image is not None and self.prefetcher is not None:
             self.prefetcher.insert(image_key, image)
         return image
 
-    def _load_image_uncached(self, image_key: str):
+    @staticmethod
+    def get_original_size(q_image: QImage) -> QSize:
+        """Full resolution of an image returned by get_image."""
+        width, _, height = q_image.text(ORIGINAL_SIZE_TEXT_KEY).partition("x")
+        if not height:
+            return q_image.size()
+        return QSize(int(width), int(height))
+
+    @staticmethod
+    def covers(q_image: QImage, target_size: Optional[Tuple[int, int]]) -> bool:
+        """Whether q_image has enough pixels to be shown fitted into target_size
+        (None: whether it is at full resolution)."""
+        original_size = MediaLoader.get_original_size(q_image)
+        if target_size is None:
+            return q_image.size() == original_size
+        scale = min(
+            target_size[0] / original_size.width(),
+            target_size[1] / original_size.height(),
+            1.0,
+        )
+        return q_image.width() >= int(original_size.width() * scale)
+
+    @staticmethod
+    def _to_qimage(pil_image: Image, original_size: Tuple[int, int]) -> QImage:
+        q_image = file_ops.pil_to_qimage(pil_image)
+        if pil_image.size != original_size:
+            q_image.setText(ORIGINAL_SIZE_TEXT_KEY, "{}x{}".format(*original_size))
+        return q_image
+
+    def _load_image_uncached(
+        self, image_key: str, target_size: Optional[Tuple[int, int]] = None
+    ):
         """Load an image from local storage or cloud, bypassing the prefetch cache.
 
         Returns None on failure.
         """
 
+        if target_size is not None and max(target_size) <= DISPLAY_RENDITION_LONG_EDGE:
+            image = self._load_display_image(image_key, target_size)
+            if image is not None:
+                return image
+
         if file_ops.check_file_exists(self.media_dir, image_key):
             try:
-                pil_image = file_ops.open_image_upright(
-                    os.path.join(self.media_dir, image_key)
-                )
+                path = os.path.join(self.media_dir, image_key)
+                if target_size is None:
+                    pil_image = file_ops.open_image_upright(path)
+                    original_size = pil_image.size
+                else:
+                    pil_image, original_size = file_ops.open_image_scaled(
+                        path, target_size
+                    )
                 try:
-                    return file_ops.pil_to_qimage(pil_image)
+                    return self._to_qimage(pil_image, original_size)
                 finally:
                     pil_image.close()
 
@@ -81,6 +145,15 @@ class MediaLoader:
                 "MediaLoader._load_image_uncached",
                 f"Image {image_key} is retrieved from cloud storage.",
             )
+            original_size = pil_image.size
+            # The full image is saved; only the one shown is reduced
+            display_image = pil_image
+            if target_size is not None:
+                if self.display_cache.fits(target_size):
+                    display_image = self.display_cache.put(
+                        image_key, pil_image, original_size
+                    )
+                display_image = file_ops.reduce_to_fit(display_image, target_size)
 
             if self.local_storage_enabled:
                 try:
@@ -89,7 +162,7 @@ class MediaLoader:
                         "MediaLoader._load_image_uncached",
                         f"Image {image_key} is saved to local storage.",
                     )
-                    return file_ops.pil_to_qimage(pil_image)
+                    return self._to_qimage(display_image, original_size)
 
                 except OSError as e:
                     log(
@@ -98,7 +171,7 @@ class MediaLoader:
                         level="error",
                     )
 
-            image = file_ops.pil_to_qimage(pil_image)
+            image = self._to_qimage(display_image, original_size)
             log(
                 "MediaLoader._load_image_uncached",
                 f"Image {image_key} is directed from cloud storage without saving.",
@@ -113,6 +186,65 @@ class MediaLoader:
             )
             return None
 
+    def _load_display_image(self, image_key: str, target_size: Tuple[int, int]):
+        """Load an image from its display rendition: the cached one, one made from
+        the local original, or the one in display/ on the cloud.
+
+        Returns None if there is none, or to fall back to the original.
+        """
+
+        source_path = os.path.join(self.media_dir, image_key)
+        if not file_ops.check_file_exists(self.media_dir, image_key):
+            source_path = None
+        try:
+            rendition = self.display_cache.get(image_key, source_path)
+            if rendition is not None:
+                pil_image, _ = file_ops.open_image_scaled(rendition.path, target_size)
+                original_size = rendition.original_size
+            elif source_path is not None:
+                if not self.display_cache.enabled:
+                    return None
+                pil_image, original_size = self.display_cache.create(
+                    image_key, source_path
+                )
+                pil_image = file_ops.reduce_to_fit(pil_image, target_size)
+            elif self.display_cache.is_missing_in_cloud(image_key):
+                return None
+            else:
+                data = cloud_ops.get_display_rendition_from_cloudfront(
+                    os.path.splitext(image_key)[0]
+                )
+                if data is None:
+                    self.display_cache.set_missing_in_cloud(image_key)
+                    return None
+                log(
+                    "MediaLoader._load_display_image",
+                    f"Display rendition of {image_key} is retrieved from cloud storage.",
+                )
+                self.display_cache.put_encoded(image_key, data)
+                with Image.open(BytesIO(data)) as rendition:
+                    original_size = read_original_size(rendition) or rendition.size
+                pil_image, _ = file_ops.open_image_scaled(BytesIO(data), target_size)
+            try:
+                return self._to_qimage(pil_image, original_size)
+            finally:
+                pil_image.close()
+
+        except OSError as e:
+            log(
+                "MediaLoader._load_display_image",
+                f"Display rendition of {image_key} couldn't be loaded: {e}",
+                level="warning",
+            )
+            return None
+
+    def is_image_local(self, image_key: str) -> bool:
+        """Check if an image can be shown without downloading it."""
+
+        return file_ops.check_file_exists(
+            self.media_dir, image_key
+        ) or self.display_cache.contains(image_key)
+
     def get_thumbnail(self, thumbnail_key: str):
         """Retrieve a thumbnail image from local storage or cloud storage if not found locally.
 
@@ -165,6 +297,43 @@ class MediaLoader:
     def get_media_path(self, media_uuid, media_extension):
         return os.path.join(Config.MEDIA_DIR, f"{media_uuid}{media_extension}")
 
+    def get_local_media_path(self, media_uuid, media_extension) -> str:
+        """Path of the original media file, downloading it from cloud storage first
+        if it is not on local storage (images are browsed from their display
+        renditions, so their originals may never have been downloaded).
+
+        Args:
+            media_uuid (str): UUID of the media.
+            media_extension (str): File extension of the media.
+
+        Returns:
+            str: Path of the file; the local media path if the download failed.
+        """
+
+        media_key = f"{media_uuid}{media_extension}"
+        path = self.get_media_path(media_uuid, media_extension)
+        if file_ops.check_file_exists(self.media_dir, media_key):
+            return path
+
+        try:
+            media_data = cloud_ops.get_video_audio_from_cloudfront(media_key, "media/")
+        except Exception as e:
+            log(
+                "MediaLoader.get_local_media_path",
+                f"Media {media_key} couldn't be retrieved from cloud storage: {e}",
+                level="error",
+            )
+            return path
+
+        if not self.local_storage_enabled:
+            path = "temp/media" + media_extension
+        file_ops.save_video_audio(media_data, path)
+        log(
+            "MediaLoader.get_local_media_path",
+            f"Media {media_key} is retrieved from cloud storage to {path}.",
+        )
+        return path
+
     def check_video_audio(self, media_key: str) -> bool:
         """Check if a video or audio file exists in the local media directory.
 
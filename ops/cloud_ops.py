@@ -1,12 +1,13 @@
 import os
+import uuid
 import datetime
-from typing import Union
+import threading
+from typing import Dict, Final, Tuple, Union
 
 import boto3
 
 from io import BytesIO
 from PIL import Image
-from urllib import request
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
@@ -22,11 +23,26 @@ from botocore.exceptions import (
 )
 
 from config.config import Config
+from ops import http_ops
 from logger import log
 
+# CloudFront URLs are signed with a custom policy for everything under their
+# prefix (https://domain/thumbnails/*), so one RSA signature serves every object
+# there until SIGNED_POLICY_LIFETIME runs out. A new one is made
+# SIGNED_POLICY_RENEW_BEFORE ahead of that, so no URL is handed out about to expire.
+SIGNED_POLICY_LIFETIME: Final[datetime.timedelta] = datetime.timedelta(hours=1)
+SIGNED_POLICY_RENEW_BEFORE: Final[datetime.timedelta] = datetime.timedelta(minutes=5)
+
 sts = boto3.client("sts")
 s3 = boto3.client("s3")
 
+# (key path, key) loaded by the first signature
+_private_key = None
+_private_key_lock = threading.Lock()
+# Resource -> (query string of its signed URLs, expiration)
+_signed_policies: Dict[str, Tuple[str, datetime.datetime]] = {}
+_signed_policies_lock = threading.Lock()
+
 
 def get_user_name() -> str:
     """Retrieve the AWS IAM username of the current user.
@@ -50,15 +66,8 @@ def rsa_signer(message) -> bytes:
         bytes: The RSA signature of the message.
     """
 
-    # Load the private key from the .pem file
-    with open(Config.CLOUDFRONT_KEY_PATH, "rb") as key_file:
-        private_key = serialization.load_pem_private_key(
-            key_file.read(),
-            password=None,
-        )
-
-    # Sign the message (URL) using the private key and SHA-1
-    signature = private_key.sign(
+    # Sign the message (URL or policy) using the private key and SHA-1
+    signature = _get_private_key().sign(
         message,
         padding.PKCS1v15(),
         hashes.SHA1(),
@@ -66,19 +75,46 @@ def rsa_signer(message) -> bytes:
     return signature
 
 
-def generate_signed_url(url: str, expiration_date) -> str:
-    """Generate a signed URL with an expiration date for AWS CloudFront using private key (res/cloudfront.pem).
+def _get_private_key():
+    """The private key in the .pem file, read once (again if the path changes)."""
+
+    global _private_key
+    with _private_key_lock:
+        if _private_key is None or _private_key[0] != Config.CLOUDFRONT_KEY_PATH:
+            with open(Config.CLOUDFRONT_KEY_PATH, "rb") as key_file:
+                private_key = serialization.load_pem_private_key(
+                    key_file.read(),
+                    password=None,
+                )
+            _private_key = (Config.CLOUDFRONT_KEY_PATH, private_key)
+        return _private_key[1]
+
+
+def generate_signed_prefix_url(prefix: str, key: str) -> str:
+    """Generate a signed CloudFront URL for an object, reusing the custom policy
+    signature made for every object under its prefix while it is valid.
 
     Args:
-        url (str): The URL to be signed.
-        expiration_date (datetime): The expiration date and time for the signed URL.
+        prefix (str): The prefix path to the object (e.g. media/ or thumbnails/).
+        key (str): Key of the object under the prefix.
 
     Returns:
-        str: The signed URL with expiration constraints.
+        str: The signed URL, valid for at least SIGNED_POLICY_RENEW_BEFORE.
     """
 
-    cloudfront_signer = CloudFrontSigner(Config.CLOUDFRONT_KEY_ID, rsa_signer)
-    return cloudfront_signer.generate_presigned_url(url, date_less_than=expiration_date)
+    resource = f"https://{Config.CLOUDFRONT_DOMAIN}/{prefix}*"
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with _signed_policies_lock:
+        signed = _signed_policies.get(resource)
+        if signed is None or signed[1] - now < SIGNED_POLICY_RENEW_BEFORE:
+            expiration = now + SIGNED_POLICY_LIFETIME
+            cloudfront_signer = CloudFrontSigner(Config.CLOUDFRONT_KEY_ID, rsa_signer)
+            signed_url = cloudfront_signer.generate_presigned_url(
+                resource, policy=cloudfront_signer.build_policy(resource, expiration)
+            )
+            signed = (signed_url.partition("?")[2], expiration)
+            _signed_policies[resource] = signed
+    return f"https://{Config.CLOUDFRONT_DOMAIN}/{prefix}{key}?{signed[0]}"
 
 
 def get_image_from_cloudfront(image_key: str, prefix: str) -> Image:
@@ -95,21 +131,15 @@ def get_image_from_cloudfront(image_key: str, prefix: str) -> Image:
         Exception: If an error occurs while fetching or processing the image.
     """
 
-    url = f"https://{Config.CLOUDFRONT_DOMAIN}/{prefix}{image_key}"
-    expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
-        hours=1
-    )
-    signed_url = generate_signed_url(url, expiration)
+    signed_url = generate_signed_prefix_url(prefix, image_key)
 
     try:
-        with request.urlopen(signed_url) as response:
-            image_data = response.read()
-            image = Image.open(BytesIO(image_data))
-            from ops.file_ops import apply_exif_orientation
-
-            image = apply_exif_orientation(image)
-            image = image.convert("RGB") if image.mode != "RGB" else image
-            return image
+        image = Image.open(BytesIO(http_ops.get(signed_url)))
+        from ops.file_ops import apply_exif_orientation
+
+        image = apply_exif_orientation(image)
+        image = image.convert("RGB") if image.mode != "RGB" else image
+        return image
     except Exception as e:
         log(
             "cloud_ops.get_image_from_cloudfront",
@@ -119,6 +149,35 @@ def get_image_from_cloudfront(image_key: str, prefix: str) -> Image:
         raise e
 
 
+def get_display_rendition_from_cloudfront(media_uuid: str) -> bytes | None:
+    """Retrieve the display rendition of an image (see display_cache) from CloudFront.
+
+    Args:
+        media_uuid (str): UUID of the media.
+
+    Returns:
+        bytes | None: The rendition as JPEG data, or None if the image has none.
+
+    Raises:
+        Exception: If an error occurs while fetching the rendition.
+    """
+
+    signed_url = generate_signed_prefix_url("display/", f"{media_uuid}.jpg")
+
+    try:
+        return http_ops.get(signed_url)
+    except Exception as e:
+        # CloudFront answers 403 for keys missing from the bucket
+        if isinstance(e, http_ops.HttpStatusError) and e.status in (403, 404):
+            return None
+        log(
+            "cloud_ops.get_display_rendition_from_cloudfront",
+            f"Display rendition of '{media_uuid}' couldn't be retrieved from cloudfront: {e}",
+            level="warning",
+        )
+        raise e
+
+
 def get_video_audio_from_cloudfront(media_key: str, prefix: str) -> bytes:
     """Retrieve video or audio data from CloudFront using a signed URL.
 
@@ -133,16 +192,10 @@ def get_video_audio_from_cloudfront(media_key: str, prefix: str) -> bytes:
         Exception: If an error occurs while fetching the media data.
     """
 
-    url = f"https://{Config.CLOUDFRONT_DOMAIN}/{prefix}{media_key}"
-    expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
-        hours=1
-    )
-    signed_url = generate_signed_url(url, expiration)
+    signed_url = generate_signed_prefix_url(prefix, media_key)
 
     try:
-        with request.urlopen(signed_url) as response:
-            data = response.read()
-            return data
+        return http_ops.get(signed_url)
     except Exception as e:
         log(
             "cloud_ops.get_video_audio_from_cloudfront",
@@ -176,13 +229,16 @@ def check_s3() -> bool:
         return False
 
 
-def upload_to_s3_bucket(path: Union[str, bytes, os.PathLike], key, prefix=""):
+def upload_to_s3_bucket(
+    path: Union[str, bytes, os.PathLike], key, prefix="", metadata=None
+):
     """Upload a file to a specified S3 bucket path with optional prefix.
 
     Args:
         path (Union[str, bytes, os.PathLike]): The local path of the file to upload.
         key (str): The name of the file in the S3 bucket.
         prefix (str, optional): Optional prefix path in the S3 bucket. Defaults to "".
+        metadata (dict, optional): User metadata for the object. Defaults to None.
 
     Raises:
         NoCredentialsError: If AWS credentials are missing.
@@ -202,7 +258,10 @@ def upload_to_s3_bucket(path: Union[str, bytes, os.PathLike], key, prefix=""):
         raise FileNotFoundError()
 
     try:
-        s3.upload_file(path, Config.S3_BUCKET_NAME, f"{prefix}{key}")
+        extra_args = {"Metadata": metadata} if metadata else None
+        s3.upload_file(
+            path, Config.S3_BUCKET_NAME, f"{prefix}{key}", ExtraArgs=extra_args
+        )
         log(
             "cloud_ops.upload_to_s3_bucket",
             f"File {path} uploaded successfully to {prefix}{key}",
@@ -355,6 +414,106 @@ def download_from_s3_bucket(key, path) -> bool:
         raise e
 
 
+def head_s3_object(key) -> dict | None:
+    """Return the metadata of an object in the S3 bucket without downloading it.
+
+    Args:
+        key (str): The name of the file in the S3 bucket.
+
+    Returns:
+        dict | None: The head_object response ("ETag", user "Metadata", ...),
+        or None if the object could not be reached.
+    """
+
+    try:
+        return s3.head_object(Bucket=Config.S3_BUCKET_NAME, Key=key)
+
+    except (EndpointConnectionError, ConnectionClosedError):
+        log(
+            "cloud_ops.head_s3_object",
+            "Network connection error encountered.",
+            level="warning",
+        )
+        return None
+
+    except Exception as e:
+        log(
+            "cloud_ops.head_s3_object",
+            f"Could not read the metadata of {key}: {e}",
+            level="warning",
+        )
+        return None
+
+
+def list_s3_objects(prefix, start_after="") -> list[dict]:
+    """List the objects under a prefix in the S3 bucket, in ascending key order.
+
+    Args:
+        prefix (str): Prefix of the keys to list.
+        start_after (str, optional): Only list keys after this one. Defaults to "".
+
+    Returns:
+        list[dict]: The list_objects_v2 entries ("Key", "LastModified", ...).
+    """
+
+    arguments = {"Bucket": Config.S3_BUCKET_NAME, "Prefix": prefix}
+    if start_after:
+        arguments["StartAfter"] = start_after
+
+    objects = []
+    for page in s3.get_paginator("list_objects_v2").paginate(**arguments):
+        objects.extend(page.get("Contents", []))
+    return objects
+
+
+def list_s3_keys(prefix, start_after="") -> list[str]:
+    """List the keys under a prefix in the S3 bucket, in ascending order.
+
+    Args:
+        prefix (str): Prefix of the keys to list.
+        start_after (str, optional): Only list keys after this one. Defaults to "".
+
+    Returns:
+        list[str]: The keys.
+    """
+
+    return [content["Key"] for content in list_s3_objects(prefix, start_after)]
+
+
+def get_s3_object(key) -> bytes:
+    return s3.get_object(Bucket=Config.S3_BUCKET_NAME, Key=key)["Body"].read()
+
+
+def put_s3_object(key, body: bytes):
+    s3.put_object(Bucket=Config.S3_BUCKET_NAME, Key=key, Body=body)
+    log("cloud_ops.put_s3_object", f"Object uploaded successfully to {key}")
+
+
+def create_s3_object(key, body: bytes) -> bool:
+    """Upload an object only if no object has the key yet (If-None-Match: *).
+
+    Args:
+        key (str): The name of the object in the S3 bucket.
+        body (bytes): Its content.
+
+    Returns:
+        bool: True if it was created, False if the key was already taken.
+    """
+
+    try:
+        s3.put_object(Bucket=Config.S3_BUCKET_NAME, Key=key, Body=body, IfNoneMatch="*")
+    except ClientError as e:
+        # ConditionalRequestConflict: another upload to the key is in progress
+        if e.response["Error"]["Code"] in (
+            "PreconditionFailed",
+            "ConditionalRequestConflict",
+        ):
+            return False
+        raise e
+    log("cloud_ops.create_s3_object", f"Object created successfully at {key}")
+    return True
+
+
 def delete_from_s3_bucket(key, prefix=""):
     try:
         s3.delete_object(Bucket=Config.S3_BUCKET_NAME, Key=f"{prefix}{key}")
@@ -379,8 +538,38 @@ def delete_from_s3_bucket(key, prefix=""):
         )
 
 
-def upload_database():
-    upload_to_s3_bucket(path=f"{Config.DATABASE_DIR}/album.db", key="album_cloud.db")
+def upload_database(metadata=None) -> str | None:
+    """Upload album.db as album_cloud.db.
+
+    Args:
+        metadata (dict, optional): User metadata for the object. Defaults to None.
+
+    Returns:
+        str | None: The ETag of the uploaded copy, or None if it can't be confirmed
+        (e.g. another client uploaded again in the meantime).
+    """
+
+    # Tag the upload so the ETag read back is known to belong to this copy
+    upload_id = uuid.uuid4().hex
+    upload_to_s3_bucket(
+        path=f"{Config.DATABASE_DIR}/album.db",
+        key="album_cloud.db",
+        metadata={**(metadata or {}), "upload-id": upload_id},
+    )
+
+    try:
+        response = s3.head_object(Bucket=Config.S3_BUCKET_NAME, Key="album_cloud.db")
+    except Exception as e:
+        log(
+            "cloud_ops.upload_database",
+            f"Could not read the ETag of the uploaded database: {e}",
+            level="warning",
+        )
+        return None
+
+    if response.get("Metadata", {}).get("upload-id") != upload_id:
+        return None
+    return response["ETag"]
 
 
 def check_s3_write_permissions() -> bool:
@@ -438,3 +627,5 @@ def check_s3_write_permissions() -> bool:
 def delete_media(media_uuid: str, extension: str):
     delete_from_s3_bucket(key=f"{media_uuid}{extension}", prefix="media/")
     delete_from_s3_bucket(key=f"{media_uuid}.jpg", prefix="thumbnails/")
+    # Only images have a display rendition; deleting a missing key is a no-op in S3
+    delete_from_s3_bucket(key=f"{media_uuid}.jpg", prefix="display/")
@@ -6,10 +6,10 @@ import numpy as np
 import sys
 import subprocess
 
-from typing import Literal, Union
+from typing import Literal, Tuple, Union
 from datetime import datetime
 from PIL import Image, ImageOps
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import TAGS, Base
 from PyQt5.QtGui import QImage
 
 from config.config import Config
@@ -29,6 +29,50 @@ def apply_exif_orientation(image: Image.Image) -> Image.Image:
     return transposed if transposed is not None else image
 
 
+def get_upright_size(image: Image.Image) -> Tuple[int, int]:
+    """Return the (width, height) of an image once its EXIF orientation is applied."""
+    width, height = image.size
+    # Orientations 5-8 rotate by 90 degrees
+    if image.getexif().get(Base.Orientation, 1) >= 5:
+        return height, width
+    return width, height
+
+
+def get_reduction_factor(size: Tuple[int, int], fit_size: Tuple[int, int]) -> int:
+    """Return the largest of 1, 2, 4 and 8 that an image of size can be divided by
+    and still cover the area it takes when shown fitted into fit_size."""
+    scale = min(fit_size[0] / size[0], fit_size[1] / size[1])
+    factor = 1
+    while factor < 8 and factor * 2 * scale <= 1:
+        factor *= 2
+    return factor
+
+
+def reduce_to_fit(image: Image.Image, fit_size: Tuple[int, int]) -> Image.Image:
+    """Return image reduced by get_reduction_factor, or image itself if it is 1."""
+    factor = get_reduction_factor(image.size, fit_size)
+    return image.reduce(factor) if factor > 1 else image
+
+
+def open_image_scaled(
+    path: Union[str, bytes, os.PathLike], fit_size: Tuple[int, int]
+) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Open an image upright at the resolution it is shown at in fit_size.
+
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale by libjpeg (draft mode), so the
+    full bitmap is never built; other formats are decoded whole and reduced.
+
+    Returns:
+        tuple: The upright image and its full upright (width, height).
+    """
+    image = Image.open(path)
+    original_size = get_upright_size(image)
+    factor = get_reduction_factor(original_size, fit_size)
+    if factor > 1 and image.format == "JPEG":
+        image.draft(image.mode, (image.width // factor, image.height // factor))
+    return reduce_to_fit(apply_exif_orientation(image), fit_size), original_size
+
+
 def pil_to_qimage(image: Image.Image) -> QImage:
     """Convert a PIL image to a QImage (RGB888)."""
     rgb = image.convert("RGB")
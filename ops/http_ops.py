@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from typing import Final, FrozenSet, Optional
+from urllib.parse import urlsplit
+
+import urllib3
+
+from config.config import Config
+from logger import log
+
+
+# Shared keep-alive connection pool for the CloudFront downloads in cloud_ops, so
+# thumbnails and prefetched images reuse TLS connections instead of opening one
+# per object. urllib3's PoolManager is thread-safe; each host gets at most
+# HTTP_MAX_CONNECTIONS_PER_HOST connections, one per thread that downloads.
+#
+# Connection errors, timeouts, 429 and 5xx responses are retried up to
+# Config.HTTP_RETRIES times, each after a random delay of up to
+# HTTP_BACKOFF_BASE_SECONDS doubled per attempt ("full jitter"), so workers that
+# failed together do not retry together.
+PREFETCH_WORKERS: Final[int] = 4
+THUMBNAIL_WORKERS: Final[int] = 8
+# The GUI thread and a DialogProcess operation download too
+HTTP_MAX_CONNECTIONS_PER_HOST: Final[int] = PREFETCH_WORKERS + THUMBNAIL_WORKERS + 2
+HTTP_BACKOFF_BASE_SECONDS: Final[float] = 0.25
+HTTP_BACKOFF_MAX_SECONDS: Final[float] = 4.0
+HTTP_RETRY_STATUSES: Final[FrozenSet[int]] = frozenset({429, 500, 502, 503, 504})
+
+_pool_manager: Optional[urllib3.PoolManager] = None
+_pool_manager_lock = threading.Lock()
+
+
+class HttpStatusError(Exception):
+    """The server answered with a status other than 200."""
+
+    def __init__(self, url: str, status: int):
+        # Without the query, which holds the CloudFront signature
+        parts = urlsplit(url)
+        super().__init__(
+            f"HTTP {status} for {parts.scheme}://{parts.netloc}{parts.path}"
+        )
+        self.status = status
+
+
+def _get_pool_manager() -> urllib3.PoolManager:
+    global _pool_manager
+    with _pool_manager_lock:
+        if _pool_manager is None:
+            _pool_manager = urllib3.PoolManager(
+                maxsize=HTTP_MAX_CONNECTIONS_PER_HOST,
+                block=True,
+                retries=False,
+            )
+        return _pool_manager
+
+
+def get(url: str) -> bytes:
+    """Download url through the shared connection pool, retrying failures.
+
+    Args:
+        url (str): The URL to download.
+
+    Returns:
+        bytes: The response body.
+
+    Raises:
+        HttpStatusError: If the last response was not 200.
+        urllib3.exceptions.HTTPError: If the last attempt could not connect or
+            timed out.
+    """
+
+    pool_manager = _get_pool_manager()
+    timeout = urllib3.Timeout(
+        connect=Config.HTTP_CONNECT_TIMEOUT_SECONDS,
+        read=Config.HTTP_READ_TIMEOUT_SECONDS,
+    )
+    retries = max(Config.HTTP_RETRIES, 0)
+    for attempt in range(retries + 1):
+        try:
+            response = pool_manager.request("GET", url, timeout=timeout)
+        except urllib3.exceptions.HTTPError as e:
+            if attempt == retries:
+                raise
+            reason = str(e)
+        else:
+            if response.status == 200:
+                return response.data
+            if response.status not in HTTP_RETRY_STATUSES or attempt == retries:
+                raise HttpStatusError(url, response.status)
+            reason = f"HTTP {response.status}"
+
+        delay = random.uniform(
+            0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * 2**attempt)
+        )
+        log(
+            "http_ops.get",
+            f"Request to {urlsplit(url).path} failed ({reason}),"
+            f" retrying in {delay:.2f} s",
+            level="warning",
+        )
+        time.sleep(delay)
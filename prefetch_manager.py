@@ -2,12 +2,13 @@ import threading
 import time
 from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 
-from ops import file_ops
+from config.config import Config
 from logger import log
+from ops.http_ops import PREFETCH_WORKERS
 
 
 _AWAIT_TIMEOUT_SECONDS = 15.0
@@ -22,16 +23,35 @@ class PrefetchResult:
     skipped: bool
 
 
+@dataclass
+class PrefetchStats:
+    hits: int
+    # Misses served by a prefetch that was already running
+    pending_hits: int
+    misses: int
+    evictions: int
+    cached_images: int
+    cached_bytes: int
+    budget_bytes: int
+
+
 class _ManagerSignals(QObject):
     completed = pyqtSignal(object)
 
 
 class _PrefetchRunnable(QRunnable):
-    def __init__(self, manager: "PrefetchManager", media_key: str, generation: int):
+    def __init__(
+        self,
+        manager: "PrefetchManager",
+        media_key: str,
+        generation: int,
+        target_size: Optional[Tuple[int, int]],
+    ):
         super().__init__()
         self._manager = manager
         self._media_key = media_key
         self._generation = generation
+        self._target_size = target_size
 
     def run(self):
         if self._generation != self._manager.generation:
@@ -40,10 +60,7 @@ class _PrefetchRunnable(QRunnable):
             )
             return
 
-        is_local = file_ops.check_file_exists(
-            self._manager.media_loader.media_dir, self._media_key
-        )
-        needs_cloud = not is_local
+        needs_cloud = not self._manager.media_loader.is_image_local(self._media_key)
 
         if needs_cloud and not self._manager.should_attempt_cloud():
             self._manager._finalize(
@@ -52,7 +69,9 @@ class _PrefetchRunnable(QRunnable):
             return
 
         try:
-            q_image = self._manager.media_loader._load_image_uncached(self._media_key)
+            q_image = self._manager.media_loader._load_image_uncached(
+                self._media_key, self._target_size
+            )
         except Exception as e:
             log(
                 "PrefetchManager._PrefetchRunnable.run",
@@ -69,7 +88,19 @@ class _PrefetchRunnable(QRunnable):
 
 
 class PrefetchManager(QObject):
-    """Keeps a small LRU of decoded QImages for media around the current index.
+    """Keeps decoded QImages for media around the current index, within a memory
+    budget in bytes (``QImage.sizeInBytes``) rather than a number of images.
+
+    When the budget is exceeded, images outside the current window go first
+    (least recently used first), then the window's own images from its far end,
+    in the order ``_compute_window`` ranks them. The current image is never
+    evicted, even when it alone is larger than the budget. Only as much of the
+    window as is expected to fit, going by the average size of the cached images,
+    is scheduled.
+
+    Images are loaded at the resolution they are shown at (``target_size``, see
+    ``MediaLoader.get_image``); a cached image too small for the size asked for
+    counts as a miss and is replaced once loaded again.
 
     Single-flight: at most one load per key is in progress at a time. If the
     main thread requests a key that is already being prefetched, it can wait
@@ -87,9 +118,10 @@ class PrefetchManager(QObject):
         on_cloud_status_change: Optional[Callable[[bool], None]] = None,
         lookahead: int = 10,
         lookbehind: int = 10,
-        workers: int = 4,
+        workers: int = PREFETCH_WORKERS,
         failure_threshold: int = 3,
         backoff_seconds: float = 30.0,
+        memory_budget_mb: Optional[int] = None,
         parent: Optional[QObject] = None,
     ):
         super().__init__(parent)
@@ -97,7 +129,9 @@ class PrefetchManager(QObject):
         self._on_cloud_status_change = on_cloud_status_change
         self._lookahead = lookahead
         self._lookbehind = lookbehind
-        self._capacity = lookahead + lookbehind + 1
+        if memory_budget_mb is None:
+            memory_budget_mb = Config.PREFETCH_MEMORY_BUDGET_MB
+        self._budget_bytes = memory_budget_mb * 2**20
         self._failure_threshold = failure_threshold
         self._backoff_seconds = backoff_seconds
 
@@ -110,9 +144,18 @@ class PrefetchManager(QObject):
         self._lock = threading.Lock()
         self._media_data: Sequence = ()
         self._cache: "OrderedDict[str, object]" = OrderedDict()
+        self._cache_bytes: Dict[str, int] = {}
+        self._cached_bytes: int = 0
+        # Window rank of each key: 0 for the current media, then _compute_window order
+        self._window_ranks: Dict[str, int] = {}
         self._pending: Dict[str, threading.Event] = {}
         self.generation: int = 0
 
+        self._hits: int = 0
+        self._pending_hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
         self._cloud_failure_count: int = 0
         self._cloud_backoff_until: float = 0.0
         self._cloud_reported_off: bool = False
@@ -124,6 +167,9 @@ class PrefetchManager(QObject):
             self.generation += 1
             self._media_data = media_data
             self._cache.clear()
+            self._cache_bytes.clear()
+            self._cached_bytes = 0
+            self._window_ranks = {}
             old_pending = self._pending
             self._pending = {}
         for event in old_pending.values():
@@ -134,8 +180,10 @@ class PrefetchManager(QObject):
         index: int,
         direction: str = "F",
         hint: Optional[int] = None,
+        target_size: Optional[Tuple[int, int]] = None,
     ) -> None:
-        """Recompute the prefetch window around index and schedule missing items."""
+        """Recompute the prefetch window around index and schedule missing items,
+        loaded to be shown fitted into target_size (None: at full resolution)."""
         if not self._media_data:
             return
 
@@ -143,29 +191,47 @@ class PrefetchManager(QObject):
         with self._lock:
             gen = self.generation
             current_key = self._key_for(index)
-            if current_key is not None and current_key in self._cache:
-                self._cache.move_to_end(current_key)
-            for idx in self._compute_window(index, direction, hint):
-                key = self._key_for(idx)
-                if key is None:
-                    continue
-                if key in self._cache:
+            window = self._compute_window(index, direction, hint)
+            if self._is_image(index):
+                window.insert(0, index)
+            self._window_ranks = {
+                self._key_for(idx): rank for rank, idx in enumerate(window)
+            }
+
+            expected_size = (
+                self._cached_bytes // len(self._cache) if self._cache else 0
+            )
+            window_bytes = 0
+            for key in self._window_ranks:
+                if key in self._cache and self.media_loader.covers(
+                    self._cache[key], target_size
+                ):
                     self._cache.move_to_end(key)
+                    window_bytes += self._cache_bytes[key]
+                    continue
+                window_bytes += expected_size
+                if key == current_key:
+                    # Loaded by MediaLoader.get_image itself
                     continue
+                if window_bytes > self._budget_bytes:
+                    break
                 if key in self._pending:
                     continue
                 self._pending[key] = threading.Event()
                 to_schedule.append(key)
 
         for key in to_schedule:
-            self._pool.start(_PrefetchRunnable(self, key, gen))
+            self._pool.start(_PrefetchRunnable(self, key, gen, target_size))
 
-    def get(self, media_key: str):
-        """Return a cached QImage and bump its LRU recency, or None on miss."""
+    def get(self, media_key: str, target_size: Optional[Tuple[int, int]] = None):
+        """Return a cached QImage large enough for target_size and bump its LRU
+        recency, or None on miss."""
         with self._lock:
-            q_image = self._cache.get(media_key)
+            q_image = self._get_locked(media_key, target_size)
             if q_image is not None:
-                self._cache.move_to_end(media_key)
+                self._hits += 1
+            else:
+                self._misses += 1
             return q_image
 
     def is_pending(self, media_key: str) -> bool:
@@ -179,27 +245,44 @@ class PrefetchManager(QObject):
         if q_image is None:
             return
         with self._lock:
-            self._cache[media_key] = q_image
-            self._cache.move_to_end(media_key)
-            while len(self._cache) > self._capacity:
-                self._cache.popitem(last=False)
+            self._store(media_key, q_image, keep=True)
 
-    def await_pending(self, media_key: str, timeout: float = _AWAIT_TIMEOUT_SECONDS):
+    def await_pending(
+        self,
+        media_key: str,
+        target_size: Optional[Tuple[int, int]] = None,
+        timeout: float = _AWAIT_TIMEOUT_SECONDS,
+    ):
         """If a load for ``media_key`` is already in flight, block until it
-        finishes (or ``timeout`` elapses) and return the cached image, else
-        return None. Safe to call from the GUI thread; only blocks while the
-        existing load is in progress."""
+        finishes (or ``timeout`` elapses) and return the cached image if it is
+        large enough for ``target_size``, else return None. Safe to call from
+        the GUI thread; only blocks while the existing load is in progress."""
         with self._lock:
-            q_image = self._cache.get(media_key)
+            q_image = self._get_locked(media_key, target_size)
             if q_image is not None:
-                self._cache.move_to_end(media_key)
                 return q_image
             event = self._pending.get(media_key)
         if event is None:
             return None
         if not event.wait(timeout):
             return None
-        return self.get(media_key)
+        with self._lock:
+            q_image = self._get_locked(media_key, target_size)
+            if q_image is not None:
+                self._pending_hits += 1
+            return q_image
+
+    def get_stats(self) -> PrefetchStats:
+        with self._lock:
+            return PrefetchStats(
+                hits=self._hits,
+                pending_hits=self._pending_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                cached_images=len(self._cache),
+                cached_bytes=self._cached_bytes,
+                budget_bytes=self._budget_bytes,
+            )
 
     def should_attempt_cloud(self) -> bool:
         return time.monotonic() >= self._cloud_backoff_until
@@ -211,15 +294,57 @@ class PrefetchManager(QObject):
             event = self._pending.pop(result.key, None)
             stale = result.generation != self.generation
             if not stale and not result.skipped and result.q_image is not None:
-                self._cache[result.key] = result.q_image
-                self._cache.move_to_end(result.key)
-                while len(self._cache) > self._capacity:
-                    self._cache.popitem(last=False)
+                self._store(result.key, result.q_image)
         if event is not None:
             event.set()
         if not stale:
             self._signals.completed.emit(result)
 
+    def _get_locked(self, media_key: str, target_size: Optional[Tuple[int, int]]):
+        q_image = self._cache.get(media_key)
+        if q_image is None or not self.media_loader.covers(q_image, target_size):
+            return None
+        self._cache.move_to_end(media_key)
+        return q_image
+
+    def _store(self, media_key: str, q_image, keep: bool = False) -> None:
+        """Cache q_image, then evict until the cache fits the budget again. With
+        keep, q_image itself is not evicted (the image just shown)."""
+        cached = self._cache.get(media_key)
+        if cached is not None and cached.width() > q_image.width():
+            # A lower resolution load finished after the image was enlarged
+            q_image = cached
+        self._remove(media_key)
+        size = q_image.sizeInBytes()
+        self._cache[media_key] = q_image
+        self._cache_bytes[media_key] = size
+        self._cached_bytes += size
+        while self._cached_bytes > self._budget_bytes:
+            victim = self._pick_victim(media_key if keep else None)
+            if victim is None:
+                break
+            self._remove(victim)
+            self._evictions += 1
+
+    def _pick_victim(self, keep_key: Optional[str]) -> Optional[str]:
+        """Least recently used key outside the window, else the window's
+        lowest-ranked key; never the current media (rank 0) or keep_key."""
+        victim = None
+        victim_rank = 0
+        for key in self._cache:
+            if key == keep_key:
+                continue
+            rank = self._window_ranks.get(key)
+            if rank is None:
+                return key
+            if rank > victim_rank:
+                victim, victim_rank = key, rank
+        return victim
+
+    def _remove(self, media_key: str) -> None:
+        if self._cache.pop(media_key, None) is not None:
+            self._cached_bytes -= self._cache_bytes.pop(media_key)
+
     def _on_completed_ui(self, result: PrefetchResult) -> None:
         if result.skipped:
             return
@@ -0,0 +1,100 @@
+"""Upload display renditions (see display_cache.py) of the images in S3 without one.
+
+Usage: python scripts/backfill_display_renditions.py [--limit 1000]
+           [--workers 4] [--dry-run]
+
+Run it from the album directory, like app.py, so res/config.json is read.
+Images uploaded before display/ existed only have their original in media/;
+this makes the rendition from the local original in MEDIA_DIR when there is
+one and downloads the original otherwise. It can be stopped and rerun: images
+that already have a rendition are skipped.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config.config import Config
+from display_cache import encode_rendition_of_file
+from ops import cloud_ops, file_ops
+
+
+def _backfill(media_key: str) -> tuple[int, bool]:
+    """Upload the rendition of media_key; its size and whether the original was
+    downloaded."""
+    path = os.path.join(Config.MEDIA_DIR, media_key)
+    downloaded = not file_ops.check_file_exists(Config.MEDIA_DIR, media_key)
+    if downloaded:
+        data = encode_rendition_of_file(
+            BytesIO(cloud_ops.get_s3_object(f"media/{media_key}"))
+        )
+    else:
+        data = encode_rendition_of_file(path)
+    cloud_ops.put_s3_object(f"display/{os.path.splitext(media_key)[0]}.jpg", data)
+    return len(data), downloaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, help="upload at most this many")
+    parser.add_argument("--workers", type=int, default=4, help="parallel uploads")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the missing renditions"
+    )
+    args = parser.parse_args()
+
+    Config.read_config()
+    with_rendition = {
+        os.path.splitext(os.path.basename(key))[0]
+        for key in cloud_ops.list_s3_keys("display/")
+    }
+    media_keys = [
+        os.path.basename(key)
+        for key in cloud_ops.list_s3_keys("media/")
+        if file_ops.get_file_type(key) == 1
+        and os.path.splitext(os.path.basename(key))[0] not in with_rendition
+    ]
+    print(f"{len(media_keys)} images have no display rendition.")
+    if args.dry_run or not media_keys:
+        return 0
+    if args.limit is not None:
+        media_keys = media_keys[: args.limit]
+
+    made = 0
+    made_bytes = 0
+    downloads = 0
+    failed = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(_backfill, media_key): media_key for media_key in media_keys
+        }
+        for future, media_key in futures.items():
+            try:
+                size_bytes, downloaded = future.result()
+            except Exception as e:
+                print(f"{media_key}: {e}")
+                failed += 1
+                continue
+            made += 1
+            made_bytes += size_bytes
+            downloads += downloaded
+
+    print(
+        f"Uploaded {made} renditions ({made_bytes / 2**20:.0f} MiB) in"
+        f" {time.perf_counter() - started:.0f} s; {downloads} originals were"
+        f" downloaded, {failed} failed."
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
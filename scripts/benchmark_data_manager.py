@@ -0,0 +1,358 @@
+"""Time every public DataManager method and representative filters on an album.db.
+
+Usage: python scripts/benchmark_data_manager.py path/to/album.db
+           [--rounds 5] [-k filter] [--output results.json]
+           [--compare baseline.json [--fail-above 1.25]]
+
+The database is never modified: the run works on a temporary copy, which the
+write cases (edits, reorder, delete, bulk edit, insert) change as they go.
+Cached filter results are dropped before every round, so each round runs its
+queries. The cloud methods (update_local_db, upload_local_db, compact_cloud_db)
+and build_media, which copies files, are not timed. Writes are stamped with a
+fixed user name instead of asking AWS.
+
+Results are written as JSON (median/min/max seconds per case, with the
+database size and versions); --compare prints the ratio against an earlier
+file and, with --fail-above, exits with 1 when a case got slower than that.
+Use scripts/generate_album_db.py for a database of a given size.
+
+tests/test_benchmarks.py runs the same cases from pytest on a generated
+database: python -m pytest -m benchmark (see the --album-benchmark-* options).
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import sqlalchemy
+
+from config.config import Config
+from data.data_manager import ALBUM_DATABASE_FILENAME, DataManager
+from data.helpers import date_to_julian
+from data.media_filter import MediaFilter
+from data.orm import Media
+from ops import cloud_ops
+
+RESULTS_FORMAT_VERSION = 1
+SAMPLE_SIZE = 500
+BULK_EDIT_SIZE = 1000
+INSERT_SIZE = 100
+INSERT_DATE = "01.01.2000"
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], Any]
+    # Called before every round, untimed
+    setup: Callable[[], None] | None = None
+
+
+def _filters(data_manager: DataManager) -> list[tuple[str, MediaFilter]]:
+    tags = [album.tag for album in data_manager.get_all_albums()[:3]] or ["a01"]
+    people = [person for person, _ in data_manager.get_people_counts()[:3]]
+    person = people[0] if people else "Ali"
+    return [
+        ("quick", MediaFilter(quick="ist")),
+        ("quick(turkish)", MediaFilter(quick="ışıl")),
+        ("quick(short)", MediaFilter(quick="de")),
+        ("people(one)", MediaFilter(people=person)),
+        ("people(and)", MediaFilter(people=" + ".join(people[:2]) or "Ali + Ayşe")),
+        ("people(nested)", MediaFilter(people="[Ali, Veli] + Ayşe")),
+        ("albums(or)", MediaFilter(album_groups=(tuple(tags[:2]),), albums_mode="or")),
+        (
+            "albums(and)",
+            MediaFilter(album_groups=((tags[0],), tuple(tags[1:])), albums_mode="and"),
+        ),
+        ("albums(one)", MediaFilter(album_groups=((tags[-1],),))),
+        ("today_in_history", MediaFilter(days="1", months="1")),
+        ("years", MediaFilter(years="2010,2011")),
+        ("days_of_week", MediaFilter(days_of_week="cumartesi,pazar")),
+        ("topic", MediaFilter(topic="bayram, tatil")),
+        ("title+location", MediaFilter(title="gezi", location="istanbul")),
+        ("location_exact", MediaFilter(location_exact="BODRUM")),
+        ("tags", MediaFilter(tags="deniz + kum")),
+        (
+            "date_range",
+            MediaFilter(
+                date_range=("01.01.2000", "31.12.2005"), date_range_enabled=True
+            ),
+        ),
+        (
+            "people_count_range",
+            MediaFilter(people_count_range=(2, 3), people_count_range_enabled=True),
+        ),
+        (
+            "latest",
+            MediaFilter(created_at_range=(0.0, -1.0), created_at_range_enabled=True),
+        ),
+        ("sort(location)", MediaFilter(sort=(2, 0))),
+    ]
+
+
+def _cases(data_manager: DataManager) -> list[Case]:
+    media_index = data_manager.get_all_media_index()
+    step = max(1, len(media_index) // SAMPLE_SIZE)
+    uuids = [media_index.media_uuid(i) for i in range(0, len(media_index), step)]
+    uuids = uuids[:SAMPLE_SIZE]
+    date = media_index[len(media_index) // 2].date if len(media_index) else 0.0
+    deleted = iter(reversed(uuids))
+
+    def drop_vocabulary() -> None:
+        data_manager._vocabulary = None
+        Path(data_manager._get_vocabulary_path()).unlink(missing_ok=True)
+
+    def drop_album_index() -> None:
+        data_manager._album_index = None
+
+    def edit_media() -> None:
+        media = data_manager.get_media_by_uuid(uuids[0])
+        media.topic = "BENCHMARK" if media.topic != "BENCHMARK" else "BENCHMARK 2"
+        data_manager.edit_media(media)
+
+    def reorder_within_date() -> None:
+        media_list = data_manager.get_media_of_date(date)
+        data_manager.reorder_within_date(
+            date, [media.media_uuid for media in reversed(media_list)]
+        )
+
+    def insert_media() -> None:
+        data_manager.insert_media_list_to_local(
+            [
+                Media(
+                    media_uuid=uuid.uuid4().hex,
+                    created_at=time.time(),
+                    status=1,
+                    topic="BENCHMARK",
+                    title="Eklenen",
+                    location="İSTANBUL",
+                    date=date_to_julian(INSERT_DATE),
+                    date_text=INSERT_DATE,
+                    date_est=7,
+                    type=1,
+                    extension=".jpg",
+                    private=0,
+                    people="Ali YILMAZ",
+                    people_count=1,
+                )
+                for _ in range(INSERT_SIZE)
+            ]
+        )
+
+    cases = [
+        Case("get_all_media", data_manager.get_all_media),
+        Case("get_all_media_index", data_manager.get_all_media_index),
+        Case("get_list_uuids", data_manager.get_list_uuids),
+        Case("get_all_deleted_media", data_manager.get_all_deleted_media),
+        Case(
+            f"get_media_by_uuid x{len(uuids)}",
+            lambda: list(map(data_manager.get_media_by_uuid, uuids)),
+        ),
+        Case("get_media_by_uuids", lambda: data_manager.get_media_by_uuids(uuids)),
+        Case(
+            "get_media_by_uuids(sort=0)",
+            lambda: data_manager.get_media_by_uuids(uuids, sort=0),
+        ),
+        Case(
+            "get_media_index_by_uuids",
+            lambda: data_manager.get_media_index_by_uuids(uuids),
+        ),
+        Case("get_recent_people_fields", data_manager.get_recent_people_fields),
+        Case("get_recent_location_fields", data_manager.get_recent_location_fields),
+        Case("get_vocabulary(rebuild)", data_manager.get_vocabulary, drop_vocabulary),
+        Case("get_people_counts", data_manager.get_people_counts),
+        Case("get_list_people", data_manager.get_list_people),
+        Case("get_location_counts", data_manager.get_location_counts),
+        Case("get_list_locations", data_manager.get_list_locations),
+        Case("get_media_of_date", lambda: data_manager.get_media_of_date(date)),
+        Case("get_last_rank", lambda: data_manager.get_last_rank(date)),
+        Case("get_all_albums", data_manager.get_all_albums),
+        Case("get_album_index", data_manager.get_album_index, drop_album_index),
+        Case(
+            "get_all_album_paths_with_tags",
+            data_manager.get_all_album_paths_with_tags,
+        ),
+        Case("count_media", data_manager.count_media),
+        Case("get_media_index_stream", data_manager.get_media_index_stream),
+        Case(
+            "get_filtered_media(quick)",
+            lambda: data_manager.get_filtered_media(MediaFilter(quick="ist")),
+        ),
+    ]
+    for name, media_filter in _filters(data_manager):
+        cases.append(
+            Case(
+                f"get_filtered_media_index({name})",
+                lambda media_filter=media_filter: (
+                    data_manager.get_filtered_media_index(media_filter)
+                ),
+            )
+        )
+        cases.append(
+            Case(
+                f"count_media({name})",
+                lambda media_filter=media_filter: (
+                    data_manager.count_media(media_filter)
+                ),
+            )
+        )
+    cases += [
+        Case("edit_media", edit_media),
+        Case("reorder_within_date", reorder_within_date),
+        Case(
+            "set_media_deleted",
+            lambda: data_manager.set_media_deleted(next(deleted)),
+        ),
+        Case(
+            f"apply_bulk_edits({BULK_EDIT_SIZE})",
+            lambda: data_manager.apply_bulk_edits(
+                media_index.media_uuids()[:BULK_EDIT_SIZE],
+                {
+                    "topic": {"mode": "overwrite", "input": "BENCHMARK"},
+                    "tags": {"mode": "add", "input": "benchmark"},
+                },
+            ),
+        ),
+        Case(f"insert_media_list_to_local({INSERT_SIZE})", insert_media),
+    ]
+    return cases
+
+
+def _run_case(data_manager: DataManager, case: Case, rounds: int) -> dict[str, Any]:
+    samples = []
+    for _ in range(rounds):
+        data_manager._invalidate_filter_results()
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        case.run()
+        samples.append(time.perf_counter() - started)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "rounds": rounds,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    db_path: Path, rounds: int, pattern: str | None = None
+) -> dict[str, Any]:
+    """Time the cases on a temporary copy of db_path; results as written by
+    --output. Writes are stamped with cloud_ops.get_user_name, which the caller
+    replaces."""
+    database_dir = Config.DATABASE_DIR
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copyfile(db_path, Path(temp_dir, ALBUM_DATABASE_FILENAME))
+        Config.DATABASE_DIR = temp_dir
+        data_manager = DataManager()
+        try:
+            # Migrations and the first connection are not part of any case
+            data_manager.get_all_albums()
+            media_count = data_manager.count_media()
+
+            cases: dict[str, dict[str, Any]] = {}
+            for case in _cases(data_manager):
+                if pattern and pattern not in case.name:
+                    continue
+                cases[case.name] = _run_case(data_manager, case, rounds)
+                print(f"{case.name:<52}{cases[case.name]['median'] * 1000:>10.1f} ms")
+            schema_version = data_manager.schema_version
+        finally:
+            data_manager.close_db_engine()
+            Config.DATABASE_DIR = database_dir
+
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "created_at": time.time(),
+        "commit": _git_commit(),
+        "database": {
+            "path": str(db_path),
+            "bytes": db_path.stat().st_size,
+            "visible_media": media_count,
+            "schema_version": schema_version,
+        },
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+
+
+def compare_results(
+    results: dict, baseline: dict, fail_above: float | None
+) -> list[str]:
+    """Print new/old per case; the cases slower than fail_above allows."""
+    slower_cases = []
+    print(f"\n{'case':<52}{'old ms':>10}{'new ms':>10}{'ratio':>8}")
+    for name, result in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+        ratio = result["median"] / max(old["median"], 1e-9)
+        slower = fail_above is not None and ratio > fail_above
+        if slower:
+            slower_cases.append(name)
+        print(
+            f"{name:<52}{old['median'] * 1000:>10.1f}{result['median'] * 1000:>10.1f}"
+            f"{ratio:>7.2f}x{'  SLOWER' if slower else ''}"
+        )
+    return slower_cases
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db", type=Path, help="album.db to measure (left untouched)")
+    parser.add_argument("--rounds", type=int, default=5, help="runs per case")
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains it")
+    parser.add_argument("--output", type=Path, help="write the results here as JSON")
+    parser.add_argument("--compare", type=Path, help="earlier --output to compare to")
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        help="exit with 1 if a case is this many times slower",
+    )
+    args = parser.parse_args()
+
+    cloud_ops.get_user_name = lambda: "benchmark"
+    results = run_benchmarks(args.db, args.rounds, args.pattern)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare_results(results, baseline, args.fail_above):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""Time DataManager reads from album.db on disk against the in-memory replica.
+
+Usage: python scripts/benchmark_read_replica.py path/to/album.db [--repeat 5]
+
+The database is never modified: both runs work on a temporary copy. Cached
+filter results are dropped before every call, so each one runs its queries.
+Prints the replica load time and size, then the median time of every read
+with Config.DATABASE_IN_MEMORY off and on.
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config.config import Config
+from data.data_manager import ALBUM_DATABASE_FILENAME, DataManager
+from data.media_filter import MediaFilter
+
+
+def _reads(data_manager: DataManager) -> list[tuple[str, Callable[[], Any]]]:
+    sample = data_manager.get_all_media_index()[:200]
+    date = sample[0].date if sample else 0.0
+    uuids = [entry.media_uuid for entry in sample]
+    return [
+        ("get_all_media_index", data_manager.get_all_media_index),
+        ("count_media", data_manager.count_media),
+        ("get_media_by_uuids(200)", lambda: data_manager.get_media_by_uuids(uuids)),
+        (
+            "get_media_by_uuid x200",
+            lambda: [data_manager.get_media_by_uuid(uuid) for uuid in uuids],
+        ),
+        ("get_media_of_date", lambda: data_manager.get_media_of_date(date)),
+        ("get_recent_people_fields", data_manager.get_recent_people_fields),
+        (
+            "get_filtered_media_index(quick)",
+            lambda: data_manager.get_filtered_media_index(MediaFilter(quick="ist")),
+        ),
+        (
+            "get_filtered_media_index(people)",
+            lambda: data_manager.get_filtered_media_index(
+                MediaFilter(people="Ali + Ayşe")
+            ),
+        ),
+        (
+            "get_filtered_media_index(location)",
+            lambda: data_manager.get_filtered_media_index(
+                MediaFilter(location="istanbul")
+            ),
+        ),
+        (
+            "get_filtered_media_index(today_in_history)",
+            lambda: data_manager.get_filtered_media_index(
+                MediaFilter(days="1", months="1")
+            ),
+        ),
+        (
+            "get_media_index_stream(first page)",
+            lambda: data_manager.get_media_index_stream(),
+        ),
+    ]
+
+
+def _time_reads(data_manager: DataManager, repeat: int) -> dict[str, float]:
+    """Median seconds per read."""
+    timings: dict[str, float] = {}
+    for name, read in _reads(data_manager):
+        samples = []
+        for _ in range(repeat):
+            data_manager._invalidate_filter_results()
+            started = time.perf_counter()
+            read()
+            samples.append(time.perf_counter() - started)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db", type=Path, help="album.db to read (left untouched)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per read")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copyfile(args.db, Path(temp_dir, ALBUM_DATABASE_FILENAME))
+        Config.DATABASE_DIR = temp_dir
+        data_manager = DataManager()
+
+        Config.DATABASE_IN_MEMORY = False
+        # Warm the page cache, so the disk run is not charged for cold reads
+        _time_reads(data_manager, 1)
+        on_disk = _time_reads(data_manager, args.repeat)
+
+        Config.DATABASE_IN_MEMORY = True
+        started = time.perf_counter()
+        replica_engine = data_manager._get_replica_engine()
+        load_seconds = time.perf_counter() - started
+        if replica_engine is None:
+            print("The replica could not be loaded.")
+            return 1
+        with replica_engine.connect() as connection:
+            page_count = connection.exec_driver_sql("PRAGMA page_count").scalar()
+            page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+        in_memory = _time_reads(data_manager, args.repeat)
+
+        data_manager.close()
+
+    print(
+        f"replica: {page_count * page_size / 2**20:.1f} MiB,"
+        f" loaded in {load_seconds:.2f} s"
+    )
+    print(f"{'read':<44}{'disk ms':>10}{'memory ms':>11}{'speedup':>9}")
+    for name, seconds in on_disk.items():
+        print(
+            f"{name:<44}{seconds * 1000:>10.1f}{in_memory[name] * 1000:>11.1f}"
+            f"{seconds / max(in_memory[name], 1e-9):>8.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
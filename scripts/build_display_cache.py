@@ -0,0 +1,80 @@
+"""Make display renditions (see display_cache.py) of the images in MEDIA_DIR.
+
+Usage: python scripts/build_display_cache.py [--limit 1000]
+
+Run it from the album directory, like app.py, so res/config.json is read. The
+newest files go first, images that already have a rendition are skipped, and
+the run stops before DISPLAY_CACHE_MAX_MB would have renditions evicted.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config.config import Config
+from media_loader import MediaLoader
+from ops import file_ops
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, help="make at most this many")
+    args = parser.parse_args()
+
+    Config.read_config()
+    display_cache = MediaLoader().display_cache
+    if not display_cache.enabled:
+        print("The display cache is turned off (DISPLAY_CACHE_MAX_MB is 0).")
+        return 1
+
+    paths = [
+        entry.path
+        for entry in os.scandir(Config.MEDIA_DIR)
+        if entry.is_file() and file_ops.get_file_type(entry.name) == 1
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    made = 0
+    made_bytes = 0
+    started = time.perf_counter()
+    for path in paths:
+        if args.limit is not None and made >= args.limit:
+            break
+        media_key = os.path.basename(path)
+        if display_cache.get(media_key, path) is not None:
+            continue
+        # Room for one more of the average size
+        total_bytes = display_cache.total_bytes
+        if total_bytes and total_bytes + total_bytes / len(display_cache) > (
+            display_cache.max_bytes
+        ):
+            print("The display cache is full.")
+            break
+        try:
+            image, _ = display_cache.create(media_key, path)
+            image.close()
+        except OSError as e:
+            print(f"{media_key}: {e}")
+            continue
+        if display_cache.total_bytes > total_bytes:
+            made += 1
+            made_bytes += display_cache.total_bytes - total_bytes
+    display_cache.flush()
+
+    print(
+        f"Made {made} renditions ({made_bytes / 2**20:.0f} MiB) in"
+        f" {time.perf_counter() - started:.0f} s; the cache holds"
+        f" {display_cache.total_bytes / 2**20:.0f} of"
+        f" {display_cache.max_bytes / 2**20:.0f} MiB."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""Print EXPLAIN QUERY PLAN for every public DataManager query, before and after migrations.
+
+Usage: python scripts/explain_queries.py path/to/album.db
+
+The database is never modified: both runs work on temporary copies. The
+"before" copy has every index and the schema version stripped and is read with
+migrations disabled, the "after" copy is migrated to the latest schema.
+"""
+
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import event
+
+from config.config import Config
+from data.data_manager import ALBUM_DATABASE_FILENAME, DataManager
+from data.media_filter import MediaFilter
+
+
+def _public_queries(data_manager: DataManager) -> list[tuple[str, Callable[[], Any]]]:
+    sample = data_manager.get_all_media()[:1]
+    date = sample[0].date if sample else 0.0
+    uuids = [media.media_uuid for media in sample]
+    return [
+        ("get_all_media", data_manager.get_all_media),
+        ("get_all_deleted_media", data_manager.get_all_deleted_media),
+        ("get_media_by_uuids", lambda: data_manager.get_media_by_uuids(uuids)),
+        (
+            "get_media_by_uuids(sort=0)",
+            lambda: data_manager.get_media_by_uuids(uuids, sort=0),
+        ),
+        ("get_recent_people_fields", data_manager.get_recent_people_fields),
+        ("get_list_people", data_manager.get_list_people),
+        ("get_recent_location_fields", data_manager.get_recent_location_fields),
+        ("get_list_locations", data_manager.get_list_locations),
+        ("get_media_of_date", lambda: data_manager.get_media_of_date(date)),
+        ("get_last_rank", lambda: data_manager.get_last_rank(date)),
+        ("get_all_albums", data_manager.get_all_albums),
+        (
+            "get_filtered_media(quick)",
+            lambda: data_manager.get_filtered_media(MediaFilter(quick="ist")),
+        ),
+        (
+            "get_filtered_media(people)",
+            lambda: data_manager.get_filtered_media(MediaFilter(people="Ali + Ayşe")),
+        ),
+        (
+            "get_filtered_media(albums)",
+            lambda: data_manager.get_filtered_media(
+                MediaFilter(album_groups=(("a01", "a02"),))
+            ),
+        ),
+        (
+            "get_filtered_media(location_exact)",
+            lambda: data_manager.get_filtered_media(
+                MediaFilter(location_exact="İSTANBUL")
+            ),
+        ),
+        (
+            "get_filtered_media(today_in_history)",
+            lambda: data_manager.get_filtered_media(MediaFilter(days="1", months="1")),
+        ),
+        (
+            "get_filtered_media(latest)",
+            lambda: data_manager.get_filtered_media(
+                MediaFilter(created_at_range=(0.0, -1.0), created_at_range_enabled=True)
+            ),
+        ),
+    ]
+
+
+def _strip_schema(db_path: Path) -> None:
+    connection = sqlite3.connect(db_path)
+    try:
+        index_names = [
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+        ]
+        for name in index_names:
+            connection.execute(f'DROP INDEX "{name}"')
+        connection.execute("DROP TABLE IF EXISTS sqlite_stat1")
+        connection.execute("PRAGMA user_version=0")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _collect_plans(db_dir: Path, migrate: bool) -> dict[str, list[list[str]]]:
+    Config.DATABASE_DIR = str(db_dir)
+    data_manager = DataManager(migrate=migrate)
+    engine = data_manager.get_db_engine()
+
+    statements: list[tuple[str, Any]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    plans: dict[str, list[list[str]]] = {}
+    for name, query in _public_queries(data_manager):
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            query()
+        finally:
+            event.remove(engine, "before_cursor_execute", _capture)
+
+        plans[name] = []
+        with engine.connect() as connection:
+            for statement, parameters in list(statements):
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                rows = connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                ).all()
+                plans[name].append([row[-1] for row in rows])
+    data_manager.close_db_engine()
+    return plans
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db", type=Path, help="album.db to analyse (left untouched)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        before_dir = Path(temp_dir, "before")
+        after_dir = Path(temp_dir, "after")
+        for db_dir in (before_dir, after_dir):
+            db_dir.mkdir()
+            shutil.copyfile(args.db, db_dir / ALBUM_DATABASE_FILENAME)
+        _strip_schema(before_dir / ALBUM_DATABASE_FILENAME)
+
+        before = _collect_plans(before_dir, migrate=False)
+        after = _collect_plans(after_dir, migrate=True)
+
+    for name in before:
+        print(f"== {name}")
+        for label, plans in (("before", before[name]), ("after", after[name])):
+            for plan in plans:
+                print(f"  {label}: " + " | ".join(plan))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
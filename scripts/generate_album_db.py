@@ -0,0 +1,311 @@
+"""Generate a synthetic album.db for measuring the data layer at scale.
+
+Usage: python scripts/generate_album_db.py path/to/album.db [--media 200000]
+
+Media come in events (a day or a few of photos and videos from one occasion)
+that share topic, location, albums, tags and the people on them, with more
+events in recent years and less precise dates on old ones. The people field
+holds Turkish names, people_detect one box per named person, and albums the
+concatenated tags of a nested Album tree. The same --seed gives the same file.
+The database is migrated to the latest schema.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event
+
+from data.cloud_journal import MEDIA_JOURNAL_COLUMNS
+from data.helpers import date_to_julian, turkish_normalize, turkish_upper
+from data.migrations import ALBUM_TAG_LENGTH, apply_migrations
+from data.orm import Album, Base, Media
+
+# fmt: off
+FIRST_NAMES = (
+    "Ahmet", "Mehmet", "Mustafa", "Ali", "Hüseyin", "İbrahim", "İsmail",
+    "Ömer", "Osman", "Murat", "Emre", "Burak", "Oğuz", "Gökhan", "Çağrı",
+    "Ümit", "Barış", "Baran", "Ekin", "Deniz", "Can", "Kaan", "Serkan",
+    "Tolga", "Yusuf", "Şükrü", "Ayşe", "Fatma", "Emine", "Hatice", "Zeynep",
+    "Elif", "Işıl", "Gülşen", "Özge", "Şule", "Büşra", "İpek", "Ceren", "Ece",
+    "Selin", "Sevda", "Nur", "Gül", "Merve", "Derya", "Aslı", "Çiğdem",
+    "Dilek", "Türkan",
+)
+SURNAMES = (
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım",
+    "Öztürk", "Aydın", "Özdemir", "Arslan", "Doğan", "Kılıç", "Aslan",
+    "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek", "Polat", "Erdoğan",
+    "Güneş", "Aksoy", "Ekinci", "Türker", "Işık", "Uçar", "İnce", "Güler",
+)
+LOCATIONS = (
+    "İSTANBUL", "ANKARA", "İZMİR", "BODRUM", "ISPARTA", "ANTALYA", "BURSA",
+    "ÇANAKKALE", "EDİRNE", "ESKİŞEHİR", "MUĞLA", "KAŞ", "FETHİYE", "ŞİLE",
+    "TRABZON", "RİZE", "NEVŞEHİR", "KONYA", "AYVALIK", "ÇEŞME", "UŞAK", "IĞDIR",
+    "PARİS", "ROMA", "BERLİN", "LONDRA", "ATİNA",
+)
+TOPICS = (
+    "DOĞUM GÜNÜ", "BAYRAM", "TATİL", "DÜĞÜN", "NİŞAN", "MEZUNİYET",
+    "YILBAŞI", "PİKNİK", "GEZİ", "OKUL", "ASKERLİK", "SÜNNET", "KONSER",
+    "MAÇ", "AİLE",
+)
+TITLES = (
+    "Sahilde", "Akşam yemeği", "Kahvaltı", "Şehir turu", "Müze gezisi",
+    "Bahçede", "Yayla yolu", "Çarşı", "Teknede", "Kar tatili", "Balkonda",
+    "Anneannemde", "Köyde", "Plajda", "Düğün salonu", "Ilıca", "Göl kenarı",
+)
+TAGS = (
+    "deniz", "kum", "kar", "dağ", "orman", "gün batımı", "yemek", "müze",
+    "köprü", "cami", "çocuklar", "kedi", "köpek", "pasta", "havai fişek",
+    "yağmur", "güneş", "tekne", "araba", "şelale",
+)
+NOTES = (
+    "Fotoğrafı dedem çekmiş.",
+    "Tarih yaklaşık.",
+    "Arka planda eski ev görünüyor.",
+    "Islak, taranmış baskı.",
+)
+ROOT_ALBUMS = (
+    "Aile", "Tatiller", "Okul", "Düğünler", "Bayramlar", "Arkadaşlar",
+    "Spor", "Yurtdışı", "Eski Fotoğraflar", "İş",
+)
+# fmt: on
+USERS = ("baran", "ayse", "mehmet")
+IMAGE_EXTENSIONS = (".jpg", ".jpg", ".jpg", ".jpeg", ".png", ".heic")
+VIDEO_EXTENSIONS = (".mp4", ".mp4", ".mov")
+
+FIRST_YEAR = 1950
+LAST_YEAR = 2025
+INSERT_BATCH_SIZE = 10000
+# Media were added over the ten years up to now, so "Latest" finds some
+CREATED_SPAN_SECONDS = 10 * 365 * 24 * 60 * 60
+
+
+def _album_tag(index: int) -> str:
+    """a01, a02, ..., a99, b00, ...; fixed width like the real tags."""
+    tag = f"{chr(ord('a') + index // 100)}{index % 100:02d}"
+    assert len(tag) == ALBUM_TAG_LENGTH
+    return tag
+
+
+def _generate_albums(rnd: random.Random, count: int) -> list[dict]:
+    """A tree up to four levels deep; each path concatenates the tags above it."""
+    albums: list[dict] = []
+    for index in range(1, count + 1):
+        tag = _album_tag(index)
+        parents = [
+            album for album in albums if len(album["path"]) < 4 * ALBUM_TAG_LENGTH
+        ]
+        if index <= len(ROOT_ALBUMS) or not parents:
+            name = ROOT_ALBUMS[(index - 1) % len(ROOT_ALBUMS)]
+            path = tag
+        else:
+            parent = rnd.choice(parents)
+            name = rnd.choice(
+                (
+                    rnd.choice(LOCATIONS).title(),
+                    str(rnd.randint(FIRST_YEAR, LAST_YEAR)),
+                    rnd.choice(FIRST_NAMES),
+                    rnd.choice(TOPICS).title(),
+                )
+            )
+            path = parent["path"] + tag
+        albums.append({"album_id": index, "tag": tag, "name": name, "path": path})
+    return albums
+
+
+def _generate_people(rnd: random.Random, count: int) -> list[str]:
+    """Unique "First [Second] SURNAME" names, as typed in the app."""
+    people: set[str] = set()
+    while len(people) < count:
+        first = rnd.choice(FIRST_NAMES)
+        if rnd.random() < 0.15:
+            first = f"{first} {rnd.choice(FIRST_NAMES)}"
+        people.add(f"{first} {turkish_upper(rnd.choice(SURNAMES))}")
+    return sorted(people)
+
+
+def _event_year(rnd: random.Random) -> int:
+    # Few scanned prints from the early decades, most media from digital cameras
+    weights = [
+        1.0 if year < 1990 else 2.0 if year < 2005 else 6.0
+        for year in range(FIRST_YEAR, LAST_YEAR + 1)
+    ]
+    return rnd.choices(range(FIRST_YEAR, LAST_YEAR + 1), weights)[0]
+
+
+def _people_detect(rnd: random.Random, people_count: int) -> str:
+    boxes = []
+    for _ in range(people_count):
+        x, y = rnd.randint(0, 3600), rnd.randint(0, 2600)
+        size = rnd.randint(80, 400)
+        boxes.append(f"{x}-{y}-{x + size}-{y + size}")
+    return ",".join(boxes)
+
+
+def _generate_media(
+    rnd: random.Random, count: int, albums: list[dict], people: list[str]
+):
+    """Yield Media rows (MEDIA_JOURNAL_COLUMNS order) event by event."""
+    # A few close family members are on a large share of the media
+    person_weights = [1.0 / (rank + 1) ** 0.8 for rank in range(len(people))]
+    leaf_tags = [
+        album["tag"]
+        for album in albums
+        if not any(
+            other["path"].startswith(album["path"]) and other is not album
+            for other in albums
+        )
+    ] or [album["tag"] for album in albums]
+    last_ranks: dict[float, float] = {}
+    created_from = time.time() - CREATED_SPAN_SECONDS
+    generated = 0
+
+    while generated < count:
+        year = _event_year(rnd)
+        start = date(year, 1, 1) + timedelta(days=rnd.randrange(365))
+        date_est = 7 if year >= 1990 else rnd.choice((7, 7, 3, 1))
+        size = min(count - generated, max(1, int(rnd.lognormvariate(2.0, 1.0))))
+        topic = rnd.choice(TOPICS)
+        location = rnd.choice(LOCATIONS)
+        title = rnd.choice(TITLES)
+        event_albums = "".join(rnd.sample(leaf_tags, rnd.choice((0, 1, 1, 2))))
+        event_tags = rnd.sample(TAGS, rnd.choice((0, 1, 2, 3)))
+        participants = list(
+            dict.fromkeys(rnd.choices(people, person_weights, k=rnd.randint(1, 8)))
+        )
+        created_by = rnd.choice(USERS)
+
+        for i in range(size):
+            day = start + timedelta(days=i * 3 // max(size, 1))
+            if date_est == 7:
+                date_text = day.strftime("%d.%m.%Y")
+            elif date_est == 3:
+                date_text = day.strftime("01.%m.%Y")
+            else:
+                date_text = day.strftime("01.01.%Y")
+            julian = date_to_julian(date_text)
+            rank = last_ranks.get(julian, 0.0) + 1.0
+            last_ranks[julian] = rank
+
+            is_video = rnd.random() < 0.12
+            media_people = (
+                rnd.sample(participants, rnd.randint(0, len(participants)))
+                if rnd.random() < 0.8
+                else []
+            )
+            status = rnd.choices((1, 2, 0), (86, 12, 2))[0]
+            modified = status == 2 or rnd.random() < 0.05
+            created_at = created_from + generated / count * CREATED_SPAN_SECONDS
+
+            yield (
+                uuid.UUID(int=rnd.getrandbits(128), version=4).hex,
+                created_at,
+                created_by,
+                created_at + rnd.uniform(60, 10**6) if modified else None,
+                rnd.choice(USERS) if modified else None,
+                status,
+                topic,
+                title if rnd.random() < 0.7 else rnd.choice(TITLES),
+                location,
+                julian,
+                date_text,
+                date_est,
+                rank,
+                2 if is_video else 1,
+                rnd.choice(VIDEO_EXTENSIONS if is_video else IMAGE_EXTENSIONS),
+                rnd.choices((0, 1, 2, 5, 9), (92, 5, 1, 1, 1))[0],
+                ",".join(media_people) or None,
+                len(media_people),
+                (
+                    _people_detect(rnd, len(media_people))
+                    if media_people and not is_video
+                    else None
+                ),
+                rnd.choice(NOTES) if rnd.random() < 0.03 else None,
+                ",".join(event_tags) or None,
+                event_albums or None,
+            )
+            generated += 1
+
+
+def generate_album_db(
+    db_path: Path, media_count: int, album_count: int, people_count: int, seed: int
+) -> None:
+    rnd = random.Random(seed)
+    engine = create_engine(f"sqlite:///{db_path}")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, record: connection.create_function(
+            "turkish_normalize", 1, turkish_normalize, deterministic=True
+        ),
+    )
+    Base.metadata.create_all(engine, tables=[Album.__table__, Media.__table__])
+
+    albums = _generate_albums(rnd, album_count)
+    people = _generate_people(rnd, people_count)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executemany(
+            "INSERT INTO Album (album_id, tag, name, path) "
+            "VALUES (:album_id, :tag, :name, :path)",
+            albums,
+        )
+        insert_sql = (
+            f"INSERT INTO Media ({', '.join(MEDIA_JOURNAL_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(MEDIA_JOURNAL_COLUMNS))})"
+        )
+        batch = []
+        for row in _generate_media(rnd, media_count, albums, people):
+            batch.append(row)
+            if len(batch) == INSERT_BATCH_SIZE:
+                connection.executemany(insert_sql, batch)
+                batch.clear()
+        connection.executemany(insert_sql, batch)
+        connection.commit()
+    finally:
+        connection.close()
+
+    apply_migrations(engine)
+    engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db", type=Path, help="album.db to create")
+    parser.add_argument("--media", type=int, default=200000, help="Media rows")
+    parser.add_argument("--albums", type=int, default=150, help="Album rows")
+    parser.add_argument("--people", type=int, default=400, help="distinct people")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--force", action="store_true", help="replace the file if it exists"
+    )
+    args = parser.parse_args()
+
+    if args.db.exists():
+        if not args.force:
+            print(f"{args.db} exists, pass --force to replace it")
+            return 1
+        args.db.unlink()
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    generate_album_db(args.db, args.media, args.albums, args.people, args.seed)
+    print(
+        f"Wrote {args.media} media and {args.albums} albums to {args.db}"
+        f" in {time.perf_counter() - started:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+import logger
+from config.config import Config
+from data import query_profiler
+from data.data_manager import ALBUM_DATABASE_FILENAME, DataManager
+from data.helpers import date_to_julian
+from data.orm import Album, Base, Media
+from ops import cloud_ops
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("album-benchmark", "DataManager benchmarks (-m benchmark)")
+    group.addoption(
+        "--album-benchmark-media",
+        type=int,
+        default=20000,
+        help="Media rows of the generated album.db",
+    )
+    group.addoption("--album-benchmark-rounds", type=int, default=5)
+    group.addoption(
+        "--album-benchmark-output", type=Path, help="write the results as JSON"
+    )
+    group.addoption(
+        "--album-benchmark-compare",
+        type=Path,
+        help="fail on cases slower than in this earlier output",
+    )
+    group.addoption("--album-benchmark-fail-above", type=float, default=1.25)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    """Keep the logs of a test run out of the working tree."""
+    path = str(tmp_path_factory.mktemp("logs"))
+    logger.LOG_DIR = path
+    query_profiler.LOG_DIR = path
+    return path
+
+
+@pytest.fixture
+def data_manager(tmp_path, monkeypatch):
+    """DataManager on an empty album.db migrated to the latest schema."""
+    monkeypatch.setattr(Config, "DATABASE_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "DATABASE_IN_MEMORY", False)
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 0)
+    monkeypatch.setattr(cloud_ops, "get_user_name", lambda: "test")
+
+    engine = create_engine(f"sqlite:///{tmp_path / ALBUM_DATABASE_FILENAME}")
+    Base.metadata.create_all(engine, tables=[Album.__table__, Media.__table__])
+    engine.dispose()
+
+    data_manager = DataManager()
+    data_manager.get_all_albums()
+    yield data_manager
+    data_manager.close()
+
+
+@pytest.fixture
+def make_media():
+    """Factory of unsaved Media; keyword arguments override the defaults."""
+
+    def make(**fields) -> Media:
+        date_text = fields.pop("date_text", "01.01.2000")
+        media = Media(
+            media_uuid=uuid.uuid4().hex,
+            created_at=time.time(),
+            status=1,
+            topic="TOPIC",
+            title="Title",
+            location="İSTANBUL",
+            date=date_to_julian(date_text),
+            date_text=date_text,
+            date_est=7,
+            type=1,
+            extension=".jpg",
+            private=0,
+            people=None,
+            people_count=0,
+        )
+        for name, value in fields.items():
+            setattr(media, name, value)
+        if media.people and "people_count" not in fields:
+            media.people_count = len(media.people.split(","))
+        return media
+
+    return make
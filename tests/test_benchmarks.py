@@ -0,0 +1,67 @@
+"""The cases of scripts/benchmark_data_manager.py on an album.db made by
+scripts/generate_album_db.py with a fixed seed.
+
+The normal run only checks that every case works on a small database. The
+timed run is deselected unless asked for:
+
+    python -m pytest -m benchmark --album-benchmark-media 200000 \\
+        --album-benchmark-output after.json --album-benchmark-compare before.json
+"""
+
+import json
+
+import pytest
+
+from config.config import Config
+from data.data_manager import ALBUM_DATABASE_FILENAME
+from ops import cloud_ops
+from scripts.benchmark_data_manager import compare_results, run_benchmarks
+from scripts.generate_album_db import generate_album_db
+
+SEED = 1
+ALBUM_COUNT = 150
+PEOPLE_COUNT = 400
+SMOKE_MEDIA_COUNT = 500
+
+
+@pytest.fixture
+def run(monkeypatch):
+    monkeypatch.setattr(Config, "DATABASE_IN_MEMORY", False)
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 0)
+    monkeypatch.setattr(cloud_ops, "get_user_name", lambda: "benchmark")
+    return run_benchmarks
+
+
+def make_album_db(directory, media_count: int):
+    path = directory / ALBUM_DATABASE_FILENAME
+    generate_album_db(path, media_count, ALBUM_COUNT, PEOPLE_COUNT, SEED)
+    return path
+
+
+def test_benchmark_cases_run(tmp_path, run):
+    results = run(make_album_db(tmp_path, SMOKE_MEDIA_COUNT), rounds=1)
+
+    assert results["database"]["visible_media"] > 0
+    assert len(results["cases"]) > 40
+    assert all(case["rounds"] == 1 for case in results["cases"].values())
+
+
+@pytest.mark.benchmark
+def test_data_manager_benchmarks(tmp_path_factory, request, run):
+    option = request.config.getoption
+    db_path = make_album_db(
+        tmp_path_factory.mktemp("benchmark"), option("--album-benchmark-media")
+    )
+    results = run(db_path, rounds=option("--album-benchmark-rounds"))
+
+    output = option("--album-benchmark-output")
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    baseline = option("--album-benchmark-compare")
+    if baseline is not None:
+        slower_cases = compare_results(
+            results,
+            json.loads(baseline.read_text(encoding="utf-8")),
+            option("--album-benchmark-fail-above"),
+        )
+        assert not slower_cases, f"Slower than {baseline}: {slower_cases}"
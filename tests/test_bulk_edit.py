@@ -0,0 +1,142 @@
+import pytest
+
+from config.config import Config
+from data.bulk_edit import (
+    edit_field,
+    get_constant_values,
+    get_derived_fields,
+    get_new_date,
+)
+from data.helpers import date_to_julian
+from data.media_filter import MediaFilter
+
+
+def overwrite(value):
+    return {"mode": "overwrite", "input": value}
+
+
+def replace(old, new):
+    return {"mode": "replace", "from": old, "to": new}
+
+
+def test_constant_and_derived_fields():
+    edit_data = {
+        "title": overwrite(""),
+        "location": overwrite("ANKARA"),
+        "topic": replace("a", "b"),
+        "tags": {"mode": "add", "input": "yaz"},
+        "people": replace("Ali", "Veli"),
+        "private": {"value": 3},
+    }
+
+    # "" is stored as NULL except in location
+    assert get_constant_values(edit_data) == {
+        "title": None,
+        "location": "ANKARA",
+        "private": 3,
+    }
+    assert get_derived_fields(edit_data) == ("topic", "tags", "people")
+    assert get_new_date(edit_data) is None
+
+
+def test_new_date():
+    edit_data = {"date": {"option": 2, "input": "15.06.1999"}}
+
+    assert get_new_date(edit_data) == (date_to_julian("15.06.1999"), "15.06.1999", 5)
+
+
+@pytest.mark.parametrize(
+    "field, value, edit, expected",
+    [
+        ("title", "Deniz kenarı", replace("Deniz", "Göl"), "Göl kenarı"),
+        ("title", None, replace("Deniz", "Göl"), None),
+        ("title", "Deniz", replace("Deniz", ""), None),
+        ("tags", "deniz,yaz", {"mode": "add", "input": "kum"}, "deniz,yaz,kum"),
+        ("tags", None, {"mode": "add", "input": "kum"}, "kum"),
+        ("tags", "deniz,yaz", {"mode": "remove", "input": "yaz"}, "deniz"),
+        ("tags", "yaz", {"mode": "remove", "input": "yaz"}, None),
+        ("tags", "deniz,yaz", replace("yaz", "kış"), "deniz, kış"),
+        # People are replaced as whole words
+        (
+            "people",
+            "Ali YILMAZ, Alim CAN",
+            replace("Ali", "Veli"),
+            "Veli YILMAZ,Alim CAN",
+        ),
+        ("people", "Alim CAN", replace("Ali", "Veli"), "Alim CAN"),
+        ("people", "Ali", replace("Ali", ""), None),
+        ("people", None, replace("Ali", "Veli"), None),
+    ],
+)
+def test_edit_field(field, value, edit, expected):
+    assert edit_field(field, value, {field: edit}) == expected
+
+
+@pytest.fixture
+def media_uuids(data_manager, make_media):
+    media = [
+        make_media(title="Deniz", tags="yaz", people="Ali YILMAZ, Ayşe KAYA"),
+        make_media(title="Göl", tags=None, people="Ali YILMAZ"),
+        make_media(title="Dağ", tags="kış", people=None),
+        make_media(title="Other", people="Ali YILMAZ"),
+    ]
+    data_manager.insert_media_list_to_local(media)
+    data_manager._journal_changes.clear()
+    return [item.media_uuid for item in media]
+
+
+def test_apply_bulk_edits(data_manager, media_uuids, monkeypatch):
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 1)
+    edited = media_uuids[:3]
+    data_manager.apply_bulk_edits(
+        edited,
+        {
+            "location": overwrite("ANKARA"),
+            "title": replace("Deniz", "Göl"),
+            "tags": {"mode": "add", "input": "aile"},
+            "people": replace("Ali YILMAZ", "Veli"),
+            "private": {"value": 1},
+        },
+    )
+    media = [data_manager.get_media_by_uuid(media_uuid) for media_uuid in media_uuids]
+
+    assert [item.location for item in media] == ["ANKARA"] * 3 + ["İSTANBUL"]
+    assert [item.title for item in media] == ["Göl", "Göl", "Dağ", "Other"]
+    assert [item.tags for item in media[:3]] == ["yaz,aile", "aile", "kış,aile"]
+    assert [item.people for item in media] == [
+        "Veli,Ayşe KAYA",
+        "Veli",
+        None,
+        "Ali YILMAZ",
+    ]
+    assert [item.people_count for item in media] == [2, 1, 0, 1]
+    assert [item.private for item in media] == [1, 1, 1, 0]
+    assert [item.status for item in media] == [2, 2, 2, 1]
+    assert {item.modified_by for item in media[:3]} == {"test"}
+    assert set(data_manager._journal_changes) == set(edited)
+    # The people index follows the executemany
+    data_manager._invalidate_filter_results()
+    assert data_manager.get_filtered_media_index(
+        MediaFilter(people="Veli")
+    ).media_uuids() == media_uuids[:2]
+
+
+def test_apply_bulk_date_edit_appends_in_selection_order(
+    data_manager, make_media, media_uuids
+):
+    later = make_media(date_text="02.01.2000")
+    data_manager.insert_media_list_to_local([later])
+    moved = [media_uuids[2], media_uuids[0]]
+    data_manager.apply_bulk_edits(
+        moved, {"date": {"option": 2, "input": "02.01.2000"}}
+    )
+
+    data_manager._invalidate_filter_results()
+    assert data_manager.get_all_media_index().media_uuids() == [
+        media_uuids[1],
+        media_uuids[3],
+        later.media_uuid,
+        *moved,
+    ]
+    media = data_manager.get_media_by_uuid(media_uuids[0])
+    assert (media.date_text, media.date_est) == ("02.01.2000", 5)
@@ -0,0 +1,271 @@
+import contextlib
+import datetime
+import hashlib
+import os
+import shutil
+
+import pytest
+
+from config.config import Config
+from data import cloud_journal
+from data.cloud_journal import (
+    JOURNAL_CURSOR_METADATA,
+    JOURNAL_PREFIX,
+    decode_entry,
+    encode_entry,
+    get_entry_sequence,
+    next_entry_key,
+)
+from data.data_manager import ALBUM_DATABASE_FILENAME, CLOUD_DATABASE_KEY, DataManager
+from ops import cloud_ops
+
+LEGACY_KEY = f"{JOURNAL_PREFIX}{1_700_000_000_000_000_000:020d}-{'a' * 32}.json"
+
+
+class FakeBucket:
+    """The S3 calls DataManager syncs through, on a dict."""
+
+    def __init__(self):
+        self.objects: dict[str, dict] = {}
+
+    def put(self, key: str, body: bytes, metadata: dict | None = None) -> str:
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.objects[key] = {
+            "Key": key,
+            "Body": body,
+            "Metadata": metadata or {},
+            "ETag": etag,
+            "LastModified": datetime.datetime.now(datetime.timezone.utc),
+        }
+        return etag
+
+    def journal_keys(self) -> list[str]:
+        return self.list_s3_keys(JOURNAL_PREFIX)
+
+    def head_s3_object(self, key):
+        return self.objects.get(key)
+
+    def download_from_s3_bucket(self, key, path) -> bool:
+        if key not in self.objects:
+            return False
+        with open(path, "wb") as f:
+            f.write(self.objects[key]["Body"])
+        return True
+
+    def upload_database(self, metadata=None):
+        with open(f"{Config.DATABASE_DIR}/{ALBUM_DATABASE_FILENAME}", "rb") as f:
+            return self.put(CLOUD_DATABASE_KEY, f.read(), metadata)
+
+    def list_s3_objects(self, prefix, start_after=""):
+        return [
+            self.objects[key]
+            for key in sorted(self.objects)
+            if key.startswith(prefix) and key > start_after
+        ]
+
+    def list_s3_keys(self, prefix, start_after=""):
+        return [entry["Key"] for entry in self.list_s3_objects(prefix, start_after)]
+
+    def get_s3_object(self, key) -> bytes:
+        return self.objects[key]["Body"]
+
+    def put_s3_object(self, key, body: bytes):
+        self.put(key, body)
+
+    def create_s3_object(self, key, body: bytes) -> bool:
+        if key in self.objects:
+            return False
+        self.put(key, body)
+        return True
+
+    def delete_from_s3_bucket(self, key, prefix=""):
+        self.objects.pop(f"{prefix}{key}", None)
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = FakeBucket()
+    for name in (
+        "head_s3_object",
+        "download_from_s3_bucket",
+        "upload_database",
+        "list_s3_objects",
+        "list_s3_keys",
+        "get_s3_object",
+        "put_s3_object",
+        "create_s3_object",
+        "delete_from_s3_bucket",
+    ):
+        monkeypatch.setattr(cloud_ops, name, getattr(bucket, name))
+    return bucket
+
+
+class Client:
+    """A DataManager with its own database directory; Config.DATABASE_DIR is
+    global, so calls go through use()."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = str(directory)
+        self.data_manager = DataManager()
+
+    @contextlib.contextmanager
+    def use(self):
+        previous = Config.DATABASE_DIR
+        Config.DATABASE_DIR = self.directory
+        try:
+            yield self.data_manager
+        finally:
+            Config.DATABASE_DIR = previous
+
+    def sync(self) -> None:
+        with self.use() as data_manager:
+            assert data_manager.update_local_db()
+
+    def set_title(self, media_uuid: str, title: str) -> None:
+        with self.use() as data_manager:
+            media = data_manager.get_media_by_uuid(media_uuid)
+            media.title = title
+            data_manager.edit_media(media)
+            data_manager.upload_local_db()
+
+    def get_title(self, media_uuid: str) -> str:
+        with self.use() as data_manager:
+            return data_manager.get_media_by_uuid(media_uuid).title
+
+
+@pytest.fixture
+def media_uuid(data_manager, make_media, bucket):
+    """A media in the album_cloud.db base, which has no journal entries yet."""
+    media = make_media()
+    data_manager.insert_media_list_to_local([media])
+    data_manager._journal_changes.clear()
+    data_manager.checkpoint_db()
+    with open(data_manager.get_db_path(), "rb") as f:
+        bucket.put(CLOUD_DATABASE_KEY, f.read(), {JOURNAL_CURSOR_METADATA: ""})
+    return media.media_uuid
+
+
+@pytest.fixture
+def clients(tmp_path, data_manager, media_uuid):
+    data_manager.close_db_engine()
+    clients = [Client(tmp_path / name) for name in ("a", "b")]
+    for client in clients:
+        client.sync()
+    yield clients
+    for client in clients:
+        client.data_manager.close_db_engine()
+
+
+def test_entry_keys_count_up():
+    assert next_entry_key(None) == f"{JOURNAL_PREFIX}{1:020d}.json"
+    assert next_entry_key("") == next_entry_key(None)
+    key = next_entry_key(next_entry_key(None))
+    assert get_entry_sequence(key) == 2
+    assert next_entry_key(key) > key
+
+
+def test_entry_keys_continue_after_legacy_keys():
+    key = next_entry_key(LEGACY_KEY)
+    assert get_entry_sequence(key) == get_entry_sequence(LEGACY_KEY) + 1
+    assert key > LEGACY_KEY
+
+
+def test_entry_round_trip(make_media):
+    media = make_media(title="Başlık", people="Ali YILMAZ")
+    row = {
+        name: getattr(media, name, None)
+        for name in cloud_journal.MEDIA_JOURNAL_COLUMNS
+    }
+    rows = decode_entry(encode_entry([("edit", row)], "test"))
+    assert rows == [row]
+
+
+def test_entries_take_consecutive_keys(clients, media_uuid, bucket):
+    a, b = clients
+    a.set_title(media_uuid, "a1")
+    b.set_title(media_uuid, "b1")
+    a.set_title(media_uuid, "a2")
+
+    assert [get_entry_sequence(key) for key in bucket.journal_keys()] == [1, 2, 3]
+
+
+def test_writer_behind_appends_after_the_newest_entry(clients, media_uuid, bucket):
+    a, b = clients
+    # A copy of b from before a wrote: its cursor is two entries behind
+    behind = Client(os.path.join(os.path.dirname(b.directory), "behind"))
+    shutil.copytree(b.directory, behind.directory, dirs_exist_ok=True)
+    a.set_title(media_uuid, "a1")
+    a.set_title(media_uuid, "a2")
+    b.sync()
+    cursor = b.data_manager._cloud_state["cursor"]
+    assert cursor == bucket.journal_keys()[-1]
+
+    behind.set_title(media_uuid, "late")
+    behind.data_manager.close_db_engine()
+
+    # Appended after b's cursor, so b replays it instead of skipping it
+    assert bucket.journal_keys()[-1] > cursor
+    b.sync()
+    assert b.get_title(media_uuid) == "late"
+
+
+def test_concurrent_writers_retry_with_the_next_key(clients, media_uuid, bucket):
+    a, b = clients
+    create = bucket.create_s3_object
+
+    def create_after_b(key, body):
+        # b takes the key a listed as free, between a's listing and its write
+        bucket.create_s3_object = create
+        cloud_ops.create_s3_object = create
+        b.set_title(media_uuid, "b1")
+        return create(key, body)
+
+    bucket.create_s3_object = create_after_b
+    cloud_ops.create_s3_object = create_after_b
+    a.set_title(media_uuid, "a1")
+
+    keys = bucket.journal_keys()
+    assert [get_entry_sequence(key) for key in keys] == [1, 2]
+    assert decode_entry(bucket.get_s3_object(keys[1]))[0]["title"] == "a1"
+    for client in clients:
+        client.sync()
+        assert client.get_title(media_uuid) == "a1"
+
+
+def test_replay_applies_entries_in_key_order(clients, media_uuid, bucket):
+    a, b = clients
+    a.set_title(media_uuid, "a1")
+    b.set_title(media_uuid, "b1")
+    a.set_title(media_uuid, "a2")
+    b.set_title(media_uuid, "b2")
+
+    for client in clients:
+        client.sync()
+        assert client.get_title(media_uuid) == "b2"
+
+
+def test_compaction_folds_and_expires_entries(clients, media_uuid, bucket):
+    a, b = clients
+    for title in ("a1", "a2", "a3"):
+        a.set_title(media_uuid, title)
+    old = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=2)
+    for key in bucket.journal_keys()[:2]:
+        bucket.objects[key]["LastModified"] = old
+
+    with b.use() as data_manager:
+        assert data_manager.compact_cloud_db()
+    keys = [get_entry_sequence(key) for key in bucket.journal_keys()]
+    base = bucket.objects[CLOUD_DATABASE_KEY]
+
+    # Folded entries still within the retention period are kept
+    assert keys == [3]
+    assert base["Metadata"][JOURNAL_CURSOR_METADATA] == bucket.journal_keys()[-1]
+
+    fresh = Client(os.path.join(os.path.dirname(a.directory), "fresh"))
+    fresh.sync()
+    assert fresh.get_title(media_uuid) == "a3"
+    # New entries continue after the folded ones
+    fresh.set_title(media_uuid, "fresh")
+    assert get_entry_sequence(bucket.journal_keys()[-1]) == 4
+    fresh.data_manager.close_db_engine()
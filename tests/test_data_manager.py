@@ -0,0 +1,62 @@
+import pytest
+
+from config.config import Config
+from data.data_manager import DataManager
+from data.media_filter import MediaFilter
+
+
+def test_close_releases_the_engines(data_manager, make_media, monkeypatch):
+    monkeypatch.setattr(Config, "DATABASE_IN_MEMORY", True)
+    media = make_media()
+    data_manager.insert_media_list_to_local([media])
+    assert data_manager.get_all_media_index().media_uuids() == [media.media_uuid]
+
+    data_manager.close()
+
+    assert data_manager.db_engine is None
+    assert data_manager._replica_engine is None
+    # Used again, it opens them again
+    assert data_manager.get_media_by_uuid(media.media_uuid).title == "Title"
+
+
+@pytest.fixture
+def failing_filter(monkeypatch):
+    """Make filters fail while failing["on"] is set."""
+    failing = {"on": True}
+    build_selection = DataManager._build_selection
+
+    def build_or_fail(*args, **kwargs):
+        if failing["on"]:
+            raise RuntimeError("database is locked")
+        return build_selection(*args, **kwargs)
+
+    monkeypatch.setattr(DataManager, "_build_selection", staticmethod(build_or_fail))
+    return failing
+
+
+def test_failed_filter_is_run_again(data_manager, make_media, failing_filter):
+    media = make_media(title="Deniz")
+    data_manager.insert_media_list_to_local([media])
+    media_filter = MediaFilter(quick="deniz")
+
+    assert len(data_manager.get_filtered_media_index(media_filter)) == 0
+    assert data_manager.get_filtered_media(media_filter) == []
+
+    failing_filter["on"] = False
+    media_index = data_manager.get_filtered_media_index(media_filter)
+    assert media_index.media_uuids() == [media.media_uuid]
+
+
+def test_failed_stream_is_run_again(data_manager, make_media, failing_filter):
+    media = make_media(title="Deniz")
+    data_manager.insert_media_list_to_local([media])
+    media_filter = MediaFilter(quick="deniz")
+
+    stream = data_manager.get_media_index_stream(media_filter)
+    stream.fetch_all()
+    assert stream.total == 0
+
+    failing_filter["on"] = False
+    stream = data_manager.get_media_index_stream(media_filter)
+    stream.fetch_all()
+    assert stream.media_index.media_uuids() == [media.media_uuid]
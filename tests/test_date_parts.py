@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+from data.data_manager import DataManager
+from data.helpers import date_part_values
+from data.media_filter import MediaFilter
+
+FIRST_DATE = datetime.date(1999, 12, 1)
+DATE_ESTS = (7, 3, 1)
+
+
+@pytest.mark.parametrize(
+    "inputs, mode, expected",
+    [
+        (["3", "03", "mart"], "month", {3}),
+        (["ocak", "aralık", "13"], "month", {1, 12, 13}),
+        (["1", "01", "001", " 1", "١"], "day", {1}),
+        (["1999", "99", "02000"], "year", {1999}),
+        (["1", "pazartesi", "07"], "weekday", {0, 6}),
+        (["salı", "Salı"], "weekday", {1}),
+    ],
+)
+def test_date_part_values(inputs, mode, expected):
+    assert date_part_values(inputs, mode) == expected
+
+
+@pytest.fixture
+def dated_media(data_manager, make_media):
+    """Media on 400 consecutive days around a leap year, each precision in turn."""
+    media = [
+        make_media(
+            date_text=(FIRST_DATE + datetime.timedelta(days=i)).strftime("%d.%m.%Y"),
+            date_est=DATE_ESTS[i % len(DATE_ESTS)],
+        )
+        for i in range(400)
+    ]
+    data_manager.insert_media_list_to_local(media)
+    return media
+
+
+@pytest.fixture(params=[True, False], ids=["columns", "python"])
+def filter_dates(request, monkeypatch, data_manager, dated_media):
+    """Date filter results from the date part columns or, as on schemas before
+    them, from date_includes."""
+    if not request.param:
+        monkeypatch.setattr(
+            DataManager, "use_date_part_columns", property(lambda _: False)
+        )
+
+    def filter_dates(**date_parts) -> set[str]:
+        data_manager._invalidate_filter_results()
+        return set(
+            data_manager.get_filtered_media_index(
+                MediaFilter(**date_parts)
+            ).media_uuids()
+        )
+
+    return filter_dates
+
+
+def expected_media(dated_media, parts: set[str], matches) -> set[str]:
+    """Media whose date_est covers all the parts and whose date matches."""
+    precisions = {"day": {7}, "month": {3, 7}, "year": {1, 3, 7}, "weekday": {7}}
+    return {
+        media.media_uuid
+        for media in dated_media
+        if all(media.date_est in precisions[part] for part in parts)
+        and matches(datetime.datetime.strptime(media.date_text, "%d.%m.%Y"))
+    }
+
+
+@pytest.mark.parametrize(
+    "date_parts, parts, matches",
+    [
+        (
+            dict(days="29", months="şubat"),
+            {"day", "month"},
+            lambda d: (d.month, d.day) == (2, 29),
+        ),
+        (dict(days="1,15"), {"day"}, lambda d: d.day in (1, 15)),
+        (dict(months="12,ocak"), {"month"}, lambda d: d.month in (12, 1)),
+        (dict(years="1999"), {"year"}, lambda d: d.year == 1999),
+        (dict(days_of_week="pazar,1"), {"weekday"}, lambda d: d.weekday() in (6, 0)),
+        (
+            dict(days="13", days_of_week="cuma"),
+            {"day", "weekday"},
+            lambda d: d.day == 13 and d.weekday() == 4,
+        ),
+        (
+            dict(months="mart", years="2000"),
+            {"month", "year"},
+            lambda d: (d.year, d.month) == (2000, 3),
+        ),
+        (dict(days="32,abc"), {"day"}, lambda d: False),
+    ],
+)
+def test_date_part_filter(filter_dates, dated_media, date_parts, parts, matches):
+    expected = expected_media(dated_media, parts, matches)
+
+    assert filter_dates(**date_parts) == expected
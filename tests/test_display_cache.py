@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from display_cache import (
+    DISPLAY_CACHE_INDEX_FILENAME,
+    ORPHAN_GRACE_SECONDS,
+    DisplayCache,
+    encode_rendition,
+)
+
+
+def rendition_data(original_size=(4000, 3000)) -> bytes:
+    return encode_rendition(Image.new("RGB", (40, 30)), original_size)
+
+
+def read_index(directory) -> dict:
+    with open(directory / DISPLAY_CACHE_INDEX_FILENAME, encoding="utf-8") as f:
+        return json.load(f)["entries"]
+
+
+def touch(path, age_seconds: float = 0.0) -> None:
+    path.write_bytes(b"")
+    modified_at = time.time() - age_seconds
+    os.utime(path, (modified_at, modified_at))
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return tmp_path / "display"
+
+
+def test_rendition_round_trip(directory):
+    cache = DisplayCache(str(directory), 2**20)
+    assert cache.put_encoded("a.jpg", rendition_data())
+
+    rendition = cache.get("a.jpg")
+    assert rendition.original_size == (4000, 3000)
+    with Image.open(rendition.path) as image:
+        assert image.size == (40, 30)
+
+
+def test_index_is_written_at_most_once_per_interval(directory):
+    cache = DisplayCache(str(directory), 2**20)
+    cache.put_encoded("a.jpg", rendition_data())
+    cache.put_encoded("b.png", rendition_data())
+
+    assert set(read_index(directory)) == {"a.jpg"}
+    cache.flush()
+    assert set(read_index(directory)) == {"a.jpg", "b.png"}
+    assert len(DisplayCache(str(directory), 2**20)) == 2
+
+
+def test_least_recently_used_renditions_are_evicted(directory):
+    size = len(rendition_data())
+    cache = DisplayCache(str(directory), 2 * size)
+    for media_key in ("a.jpg", "b.jpg"):
+        cache.put_encoded(media_key, rendition_data())
+    cache.get("a.jpg")
+    cache.put_encoded("c.jpg", rendition_data())
+
+    assert not cache.contains("b.jpg")
+    assert not (directory / "b.jpg").exists()
+    assert cache.contains("a.jpg") and cache.contains("c.jpg")
+
+
+def test_unlisted_files_are_removed_at_startup(directory):
+    cache = DisplayCache(str(directory), 2**20)
+    cache.put_encoded("listed.jpg", rendition_data())
+    cache.flush()
+    old = ORPHAN_GRACE_SECONDS + 60
+    touch(directory / "listed.jpg", old)
+    touch(directory / "old.jpg", old)
+    touch(directory / "old.jpg.1.2.tmp", old)
+    # May still be written or indexed by another process
+    touch(directory / "new.jpg")
+    touch(directory / "new.jpg.1.2.tmp")
+
+    cache = DisplayCache(str(directory), 2**20)
+
+    assert sorted(os.listdir(directory)) == [
+        DISPLAY_CACHE_INDEX_FILENAME,
+        "listed.jpg",
+        "new.jpg",
+        "new.jpg.1.2.tmp",
+    ]
+    # Only at startup: new renditions are not in index.json until it is saved
+    cache.put_encoded("unsaved.jpg", rendition_data())
+    assert cache.get("listed.jpg") is not None
+    assert (directory / "unsaved.jpg").exists()
+
+
+def test_disabled_cache_stores_nothing(directory):
+    cache = DisplayCache(str(directory), 0)
+
+    assert not cache.put_encoded("a.jpg", rendition_data())
+    assert cache.get("a.jpg") is None
+    assert not directory.exists()
@@ -0,0 +1,121 @@
+import pytest
+
+from data.filter_expression import (
+    AllOf,
+    AnyOf,
+    FilterExpressionError,
+    Term,
+    fold_filter_expression,
+    iter_filter_terms,
+    parse_filter_expression,
+)
+from data.data_manager import DataManager
+from data.media_filter import MediaFilter
+
+TAGS = {
+    "sea": "deniz, yaz",
+    "sand": "kum, yaz",
+    "snow": "kar, kış",
+    "city": "şehir",
+    "none": None,
+}
+
+
+@pytest.mark.parametrize(
+    "expression, tree",
+    [
+        ("Ali", Term("Ali")),
+        ("  Ali   Veli ", Term("Ali   Veli")),
+        ("Ali, Veli", AnyOf((Term("Ali"), Term("Veli")))),
+        ("Ali + Veli", AllOf((Term("Ali"), Term("Veli")))),
+        # "," binds tighter than "+"
+        (
+            "Ali, Veli + Ayşe",
+            AllOf((AnyOf((Term("Ali"), Term("Veli"))), Term("Ayşe"))),
+        ),
+        (
+            "Ali, [Veli + Ayşe]",
+            AnyOf((Term("Ali"), AllOf((Term("Veli"), Term("Ayşe"))))),
+        ),
+        ("[[Ali]]", Term("Ali")),
+        (
+            "[Ali + [Veli, Ayşe]] + Can",
+            AllOf(
+                (
+                    AllOf((Term("Ali"), AnyOf((Term("Veli"), Term("Ayşe"))))),
+                    Term("Can"),
+                )
+            ),
+        ),
+    ],
+)
+def test_parse(expression, tree):
+    assert parse_filter_expression(expression) == tree
+
+
+@pytest.mark.parametrize(
+    "expression", ["", "   ", "Ali +", ", Ali", "Ali,,Veli", "[Ali", "Ali]", "[]"]
+)
+def test_parse_rejects(expression):
+    with pytest.raises(FilterExpressionError):
+        parse_filter_expression(expression)
+
+
+def test_terms_and_fold():
+    tree = parse_filter_expression("[deniz, kum] + yaz")
+
+    assert list(iter_filter_terms(tree)) == ["deniz", "kum", "yaz"]
+    assert (
+        fold_filter_expression(
+            tree,
+            lambda key: f'"{key}"',
+            lambda *operands: f"({' AND '.join(operands)})",
+            lambda *operands: f"({' OR '.join(operands)})",
+        )
+        == '(("deniz" OR "kum") AND "yaz")'
+    )
+
+
+@pytest.fixture(params=[True, False], ids=["search_index", "scan"])
+def search_tags(request, data_manager, make_media):
+    """Tag filter results as TAGS names, through MediaSearch or a LIKE scan."""
+    media = {name: make_media(tags=tags) for name, tags in TAGS.items()}
+    data_manager.insert_media_list_to_local(list(media.values()))
+    names = {item.media_uuid: name for name, item in media.items()}
+    if not request.param:
+        data_manager._search_index_valid = False
+
+    def search(expression: str) -> set[str]:
+        data_manager._invalidate_filter_results()
+        media_index = data_manager.get_filtered_media_index(
+            MediaFilter(tags=expression)
+        )
+        return {names[media_uuid] for media_uuid in media_index.media_uuids()}
+
+    return search
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("yaz", {"sea", "sand"}),
+        ("deniz + yaz", {"sea"}),
+        ("deniz, kar", {"sea", "snow"}),
+        ("[deniz, kum] + yaz", {"sea", "sand"}),
+        ("yaz + [kum, kar]", {"sand"}),
+        # Substrings, shorter than the trigram index answers too
+        ("eni", {"sea"}),
+        ("ku", {"sand"}),
+        ("KIŞ", {"snow"}),
+        ("ŞEHİR", {"city"}),
+        ("deniz + kar", set()),
+    ],
+)
+def test_tag_filter(search_tags, expression, expected):
+    assert search_tags(expression) == expected
+
+
+def test_invalid_filter_matches_nothing(search_tags):
+    with pytest.raises(ValueError, match="Invalid expression"):
+        DataManager._build_filter_condition("deniz +", "tags")
+    assert search_tags("deniz +") == set()
@@ -0,0 +1,70 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config.config import Config
+from ops import http_ops
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Local HTTP server answering each path with its queued statuses, then 200."""
+    monkeypatch.setattr(http_ops, "HTTP_BACKOFF_BASE_SECONDS", 0.0)
+    monkeypatch.setattr(Config, "HTTP_RETRIES", 2)
+    statuses: dict[str, list[int]] = {}
+    requests: list[str] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            queued = statuses.get(self.path.partition("?")[0], [])
+            status = queued.pop(0) if queued else 200
+            body = self.path.encode() if status == 200 else b""
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    httpd.statuses = statuses
+    httpd.requests = requests
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_get(server):
+    assert http_ops.get(f"{server.url}/a.jpg") == b"/a.jpg"
+
+
+def test_get_retries_server_errors(server):
+    server.statuses["/b.jpg"] = [503, 500]
+
+    assert http_ops.get(f"{server.url}/b.jpg") == b"/b.jpg"
+    assert server.requests == ["/b.jpg"] * 3
+
+
+def test_get_gives_up_after_the_retries(server):
+    server.statuses["/c.jpg"] = [503] * 3
+
+    with pytest.raises(http_ops.HttpStatusError) as error:
+        http_ops.get(f"{server.url}/c.jpg?Signature=secret")
+    assert error.value.status == 503
+    assert "secret" not in str(error.value)
+
+
+def test_get_does_not_retry_missing_objects(server):
+    server.statuses["/d.jpg"] = [403]
+
+    with pytest.raises(http_ops.HttpStatusError):
+        http_ops.get(f"{server.url}/d.jpg")
+    assert server.requests == ["/d.jpg"]
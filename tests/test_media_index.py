@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+
+from data.media_index import MediaIndex, MediaIndexEntry, MediaIndexStream
+
+
+def make_rows(count: int, start: int = 0, media_uuid=lambda: uuid.uuid4().hex):
+    return [
+        (media_uuid(), ".jpg" if i % 3 else ".mp4", i % 2 + 1, 2451545.0 + i, i)
+        for i in range(start, start + count)
+    ]
+
+
+def test_entries_round_trip():
+    rows = make_rows(5)
+    media_index = MediaIndex(rows)
+
+    assert len(media_index) == 5
+    assert [tuple(entry) for entry in media_index] == rows
+    assert media_index[-1] == MediaIndexEntry(*rows[-1])
+    assert media_index[1:3] == [MediaIndexEntry(*row) for row in rows[1:3]]
+    assert media_index.media_uuids() == [row[0] for row in rows]
+    with pytest.raises(IndexError):
+        media_index[5]
+
+
+@pytest.mark.parametrize(
+    "media_uuid",
+    [
+        lambda: uuid.uuid4().hex.upper(),
+        lambda: str(uuid.uuid4()),
+        lambda: "legacy",
+    ],
+    ids=["upper_case", "dashed", "other"],
+)
+def test_uuids_that_do_not_pack_are_kept_as_is(media_uuid):
+    rows = make_rows(3, media_uuid=media_uuid)
+
+    assert MediaIndex(rows).media_uuids() == [row[0] for row in rows]
+
+
+def test_stream_pages_mix_packed_and_unpacked_uuids():
+    pages = [make_rows(2), make_rows(2, media_uuid=lambda: "legacy"), make_rows(1)]
+    rows = [row for page in pages for row in page]
+
+    def fetch_page(after, limit):
+        return pages.pop(0) if pages else []
+
+    stream = MediaIndexStream(total=5, fetch_page=fetch_page)
+    stream.fetch_all(page_size=2)
+
+    assert stream.media_index.media_uuids() == [row[0] for row in rows]
+    assert isinstance(stream.media_index._uuids, tuple)
+
+
+def test_stream_fetches_after_the_last_entry():
+    rows = make_rows(7)
+    completed = []
+
+    def fetch_page(after, limit):
+        start = 0 if after is None else int(after.rank) + 1
+        return rows[start : start + limit]
+
+    stream = MediaIndexStream(
+        total=100, fetch_page=fetch_page, on_complete=completed.append
+    )
+    assert stream.fetch_more(3) == 3
+    assert stream.can_fetch_more and stream.total == 100
+    assert not completed
+
+    stream.fetch_all(page_size=3)
+
+    assert not stream.can_fetch_more
+    assert stream.total == 7
+    assert completed == [stream.media_index]
+    assert [tuple(entry) for entry in stream.media_index] == rows
+    # Frozen once complete
+    assert isinstance(stream.media_index._uuids, bytes)
+    assert stream.fetch_more(3) == 0
+
+
+def test_stream_of_a_complete_index():
+    media_index = MediaIndex(make_rows(4))
+    stream = MediaIndexStream(media_index)
+
+    assert stream.total == 4
+    assert not stream.can_fetch_more
@@ -0,0 +1,65 @@
+import pytest
+from PIL import Image
+
+from config.config import Config
+from display_cache import encode_rendition
+from media_loader import MediaLoader
+from ops import cloud_ops
+
+TARGET_SIZE = (800, 600)
+
+
+@pytest.fixture
+def media_loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MEDIA_DIR", str(tmp_path / "media"))
+    monkeypatch.setattr(Config, "THUMBNAILS_DIR", str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(Config, "LOCAL_STORAGE_ENABLED", False)
+    monkeypatch.setattr(Config, "DISPLAY_CACHE_MAX_MB", 1)
+    return MediaLoader()
+
+
+@pytest.fixture
+def cloud(monkeypatch):
+    """Originals of every key and renditions of those in renditions, counting
+    the downloads of each."""
+
+    class Cloud:
+        renditions: set[str] = set()
+        original_size = (4000, 3000)
+        downloads: list[str] = []
+
+        @staticmethod
+        def get_display_rendition_from_cloudfront(media_uuid):
+            Cloud.downloads.append(f"display/{media_uuid}")
+            if media_uuid not in Cloud.renditions:
+                return None
+            return encode_rendition(Image.new("RGB", (400, 300)), (4000, 3000))
+
+        @staticmethod
+        def get_image_from_cloudfront(media_key, prefix):
+            Cloud.downloads.append(f"{prefix}{media_key}")
+            return Image.new("RGB", Cloud.original_size)
+
+    for name in ("get_display_rendition_from_cloudfront", "get_image_from_cloudfront"):
+        monkeypatch.setattr(cloud_ops, name, getattr(Cloud, name))
+    return Cloud
+
+
+def test_cloud_rendition_is_downloaded_once(media_loader, cloud):
+    cloud.renditions.add("a")
+    for _ in range(2):
+        image = media_loader.get_image("a.jpg", TARGET_SIZE)
+        assert MediaLoader.get_original_size(image).width() == 4000
+
+    assert cloud.downloads == ["display/a"]
+
+
+def test_missing_cloud_rendition_is_asked_for_once(media_loader, cloud):
+    # Too small for a local rendition, so every view downloads the original
+    cloud.original_size = (2000, 1500)
+    for _ in range(3):
+        image = media_loader.get_image("b.jpg", TARGET_SIZE)
+        assert MediaLoader.get_original_size(image).width() == 2000
+
+    assert cloud.downloads == ["display/b"] + ["media/b.jpg"] * 3
+    assert media_loader.display_cache.is_missing_in_cloud("b.jpg")
@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import text
+
+from data.media_filter import MediaFilter
+from data.migrations import (
+    LATEST_SCHEMA_VERSION,
+    MEDIA_PERSON_TOKEN_SCHEMA_VERSION,
+    PEOPLE_CONTROL_CHARS_SCHEMA_VERSION,
+    apply_migrations,
+    rebuild_media_person,
+)
+from data.vocabulary import get_row_people
+
+PEOPLE = {
+    "ali": "Ali YILMAZ",
+    "ayse": "Ayşe KAYA",
+    "both": "Ali YILMAZ, Ayşe KAYA",
+    "halil": "Halil ÖZTÜRK",
+    "alim": "Alim Can ŞAHİN",
+    "isil": "Işıl İNCE",
+    "none": None,
+}
+
+
+@pytest.fixture
+def people_media(data_manager, make_media):
+    media = {name: make_media(people=people) for name, people in PEOPLE.items()}
+    data_manager.insert_media_list_to_local(list(media.values()))
+    return {media_uuid.media_uuid: name for name, media_uuid in media.items()}
+
+
+@pytest.fixture(params=[True, False], ids=["token_index", "scan"])
+def search_people(request, data_manager, people_media):
+    """People filter results as PEOPLE names, from MediaPersonToken or, as on
+    schemas before it, from Media.people."""
+    if not request.param:
+        data_manager.schema_version = MEDIA_PERSON_TOKEN_SCHEMA_VERSION - 1
+
+    def search(expression: str) -> set[str]:
+        data_manager._invalidate_filter_results()
+        media_index = data_manager.get_filtered_media_index(
+            MediaFilter(people=expression)
+        )
+        return {people_media[media_uuid] for media_uuid in media_index.media_uuids()}
+
+    return search
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        # Whole names, first names and surnames
+        ("Ali YILMAZ", {"ali", "both"}),
+        ("YILMAZ", {"ali", "both"}),
+        ("kaya", {"ayse", "both"}),
+        # Any word may be cut short, the last one of the key too
+        ("Ay", {"ayse", "both"}),
+        ("Ali", {"ali", "both", "alim"}),
+        ("ali yıl", {"ali", "both"}),
+        ("Can", {"alim"}),
+        ("Alim Can Ş", {"alim"}),
+        # Turkish i-insensitive
+        ("ışıl", {"isil"}),
+        ("IŞIL ince", {"isil"}),
+        ("  ali   yilmaz ", {"ali", "both"}),
+        # Words are matched from their start, in order, within one person
+        ("li", set()),
+        ("lil", set()),
+        ("YILMAZ Ali", set()),
+        ("YILMAZ Ayşe", set()),
+        # LIKE wildcards are plain characters
+        ("%", set()),
+        ("A_i", set()),
+        # Operators
+        ("Ali + Ayşe", {"both"}),
+        ("Halil, ışıl", {"halil", "isil"}),
+        ("[Ali + Kaya], Halil", {"both", "halil"}),
+    ],
+)
+def test_people_filter(search_people, expression, expected):
+    assert search_people(expression) == expected
+
+
+def test_people_filter_follows_edits(data_manager, search_people, people_media):
+    media_uuid = next(key for key, name in people_media.items() if name == "halil")
+    media = data_manager.get_media_by_uuid(media_uuid)
+    media.people = "Deniz ARSLAN"
+    data_manager.edit_media(media)
+
+    assert search_people("Halil") == set()
+    assert search_people("arslan") == {"halil"}
+
+
+def test_people_filter_skips_hidden_media(data_manager, search_people, people_media):
+    media_uuid = next(key for key, name in people_media.items() if name == "isil")
+    data_manager.set_media_deleted(media_uuid)
+
+    assert search_people("ışıl") == set()
+
+
+def test_person_tokens_rebuild(data_manager, people_media):
+    def tails() -> list[tuple]:
+        with data_manager.get_db_engine().connect() as connection:
+            return connection.execute(
+                text(
+                    "SELECT media_uuid, position, token, tail FROM MediaPersonToken "
+                    "ORDER BY media_uuid, position, token"
+                )
+            ).all()
+
+    from_triggers = tails()
+    with data_manager.get_db_engine().begin() as connection:
+        rebuild_media_person(connection)
+
+    assert tails() == from_triggers
+    alim = next(key for key, name in people_media.items() if name == "alim")
+    assert [row[3] for row in from_triggers if row[0] == alim] == [
+        "alim can şahin",
+        "can şahin",
+        "şahin",
+    ]
+
+
+def test_people_with_control_characters(data_manager, make_media):
+    people = "Veli\x0bÇAKIR, Deniz ARSLAN\x0c, \x1fEce\x07 SU"
+    media = make_media(people=people, location="İzmir\x0b")
+    data_manager.insert_media_list_to_local([media])
+
+    media_index = data_manager.get_filtered_media_index(MediaFilter(people="veli"))
+    assert list(media_index.media_uuids()) == [media.media_uuid]
+    media_index = data_manager.get_filtered_media_index(MediaFilter(people="ece"))
+    assert list(media_index.media_uuids()) == [media.media_uuid]
+
+    # Counted from MediaPerson as get_row_people splits and trims the value
+    data_manager._vocabulary = None
+    data_manager._write_vocabulary_file = lambda *args: None
+    data_manager._read_vocabulary_file = lambda *args: None
+    assert {person for person, _ in data_manager.get_people_counts()} == (
+        get_row_people(people)
+    )
+    assert data_manager.get_location_counts() == [("İzmir", 1)]
+
+
+def test_control_characters_migration_restores_people(data_manager, make_media):
+    media = make_media(people="Veli\x0bÇAKIR")
+    data_manager.insert_media_list_to_local([media])
+    engine = data_manager.get_db_engine()
+    # As the earlier triggers left it
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM MediaPerson")
+        connection.exec_driver_sql(
+            f"PRAGMA user_version = {PEOPLE_CONTROL_CHARS_SCHEMA_VERSION - 1}"
+        )
+
+    assert apply_migrations(engine) == LATEST_SCHEMA_VERSION
+    data_manager._invalidate_filter_results()
+    media_index = data_manager.get_filtered_media_index(MediaFilter(people="veli"))
+    assert list(media_index.media_uuids()) == [media.media_uuid]
@@ -0,0 +1,91 @@
+import os
+import uuid
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from data.media_index import MediaIndexStream
+from gui.main.ListModelThumbnail import ListModelThumbnail, MediaThumbnailKeys
+
+MEDIA_COUNT = 1000
+BATCH_SIZE = 100
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def model(qapp):
+    """A model over a stream of MEDIA_COUNT media, paged as DataManager does."""
+    rows = [
+        (uuid.uuid4().hex, "jpg", 1, 2450000.0 + i, 1.0) for i in range(MEDIA_COUNT)
+    ]
+    pages = []
+
+    def fetch_page(after, limit):
+        start = rows.index(tuple(after)) + 1 if after is not None else 0
+        pages.append(limit)
+        return rows[start : start + limit]
+
+    stream = MediaIndexStream(total=MEDIA_COUNT, fetch_page=fetch_page)
+    model = ListModelThumbnail(
+        MediaThumbnailKeys(stream.media_index), None, media_stream=stream
+    )
+    model.batch_size = BATCH_SIZE
+    model.pages = pages
+    return model
+
+
+def run_until(qapp, condition, turns=100):
+    for _ in range(turns):
+        if condition():
+            return
+        qapp.processEvents()
+    raise AssertionError("Not reached")
+
+
+def test_fetch_until_last_row_leaves_first_paint_alone(qapp, model):
+    loaded = []
+    model.signal.loaded.connect(lambda: loaded.append(model.rowCount()))
+    model.fetchMore()  # As the view does when it is shown
+    fetched = []
+
+    # As MainWindow.try_select_item does for the END start
+    model.fetch_until(MEDIA_COUNT - 1, lambda: fetched.append(model.rowCount()))
+
+    # Nothing more is fetched before the event loop runs, so the view paints
+    assert model.rowCount() == BATCH_SIZE
+    assert len(model.pages) == 1
+    qapp.processEvents()
+    assert model.rowCount() == 2 * BATCH_SIZE
+
+    run_until(qapp, lambda: fetched)
+    assert fetched == [MEDIA_COUNT]
+    # Only the view's own batch said so; the selection follows on_fetched
+    assert loaded == [BATCH_SIZE]
+
+
+def test_fetch_until_stops_when_cancelled(qapp, model):
+    model.fetchMore()
+    fetched = []
+    model.fetch_until(MEDIA_COUNT - 1, lambda: fetched.append(True))
+    qapp.processEvents()
+
+    model.cancel_fetch()
+    for _ in range(20):
+        qapp.processEvents()
+
+    assert not fetched
+    assert model.rowCount() < MEDIA_COUNT
+
+
+def test_fetch_until_loaded_row_calls_back(qapp, model):
+    model.fetchMore()
+    fetched = []
+    model.fetch_until(BATCH_SIZE - 1, lambda: fetched.append(model.rowCount()))
+
+    run_until(qapp, lambda: fetched)
+    assert fetched == [BATCH_SIZE]
@@ -0,0 +1,40 @@
+from PIL import Image
+
+from gui.add.DialogUpload import UploadThread
+from ops import cloud_ops
+
+
+def test_upload_continues_without_a_display_rendition(
+    tmp_path, monkeypatch, data_manager, make_media
+):
+    uploaded = []
+    monkeypatch.setattr(
+        cloud_ops,
+        "upload_to_s3_bucket",
+        lambda path, key, prefix: uploaded.append(f"{prefix}{key}"),
+    )
+    monkeypatch.setattr(
+        cloud_ops, "put_s3_object", lambda key, body: uploaded.append(key)
+    )
+    monkeypatch.setattr(data_manager, "upload_local_db", lambda: True)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+    good = tmp_path / "good.jpg"
+    Image.new("RGB", (64, 48)).save(good)
+    media_list = [make_media(), make_media()]
+
+    thread = UploadThread([str(broken), str(good)], media_list, data_manager)
+    errors = []
+    thread.error_occurred.connect(errors.append)
+    thread.run()
+
+    first, second = (media.media_uuid for media in media_list)
+    assert errors == []
+    assert uploaded == [
+        f"media/{first}.jpg",
+        f"thumbnails/{first}.jpg",
+        f"media/{second}.jpg",
+        f"thumbnails/{second}.jpg",
+        f"display/{second}.jpg",
+    ]
+    assert data_manager.get_media_by_uuid(first) is not None
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from config.config import Config
+from data.data_manager import DataManager
+from data.orm import Media
+from data.helpers import turkish_normalize
+from data.vocabulary import Vocabulary
+
+MEDIA = [
+    # people, location, private
+    ("Ali YILMAZ, Ayşe KAYA", "İSTANBUL", 0),
+    ("Ali YILMAZ", " İSTANBUL ", 0),
+    ("Ayşe KAYA, Ayşe KAYA", "ANKARA", 1),
+    (" Halil ÖZTÜRK ,, ", "   ", 0),
+    (None, "", 1),
+    ("Işıl İNCE", "İZMİR", 2),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["media_person", "scan"])
+def vocabulary_media(request, monkeypatch, data_manager, make_media):
+    """Media of MEDIA by index, with people counted from MediaPerson or, as on
+    schemas before it, split from Media.people."""
+    if not request.param:
+        monkeypatch.setattr(DataManager, "use_person_index", property(lambda _: False))
+    media = [
+        make_media(people=people, location=location, private=private)
+        for people, location, private in MEDIA
+    ]
+    data_manager.insert_media_list_to_local(media)
+    return [item.media_uuid for item in media]
+
+
+def scan_vocabulary(data_manager) -> Vocabulary:
+    """The counts as get_vocabulary built them from every Media row in Python."""
+    with data_manager.get_session() as session:
+        rows = session.execute(
+            select(Media.people, Media.location, Media.status, Media.private)
+        ).all()
+    return Vocabulary.from_rows(rows, 0)
+
+
+@pytest.mark.parametrize("privacy_level", [0, 1, 2])
+def test_vocabulary_matches_scan(
+    data_manager, vocabulary_media, monkeypatch, privacy_level
+):
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", privacy_level)
+    scan = scan_vocabulary(data_manager)
+
+    assert data_manager.get_people_counts() == scan.get_people_counts(privacy_level)
+    assert data_manager.get_location_counts() == scan.get_location_counts(
+        privacy_level
+    )
+
+
+def test_vocabulary_counts(data_manager, vocabulary_media, monkeypatch):
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 1)
+
+    # A person listed twice on one media counts once
+    assert data_manager.get_people_counts() == [
+        ("Ali YILMAZ", 2),
+        ("Ayşe KAYA", 2),
+        ("Halil ÖZTÜRK", 1),
+    ]
+    assert data_manager.get_location_counts() == [("ANKARA", 1), ("İSTANBUL", 2)]
+
+
+def test_vocabulary_follows_writes(data_manager, vocabulary_media, monkeypatch):
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 2)
+    data_manager.get_vocabulary()
+
+    media = data_manager.get_media_by_uuid(vocabulary_media[0])
+    media.location = "ANKARA"
+    data_manager.edit_media(media)
+    data_manager.set_media_deleted(vocabulary_media[2])
+
+    scan = scan_vocabulary(data_manager)
+    assert data_manager.get_people_counts() == scan.get_people_counts(2)
+    assert data_manager.get_location_counts() == scan.get_location_counts(2)
+    assert ("ANKARA", 1) in data_manager.get_location_counts()
+
+
+def test_vocabulary_rebuilds_when_stale(data_manager, vocabulary_media, make_media):
+    data_manager.get_vocabulary()
+    # Not through _updating_vocabulary, so only DataVersion tells
+    data_manager.insert_media_list_to_local([make_media(people="Deniz ARSLAN")])
+
+    assert ("Deniz ARSLAN", 1) in data_manager.get_people_counts()
+
+
+def test_vocabulary_keeps_interleaved_writes(
+    data_manager, vocabulary_media, monkeypatch
+):
+    data_manager.get_vocabulary()
+
+    def other_writer():
+        # Another tool on album.db; it waits for the edit's write lock
+        connection = sqlite3.connect(data_manager.get_db_path(), timeout=5)
+        connection.create_function("turkish_normalize", 1, turkish_normalize)
+        with connection:
+            connection.execute(
+                "UPDATE Media SET people = 'Deniz ARSLAN' WHERE media_uuid = ?",
+                (vocabulary_media[5],),
+            )
+        connection.close()
+
+    writer = threading.Thread(target=other_writer)
+    read_rows = DataManager._read_vocabulary_rows
+
+    def read_rows_while_writing(connection, media_uuids):
+        # Between the rows read before the edit and the edit itself
+        if not writer.is_alive() and writer.ident is None:
+            writer.start()
+            writer.join(0.2)
+        return read_rows(connection, media_uuids)
+
+    monkeypatch.setattr(
+        DataManager, "_read_vocabulary_rows", staticmethod(read_rows_while_writing)
+    )
+    media = data_manager.get_media_by_uuid(vocabulary_media[0])
+    media.location = "ANKARA"
+    data_manager.edit_media(media)
+    writer.join()
+
+    monkeypatch.setattr(Config, "MEDIA_PRIVACY_LEVEL", 2)
+    scan = scan_vocabulary(data_manager)
+    assert data_manager.get_people_counts() == scan.get_people_counts(2)
+    assert data_manager.get_location_counts() == scan.get_location_counts(2)
+    assert ("Deniz ARSLAN", 1) in data_manager.get_people_counts()